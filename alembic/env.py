@@ -22,8 +22,14 @@ from backend.database.connection import Base
 
 
 from backend.models.usuario import Usuario
+from backend.models.catalogo import CatalogoItem
 from backend.models.roupa import Roupa
 from backend.models.movimentacao import Movimentacao
+from backend.models.movimentacao_diaria import MovimentacaoDiaria
+from backend.models.estoque_versao import EstoqueVersao
+from backend.models.idempotencia import ChaveIdempotencia
+from backend.models.alerta import AlertaEstoque, EventoAlerta
+from backend.models.snapshot import SnapshotSaldo, SnapshotSaldoItem
 
 
 config = context.config
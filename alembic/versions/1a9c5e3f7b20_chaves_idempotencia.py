@@ -0,0 +1,38 @@
+"""chaves_idempotencia
+
+Revision ID: 1a9c5e3f7b20
+Revises: e7d3b91f4a58
+Create Date: 2026-10-18 18:12:44.301958
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1a9c5e3f7b20'
+down_revision: Union[str, Sequence[str], None] = 'e7d3b91f4a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('chaves_idempotencia',
+    sa.Column('usuario', sa.String(), nullable=False),
+    sa.Column('chave', sa.String(), nullable=False),
+    sa.Column('hash_requisicao', sa.String(), nullable=False),
+    sa.Column('resposta', sa.JSON(), nullable=True),
+    sa.Column('criada_em', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('usuario', 'chave'),
+    schema='sicro'
+    )
+    op.create_index('ix_chaves_idempotencia_criada_em', 'chaves_idempotencia', ['criada_em'], unique=False, schema='sicro')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chaves_idempotencia_criada_em', table_name='chaves_idempotencia', schema='sicro')
+    op.drop_table('chaves_idempotencia', schema='sicro')
@@ -0,0 +1,44 @@
+"""indices_historico_keyset
+
+Revision ID: 3f1c9a7b2d40
+Revises: ac587424043d
+Create Date: 2026-10-18 09:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7b2d40'
+down_revision: Union[str, Sequence[str], None] = 'ac587424043d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDICES = [
+    ('ix_movimentacoes_data_id', ['data', 'id']),
+    ('ix_movimentacoes_usuario_data_id', ['usuario', 'data', 'id']),
+    ('ix_movimentacoes_item_data_id', ['tipo', 'tamanho', 'data', 'id']),
+    ('ix_movimentacoes_acao_data_id', ['acao', 'data', 'id']),
+    ('ix_movimentacoes_ordem_id', ['ordem_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY não trava as gravações do /movimentar, mas não roda dentro de transação
+    with op.get_context().autocommit_block():
+        for nome, colunas in INDICES:
+            op.create_index(nome, 'movimentacoes', colunas, unique=False, schema='sicro',
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for nome, _ in reversed(INDICES):
+            op.drop_index(nome, table_name='movimentacoes', schema='sicro',
+                          postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,35 @@
+"""estoque_versao
+
+Revision ID: 5b7e2f0c9a11
+Revises: 8d2e4b6a1c93
+Create Date: 2026-10-18 11:26:54.730019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2f0c9a11'
+down_revision: Union[str, Sequence[str], None] = '8d2e4b6a1c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('estoque_versao',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('versao', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    schema='sicro'
+    )
+    # Linha única usada pelo contador
+    op.execute("INSERT INTO sicro.estoque_versao (id, versao) VALUES (1, 0)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('estoque_versao', schema='sicro')
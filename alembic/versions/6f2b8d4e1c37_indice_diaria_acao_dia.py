@@ -0,0 +1,35 @@
+"""indice movimentacao_diaria (acao, dia)
+
+Revision ID: 6f2b8d4e1c37
+Revises: 1a9c5e3f7b20
+Create Date: 2026-10-18 20:05:31.774120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f2b8d4e1c37'
+down_revision: Union[str, Sequence[str], None] = '1a9c5e3f7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Planejamento, previsão e ranking filtram por ação + período: a PK (dia, item_id, acao)
+    # lê o período inteiro e descarta as entradas; este índice cobre a consulta sozinho
+    with op.get_context().autocommit_block():
+        op.create_index('ix_movimentacao_diaria_acao_dia', 'movimentacao_diaria', ['acao', 'dia', 'item_id'],
+                        unique=False, schema='sicro', postgresql_include=['quantidade'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_movimentacao_diaria_acao_dia', table_name='movimentacao_diaria', schema='sicro',
+                      postgresql_concurrently=True, if_exists=True)
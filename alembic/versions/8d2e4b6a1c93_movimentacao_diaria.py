@@ -0,0 +1,45 @@
+"""movimentacao_diaria
+
+Revision ID: 8d2e4b6a1c93
+Revises: 3f1c9a7b2d40
+Create Date: 2026-10-18 10:41:07.118520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e4b6a1c93'
+down_revision: Union[str, Sequence[str], None] = '3f1c9a7b2d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('movimentacao_diaria',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('tipo', sa.String(), nullable=False),
+    sa.Column('tamanho', sa.String(), nullable=False),
+    sa.Column('acao', sa.String(), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dia', 'tipo', 'tamanho', 'acao'),
+    schema='sicro'
+    )
+
+    # Backfill com o histórico existente (mesma regra do "python -m backend.cli reconstruir-diario")
+    op.execute("""
+        INSERT INTO sicro.movimentacao_diaria (dia, tipo, tamanho, acao, quantidade)
+        SELECT (data AT TIME ZONE 'America/Sao_Paulo')::date, tipo, COALESCE(tamanho, ''), acao, SUM(quantidade)
+        FROM sicro.movimentacoes
+        WHERE data IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('movimentacao_diaria', schema='sicro')
@@ -0,0 +1,55 @@
+"""alertas_estoque
+
+Revision ID: 9b4d2f6a8e15
+Revises: 6f2b8d4e1c37
+Create Date: 2026-10-18 20:41:09.518227
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4d2f6a8e15'
+down_revision: Union[str, Sequence[str], None] = '6f2b8d4e1c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('roupas', sa.Column('estoque_minimo', sa.Integer(), nullable=True), schema='sicro')
+    op.add_column('roupas', sa.Column('estoque_alvo', sa.Integer(), nullable=True), schema='sicro')
+    op.create_table('alertas_estoque',
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('estado', sa.String(), nullable=False),
+    sa.Column('desde', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['sicro.catalogo_itens.id'], ),
+    sa.PrimaryKeyConstraint('item_id'),
+    schema='sicro'
+    )
+    op.create_table('eventos_alerta',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('anterior', sa.String(), nullable=False),
+    sa.Column('estado', sa.String(), nullable=False),
+    sa.Column('saldo', sa.Integer(), nullable=False),
+    sa.Column('estoque_minimo', sa.Integer(), nullable=True),
+    sa.Column('ordem_id', sa.String(), nullable=True),
+    sa.Column('data', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['sicro.catalogo_itens.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    schema='sicro'
+    )
+    op.create_index('ix_eventos_alerta_item_id', 'eventos_alerta', ['item_id', 'id'], unique=False, schema='sicro')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_eventos_alerta_item_id', table_name='eventos_alerta', schema='sicro')
+    op.drop_table('eventos_alerta', schema='sicro')
+    op.drop_table('alertas_estoque', schema='sicro')
+    op.drop_column('roupas', 'estoque_alvo', schema='sicro')
+    op.drop_column('roupas', 'estoque_minimo', schema='sicro')
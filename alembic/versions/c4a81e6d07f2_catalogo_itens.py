@@ -0,0 +1,168 @@
+"""catalogo_itens
+
+Revision ID: c4a81e6d07f2
+Revises: 5b7e2f0c9a11
+Create Date: 2026-10-18 14:03:19.552846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a81e6d07f2'
+down_revision: Union[str, Sequence[str], None] = '5b7e2f0c9a11'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Ordem que antes estava fixa no código (get_saldo / planejamento) vira o sort_key inicial
+ORDEM_TIPOS = ["Macacão", "Botas", "Panos", "Óculos"]
+ORDEM_TAMANHOS = ["PP", "P", "M", "G", "GG", "G3", "G4"]
+LOTE = 50_000
+
+
+def _case(coluna, valores, outro):
+    quando = " ".join(f"WHEN '{v}' THEN {i}" for i, v in enumerate(valores))
+    return f"(CASE {coluna} {quando} ELSE {outro} END)"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 1. Catálogo
+    op.create_table('catalogo_itens',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(), nullable=False),
+    sa.Column('tamanho', sa.String(), nullable=True),
+    sa.Column('sort_key', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('ativo', sa.Boolean(), nullable=False, server_default=sa.true()),
+    sa.PrimaryKeyConstraint('id'),
+    schema='sicro'
+    )
+    op.create_index('ix_sicro_catalogo_itens_id', 'catalogo_itens', ['id'], unique=False, schema='sicro')
+    op.create_index('ix_catalogo_itens_sort_key', 'catalogo_itens', ['sort_key', 'id'], unique=False, schema='sicro')
+    op.execute("CREATE UNIQUE INDEX uq_catalogo_itens_tipo_tamanho ON sicro.catalogo_itens (tipo, COALESCE(tamanho, ''))")
+
+    # Tamanho "" e NULL são o mesmo item (o índice único usa COALESCE): o catálogo guarda NULL e
+    # as junções abaixo comparam com NULLIF(tamanho, ''), senão sobra item_id NULL
+    sort_key = f"{_case('tipo', ORDEM_TIPOS, 99)} * 1000 + {_case('tamanho', ORDEM_TAMANHOS, 999)}"
+    op.execute(f"""
+        INSERT INTO sicro.catalogo_itens (tipo, tamanho, sort_key, ativo)
+        SELECT tipo, tamanho, {sort_key}, true
+        FROM (SELECT tipo, NULLIF(tamanho, '') AS tamanho FROM sicro.roupas
+              UNION
+              SELECT tipo, NULLIF(tamanho, '') FROM sicro.movimentacoes) itens
+    """)
+
+    # 2. roupas -> item_id (linhas duplicadas do mesmo item são somadas numa só)
+    op.add_column('roupas', sa.Column('item_id', sa.Integer(), nullable=True), schema='sicro')
+    op.execute("""
+        UPDATE sicro.roupas r SET item_id = c.id
+        FROM sicro.catalogo_itens c
+        WHERE c.tipo = r.tipo AND c.tamanho IS NOT DISTINCT FROM NULLIF(r.tamanho, '')
+    """)
+    op.execute("""
+        UPDATE sicro.roupas r SET saldo = s.total
+        FROM (SELECT item_id, MIN(id) AS id, SUM(COALESCE(saldo, 0)) AS total
+              FROM sicro.roupas GROUP BY item_id HAVING COUNT(*) > 1) s
+        WHERE r.id = s.id
+    """)
+    op.execute("""
+        DELETE FROM sicro.roupas r
+        USING (SELECT item_id, MIN(id) AS id FROM sicro.roupas GROUP BY item_id) manter
+        WHERE r.item_id = manter.item_id AND r.id <> manter.id
+    """)
+    op.alter_column('roupas', 'item_id', nullable=False, schema='sicro')
+    op.create_unique_constraint('uq_roupas_item_id', 'roupas', ['item_id'], schema='sicro')
+    op.create_foreign_key('fk_roupas_item_id', 'roupas', 'catalogo_itens', ['item_id'], ['id'],
+                          source_schema='sicro', referent_schema='sicro')
+    op.drop_column('roupas', 'tipo', schema='sicro')
+    op.drop_column('roupas', 'tamanho', schema='sicro')
+
+    # 3. movimentacoes -> item_id, em lotes por faixa de id (não reescreve tudo numa transação só)
+    op.add_column('movimentacoes', sa.Column('item_id', sa.Integer(), nullable=True), schema='sicro')
+    conn = op.get_bind()
+    maior_id = conn.execute(sa.text("SELECT COALESCE(MAX(id), 0) FROM sicro.movimentacoes")).scalar()
+    with op.get_context().autocommit_block():
+        for inicio in range(0, maior_id + 1, LOTE):
+            conn.execute(sa.text("""
+                UPDATE sicro.movimentacoes m SET item_id = c.id
+                FROM sicro.catalogo_itens c
+                WHERE m.id >= :inicio AND m.id < :fim
+                  AND c.tipo = m.tipo AND c.tamanho IS NOT DISTINCT FROM NULLIF(m.tamanho, '')
+            """), {"inicio": inicio, "fim": inicio + LOTE})
+    op.alter_column('movimentacoes', 'item_id', nullable=False, schema='sicro')
+    op.create_foreign_key('fk_movimentacoes_item_id', 'movimentacoes', 'catalogo_itens', ['item_id'], ['id'],
+                          source_schema='sicro', referent_schema='sicro')
+    op.drop_index('ix_movimentacoes_item_data_id', table_name='movimentacoes', schema='sicro', if_exists=True)
+    op.create_index('ix_movimentacoes_item_data_id', 'movimentacoes', ['item_id', 'data', 'id'], unique=False, schema='sicro')
+    op.drop_column('movimentacoes', 'tipo', schema='sicro')
+    op.drop_column('movimentacoes', 'tamanho', schema='sicro')
+
+    # 4. Agregado diário passa a ser por item_id (recalculado a partir do histórico)
+    op.drop_table('movimentacao_diaria', schema='sicro')
+    op.create_table('movimentacao_diaria',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('acao', sa.String(), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['sicro.catalogo_itens.id']),
+    sa.PrimaryKeyConstraint('dia', 'item_id', 'acao'),
+    schema='sicro'
+    )
+    op.execute("""
+        INSERT INTO sicro.movimentacao_diaria (dia, item_id, acao, quantidade)
+        SELECT (data AT TIME ZONE 'America/Sao_Paulo')::date, item_id, acao, SUM(quantidade)
+        FROM sicro.movimentacoes
+        WHERE data IS NOT NULL
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Agregado diário volta a ser por texto
+    op.drop_table('movimentacao_diaria', schema='sicro')
+    op.create_table('movimentacao_diaria',
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('tipo', sa.String(), nullable=False),
+    sa.Column('tamanho', sa.String(), nullable=False),
+    sa.Column('acao', sa.String(), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dia', 'tipo', 'tamanho', 'acao'),
+    schema='sicro'
+    )
+
+    op.add_column('movimentacoes', sa.Column('tipo', sa.String(), nullable=True), schema='sicro')
+    op.add_column('movimentacoes', sa.Column('tamanho', sa.String(), nullable=True), schema='sicro')
+    op.execute("""
+        UPDATE sicro.movimentacoes m SET tipo = c.tipo, tamanho = c.tamanho
+        FROM sicro.catalogo_itens c WHERE c.id = m.item_id
+    """)
+    op.alter_column('movimentacoes', 'tipo', nullable=False, schema='sicro')
+    op.drop_index('ix_movimentacoes_item_data_id', table_name='movimentacoes', schema='sicro')
+    op.create_index('ix_movimentacoes_item_data_id', 'movimentacoes', ['tipo', 'tamanho', 'data', 'id'], unique=False, schema='sicro')
+    op.drop_constraint('fk_movimentacoes_item_id', 'movimentacoes', schema='sicro', type_='foreignkey')
+    op.drop_column('movimentacoes', 'item_id', schema='sicro')
+
+    op.add_column('roupas', sa.Column('tipo', sa.String(), nullable=True), schema='sicro')
+    op.add_column('roupas', sa.Column('tamanho', sa.String(), nullable=True), schema='sicro')
+    op.execute("""
+        UPDATE sicro.roupas r SET tipo = c.tipo, tamanho = c.tamanho
+        FROM sicro.catalogo_itens c WHERE c.id = r.item_id
+    """)
+    op.alter_column('roupas', 'tipo', nullable=False, schema='sicro')
+    op.drop_constraint('fk_roupas_item_id', 'roupas', schema='sicro', type_='foreignkey')
+    op.drop_constraint('uq_roupas_item_id', 'roupas', schema='sicro', type_='unique')
+    op.drop_column('roupas', 'item_id', schema='sicro')
+
+    op.execute("""
+        INSERT INTO sicro.movimentacao_diaria (dia, tipo, tamanho, acao, quantidade)
+        SELECT (data AT TIME ZONE 'America/Sao_Paulo')::date, tipo, COALESCE(tamanho, ''), acao, SUM(quantidade)
+        FROM sicro.movimentacoes
+        WHERE data IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+    """)
+
+    op.drop_table('catalogo_itens', schema='sicro')
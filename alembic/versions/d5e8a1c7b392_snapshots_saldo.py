@@ -0,0 +1,45 @@
+"""snapshots_saldo
+
+Revision ID: d5e8a1c7b392
+Revises: 9b4d2f6a8e15
+Create Date: 2026-10-18 21:37:52.904416
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e8a1c7b392'
+down_revision: Union[str, Sequence[str], None] = '9b4d2f6a8e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('snapshots_saldo',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ultimo_id', sa.Integer(), nullable=False),
+    sa.Column('criado_em', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('divergencias', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    schema='sicro'
+    )
+    op.create_table('snapshots_saldo_itens',
+    sa.Column('snapshot_id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('saldo', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['sicro.catalogo_itens.id'], ),
+    sa.ForeignKeyConstraint(['snapshot_id'], ['sicro.snapshots_saldo.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('snapshot_id', 'item_id'),
+    schema='sicro'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('snapshots_saldo_itens', schema='sicro')
+    op.drop_table('snapshots_saldo', schema='sicro')
@@ -0,0 +1,166 @@
+"""particiona movimentacoes por mes
+
+Revision ID: e7d3b91f4a58
+Revises: c4a81e6d07f2
+Create Date: 2026-10-18 16:41:07.118204
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7d3b91f4a58'
+down_revision: Union[str, Sequence[str], None] = 'c4a81e6d07f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MESES_FUTUROS = 3
+LOTE = 50_000
+COLUNAS = "id, ordem_id, usuario, item_id, quantidade, acao, data"
+# Linhas antigas sem data vão para a partição padrão (a chave da partição não pode ser nula)
+SELECT_COPIA = ("SELECT id, ordem_id, usuario, item_id, quantidade, acao, "
+                "COALESCE(data, to_timestamp(0)) FROM sicro.movimentacoes")
+
+INDICES = [
+    ('ix_sicro_movimentacoes_id', ['id']),
+    ('ix_movimentacoes_data_id', ['data', 'id']),
+    ('ix_movimentacoes_usuario_data_id', ['usuario', 'data', 'id']),
+    ('ix_movimentacoes_item_data_id', ['item_id', 'data', 'id']),
+    ('ix_movimentacoes_acao_data_id', ['acao', 'data', 'id']),
+    ('ix_movimentacoes_ordem_id', ['ordem_id']),
+]
+
+
+def _proximo_mes(dia: date) -> date:
+    return date(dia.year + (dia.month == 12), dia.month % 12 + 1, 1)
+
+
+def _criar_indices(tabela: str, sufixo: str):
+    for nome, colunas in INDICES:
+        op.execute(f"CREATE INDEX {nome}{sufixo} ON sicro.{tabela} ({', '.join(colunas)})")
+
+
+def _renomear_indices(sufixo: str):
+    for nome, _ in INDICES:
+        op.execute(f"ALTER INDEX sicro.{nome}{sufixo} RENAME TO {nome}")
+
+
+def _copiar_em_lotes(conn, destino: str, ate_id: int):
+    # Lotes por faixa de id, cada um na sua transação: a tabela antiga segue recebendo
+    # leituras e gravações enquanto o grosso dos dados é copiado
+    with op.get_context().autocommit_block():
+        for inicio in range(0, ate_id + 1, LOTE):
+            conn.execute(sa.text(
+                f"INSERT INTO sicro.{destino} ({COLUNAS}) {SELECT_COPIA} WHERE id >= :inicio AND id < :fim"
+            ), {"inicio": inicio, "fim": min(inicio + LOTE, ate_id + 1)})
+
+
+def _copiar_restante(conn):
+    # O que entrou durante a cópia, e o que a cópia em lotes não viu (transações que já tinham
+    # pego um id da sequência mas ainda não tinham feito commit quando o MAX(id) foi lido).
+    # Com a tabela travada não entra mais nada: compara a tabela inteira, sem margem de id
+    op.execute(f"""
+        INSERT INTO sicro.movimentacoes_nova ({COLUNAS})
+        {SELECT_COPIA} m
+        WHERE NOT EXISTS (SELECT 1 FROM sicro.movimentacoes_nova n WHERE n.id = m.id)
+    """)
+    antiga = conn.execute(sa.text("SELECT count(*) FROM sicro.movimentacoes")).scalar()
+    nova = conn.execute(sa.text("SELECT count(*) FROM sicro.movimentacoes_nova")).scalar()
+    if antiga != nova:
+        # Antes do DROP: a tabela antiga continua intacta
+        raise RuntimeError(
+            f"Cópia incompleta: {antiga} linhas em sicro.movimentacoes e {nova} em sicro.movimentacoes_nova. "
+            "Nada foi apagado; remova sicro.movimentacoes_nova antes de rodar a migração de novo."
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    sequencia = conn.execute(sa.text("SELECT pg_get_serial_sequence('sicro.movimentacoes', 'id')")).scalar()
+
+    # 1. Tabela nova particionada por mês; a PK precisa incluir a chave de partição
+    op.execute(f"""
+        CREATE TABLE sicro.movimentacoes_nova (
+            id integer NOT NULL DEFAULT nextval('{sequencia}'),
+            ordem_id varchar NOT NULL,
+            usuario varchar NOT NULL,
+            item_id integer NOT NULL,
+            quantidade integer NOT NULL,
+            acao varchar NOT NULL,
+            data timestamp with time zone NOT NULL DEFAULT now(),
+            CONSTRAINT movimentacoes_nova_pkey PRIMARY KEY (id, data)
+        ) PARTITION BY RANGE (data)
+    """)
+
+    # 2. Uma partição por mês (horário de Brasília) do primeiro registro até alguns meses à frente
+    primeiro = conn.execute(sa.text(
+        "SELECT date_trunc('month', MIN(data) AT TIME ZONE 'America/Sao_Paulo') FROM sicro.movimentacoes"
+    )).scalar()
+    hoje = conn.execute(sa.text("SELECT (now() AT TIME ZONE 'America/Sao_Paulo')::date")).scalar()
+    mes = date(hoje.year, hoje.month, 1) if primeiro is None else primeiro.date()
+    ultimo = date(hoje.year, hoje.month, 1)
+    for _ in range(MESES_FUTUROS):
+        ultimo = _proximo_mes(ultimo)
+    while mes <= ultimo:
+        fim = _proximo_mes(mes)
+        op.execute(
+            f"CREATE TABLE sicro.movimentacoes_{mes.year:04d}_{mes.month:02d} PARTITION OF sicro.movimentacoes_nova "
+            f"FOR VALUES FROM ('{mes.isoformat()} 00:00:00-03') TO ('{fim.isoformat()} 00:00:00-03')"
+        )
+        mes = fim
+    op.execute("CREATE TABLE sicro.movimentacoes_padrao PARTITION OF sicro.movimentacoes_nova DEFAULT")
+
+    # 3. Cópia online até o maior id de agora
+    copiado_ate = conn.execute(sa.text("SELECT COALESCE(MAX(id), 0) FROM sicro.movimentacoes")).scalar()
+    _copiar_em_lotes(conn, "movimentacoes_nova", copiado_ate)
+
+    # 4. Índices depois da carga (mais rápido que manter durante os INSERTs)
+    _criar_indices("movimentacoes_nova", "_p")
+    op.create_foreign_key('fk_movimentacoes_item_id', 'movimentacoes_nova', 'catalogo_itens', ['item_id'], ['id'],
+                          source_schema='sicro', referent_schema='sicro')
+
+    # 5. Troca: só aqui as gravações esperam (leituras seguem), e só pelo que chegou durante a cópia
+    op.execute("LOCK TABLE sicro.movimentacoes IN EXCLUSIVE MODE")
+    _copiar_restante(conn)
+    op.execute(f"ALTER SEQUENCE {sequencia} OWNED BY sicro.movimentacoes_nova.id")
+    op.execute("DROP TABLE sicro.movimentacoes")
+    op.execute("ALTER TABLE sicro.movimentacoes_nova RENAME TO movimentacoes")
+    op.execute("ALTER INDEX sicro.movimentacoes_nova_pkey RENAME TO movimentacoes_pkey")
+    _renomear_indices("_p")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    sequencia = conn.execute(sa.text("SELECT pg_get_serial_sequence('sicro.movimentacoes', 'id')")).scalar()
+
+    op.execute(f"""
+        CREATE TABLE sicro.movimentacoes_nova (
+            id integer NOT NULL DEFAULT nextval('{sequencia}'),
+            ordem_id varchar NOT NULL,
+            usuario varchar NOT NULL,
+            item_id integer NOT NULL,
+            quantidade integer NOT NULL,
+            acao varchar NOT NULL,
+            data timestamp with time zone,
+            CONSTRAINT movimentacoes_nova_pkey PRIMARY KEY (id)
+        )
+    """)
+    copiado_ate = conn.execute(sa.text("SELECT COALESCE(MAX(id), 0) FROM sicro.movimentacoes")).scalar()
+    _copiar_em_lotes(conn, "movimentacoes_nova", copiado_ate)
+    _criar_indices("movimentacoes_nova", "_p")
+    op.create_foreign_key('fk_movimentacoes_item_id', 'movimentacoes_nova', 'catalogo_itens', ['item_id'], ['id'],
+                          source_schema='sicro', referent_schema='sicro')
+
+    op.execute("LOCK TABLE sicro.movimentacoes IN EXCLUSIVE MODE")
+    _copiar_restante(conn)
+    op.execute(f"ALTER SEQUENCE {sequencia} OWNED BY sicro.movimentacoes_nova.id")
+    op.execute("DROP TABLE sicro.movimentacoes")  # leva junto todas as partições
+    op.execute("ALTER TABLE sicro.movimentacoes_nova RENAME TO movimentacoes")
+    op.execute("ALTER INDEX sicro.movimentacoes_nova_pkey RENAME TO movimentacoes_pkey")
+    _renomear_indices("_p")
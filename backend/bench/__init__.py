@@ -0,0 +1 @@
+# Suíte de benchmark do Sicro: python -m backend.bench --help
@@ -0,0 +1,133 @@
+# python -m backend.bench gerar --linhas 1m
+# python -m backend.bench rodar [cenário ...] [--url http://127.0.0.1:8000] [--saida resultados.json]
+# python -m backend.bench planos [--saida planos.json]   (Postgres: EXPLAIN das consultas quentes)
+# python -m backend.bench partida [--vezes 3]            (API num processo novo: tempo até o 1º /api/saldo)
+#
+# Usa o banco de DATABASE_URL (ex.: DATABASE_URL=sqlite:///bench.db para rodar offline).
+# Sem --url os cenários rodam dentro do processo (httpx + ASGITransport), sem rede.
+import argparse
+import asyncio
+import json
+import sys
+
+import httpx
+
+from backend.bench import cenarios, dados
+
+
+def _tabela(linhas):
+    colunas = ["cenario", "requisicoes", "concorrencia", "req_s", "p50_ms", "p95_ms", "p99_ms", "erros"]
+    larguras = {c: max(len(c), *(len(str(l.get(c, ""))) for l in linhas)) for c in colunas}
+    print("  ".join(c.ljust(larguras[c]) for c in colunas))
+    for l in linhas:
+        extras = {k: v for k, v in l.items() if k not in colunas}
+        print("  ".join(str(l.get(c, "")).ljust(larguras[c]) for c in colunas), extras or "")
+
+
+async def _rodar(args):
+    from backend.core.config import settings
+
+    if args.url:
+        cliente = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        from backend.main import app
+        cliente = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    desconhecidos = set(args.cenarios) - set(cenarios.CENARIOS)
+    if desconhecidos:
+        raise SystemExit(f"Cenário desconhecido: {', '.join(sorted(desconhecidos))}")
+
+    # Os cenários usam um usuário só (USUARIO_BENCH): com o controle de admissão ligado eles mediriam
+    # os 429 do limite por usuário. Só o `sobrecarga` roda com ele, porque é o que ele mede.
+    # Com --url quem decide é o servidor: suba-o com ADMISSAO=false para os outros cenários.
+    admissao = settings.ADMISSAO
+    resultados = []
+    try:
+        async with cliente:
+            for nome in args.cenarios or list(cenarios.CENARIOS):
+                settings.ADMISSAO = admissao and nome == "sobrecarga"
+                for r in await cenarios.CENARIOS[nome](cliente, args.n):
+                    resultados.append(r.resumo())
+    finally:
+        settings.ADMISSAO = admissao
+
+    _tabela(resultados)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+
+async def _gerar(args):
+    info = await dados.gerar(dados.interpretar_tamanho(args.linhas), lote=args.lote, anos=args.anos)
+    print(info)
+
+
+async def _planos(args):
+    from backend.bench import planos
+    from backend.database.connection import engine
+
+    resultados = await planos.rodar(engine, analisar=not args.sem_analyze, fator=args.fator)
+    for r in resultados:
+        situacao = "ok" if r["ok"] else "FALHOU"
+        print(f"[{situacao}] {r['consulta']}: custo={r['custo']:.0f} linhas={r['linhas']} "
+              f"indices={','.join(r['indices']) or '-'} {'; '.join(r['problemas'])}")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    if not all(r["ok"] for r in resultados):
+        sys.exit(1)
+
+
+async def _partida(args):
+    from backend.bench import partida
+
+    resultados = [r.resumo() for r in await partida.rodar(vezes=args.vezes, porta=args.porta)]
+    _tabela(resultados)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+
+async def _executar(args):
+    from backend.database.replica import fechar_engines
+    try:
+        await args.func(args)
+    finally:
+        await fechar_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m backend.bench", description="Benchmark do Sicro")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("gerar", help="Popula o banco com dados sintéticos")
+    p.add_argument("--linhas", default="10k", help="movimentações a gerar: 10k, 1m, 10m...")
+    p.add_argument("--lote", type=int, default=10_000)
+    p.add_argument("--anos", type=float, default=3, help="período coberto pelo histórico")
+    p.set_defaults(func=_gerar)
+
+    p = sub.add_parser("rodar", help="Roda os cenários e mostra vazão e p50/p95/p99")
+    p.add_argument("cenarios", nargs="*", help=f"padrão: todos ({', '.join(cenarios.CENARIOS)})")
+    p.add_argument("-n", type=int, default=200, help="requisições por cenário")
+    p.add_argument("--url", help="servidor já rodando (senão roda dentro do processo)")
+    p.add_argument("--saida", help="grava os resultados em JSON (para comparar entre revisões)")
+    p.set_defaults(func=_rodar)
+
+    p = sub.add_parser("planos", help="EXPLAIN das consultas quentes: índice usado, custo e linhas estimadas")
+    p.add_argument("--fator", type=float, default=1.0, help="multiplica os tetos de custo (bases maiores)")
+    p.add_argument("--sem-analyze", action="store_true", help="não roda ANALYZE antes")
+    p.add_argument("--saida", help="grava os planos em JSON (para comparar entre revisões)")
+    p.set_defaults(func=_planos)
+
+    p = sub.add_parser("partida", help="Partida a frio: tempo até o 1º /api/saldo, com e sem aquecimento")
+    p.add_argument("--vezes", type=int, default=3, help="partidas de cada tipo")
+    p.add_argument("--porta", type=int, default=8765)
+    p.add_argument("--saida", help="grava os resultados em JSON")
+    p.set_defaults(func=_partida)
+
+    args = parser.parse_args()
+    asyncio.run(_executar(args))
+
+
+if __name__ == "__main__":
+    main()
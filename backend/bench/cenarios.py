@@ -0,0 +1,291 @@
+# Cenários do benchmark. Cada um devolve uma lista de Resultado.
+import asyncio
+import time
+from dataclasses import dataclass, field
+from jose import jwt
+from backend.bench.dados import ITENS, USUARIO_BENCH, SENHA_BENCH
+from backend.core.config import settings
+from backend.core.security import criar_token, decodificar_token
+
+
+@dataclass
+class Resultado:
+    cenario: str
+    latencias: list = field(default_factory=list)   # segundos
+    duracao: float = 0.0
+    concorrencia: int = 1
+    erros: int = 0
+    extra: dict = field(default_factory=dict)
+
+    def percentil(self, p: float) -> float:
+        if not self.latencias:
+            return 0.0
+        ordenadas = sorted(self.latencias)
+        return ordenadas[min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))]
+
+    def resumo(self) -> dict:
+        return {
+            "cenario": self.cenario,
+            "requisicoes": len(self.latencias),
+            "concorrencia": self.concorrencia,
+            "req_s": round(len(self.latencias) / self.duracao, 1) if self.duracao else 0.0,
+            "p50_ms": round(self.percentil(50) * 1000, 2),
+            "p95_ms": round(self.percentil(95) * 1000, 2),
+            "p99_ms": round(self.percentil(99) * 1000, 2),
+            "erros": self.erros,
+            **self.extra,
+        }
+
+
+def cabecalhos():
+    token = criar_token({"sub": USUARIO_BENCH, "role": "admin"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def medir(nome: str, total: int, concorrencia: int, requisicao) -> Resultado:
+    """Roda `requisicao(i)` `total` vezes com `concorrencia` trabalhadores em paralelo."""
+    resultado = Resultado(nome, concorrencia=concorrencia)
+    proximo = iter(range(total))
+
+    async def trabalhador():
+        for i in proximo:
+            inicio = time.perf_counter()
+            try:
+                resposta = await requisicao(i)
+                if resposta.status_code >= 400:
+                    resultado.erros += 1
+            except Exception:
+                resultado.erros += 1
+            resultado.latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[trabalhador() for _ in range(concorrencia)])
+    resultado.duracao = time.perf_counter() - inicio
+    return resultado
+
+
+# ------------------------------ LEITURAS ------------------------------ #
+async def saldo(cliente, n: int):
+    h = cabecalhos()
+    resultados = [await medir("saldo", n, 10, lambda i: cliente.get("/api/saldo", headers=h))]
+
+    # Mesma leitura com If-None-Match (caminho do 304)
+    etag = (await cliente.get("/api/saldo", headers=h)).headers.get("etag")
+    if etag:
+        h304 = {**h, "If-None-Match": etag}
+        resultados.append(await medir("saldo_304", n, 10, lambda i: cliente.get("/api/saldo", headers=h304)))
+    return resultados
+
+
+async def dashboard(cliente, n: int):
+    h = cabecalhos()
+    return [
+        await medir("dashboard_resumo", n, 10, lambda i: cliente.get("/api/dashboard/resumo", headers=h)),
+        await medir("dashboard_planejamento", n, 10, lambda i: cliente.get("/api/dashboard/planejamento", headers=h)),
+    ]
+
+
+async def historico(cliente, n: int):
+    """Pagina o histórico seguindo o cursor: a latência deve ser a mesma na 1ª e na n-ésima página."""
+    h = cabecalhos()
+    resultado = Resultado("historico_paginas", concorrencia=1)
+    cursor = None
+    inicio = time.perf_counter()
+    for _ in range(n):
+        params = {"limite": 200, **({"cursor": cursor} if cursor else {})}
+        t = time.perf_counter()
+        resposta = await cliente.get("/api/historico", params=params, headers=h)
+        resultado.latencias.append(time.perf_counter() - t)
+        if resposta.status_code >= 400:
+            resultado.erros += 1
+            break
+        cursor = resposta.headers.get("x-proximo-cursor")
+        if not cursor:
+            break
+    resultado.duracao = time.perf_counter() - inicio
+    resultado.extra = {
+        "primeira_ms": round(resultado.latencias[0] * 1000, 2) if resultado.latencias else 0,
+        "ultima_ms": round(resultado.latencias[-1] * 1000, 2) if resultado.latencias else 0,
+    }
+    return [resultado]
+
+
+# ------------------------------ ESCRITA ------------------------------ #
+async def movimentar(cliente, n: int):
+    """
+    n ordens de entrada (1 unidade de cada item) para 1, 10 e 50 postadores simultâneos.
+    Confere no fim se o saldo subiu exatamente o esperado (nenhuma atualização perdida).
+    """
+    h = cabecalhos()
+    itens = [{"tipo": t, "tamanho": tam, "quantidade": 1, "acao": "entrada"} for t, tam in ITENS]
+    resultados = []
+
+    async def saldos():
+        resposta = await cliente.get("/api/saldo", headers=h)
+        if resposta.status_code != 200:
+            raise RuntimeError(f"/api/saldo respondeu {resposta.status_code}: {resposta.text[:200]}")
+        return {(r["tipo"], r["tamanho"]): r["saldo"] for r in resposta.json()}
+
+    for concorrencia in (1, 10, 50):
+        antes = await saldos()
+        r = await medir(f"movimentar_c{concorrencia}", n, concorrencia,
+                        lambda i: cliente.post("/api/movimentar", json={"itens": itens}, headers=h))
+        depois = await saldos()
+        ok = len(r.latencias) - r.erros
+        divergentes = [k for k in antes if depois.get(k) != antes[k] + ok]
+        r.extra = {"ordens_s": round(ok / r.duracao, 1) if r.duracao else 0.0, "saldo_correto": not divergentes}
+        resultados.append(r)
+    return resultados
+
+
+async def importar(cliente, n: int):
+    """Importação de planilha (POST /movimentar/importar) com 1k, 10k e 50k linhas: linhas por segundo."""
+    h = {**cabecalhos(), "Content-Type": "text/csv"}
+    resultados = []
+    for linhas in (1_000, 10_000, 50_000):
+        corpo = "tipo;tamanho;quantidade\n" + "".join(
+            f"{ITENS[i % len(ITENS)][0]};{ITENS[i % len(ITENS)][1] or ''};{1 + i % 7}\n" for i in range(linhas)
+        )
+        r = Resultado(f"importar_{linhas}")
+        inicio = time.perf_counter()
+        resposta = await cliente.post("/api/movimentar/importar", content=corpo.encode(), headers=h)
+        r.duracao = time.perf_counter() - inicio
+        r.latencias = [r.duracao]
+        r.erros = int(resposta.status_code >= 400)
+        r.extra = {"linhas_s": round(linhas / r.duracao, 1) if r.duracao else 0.0}
+        resultados.append(r)
+    return resultados
+
+
+# ------------------------------ AUTENTICAÇÃO ------------------------------ #
+async def auth(cliente, n: int):
+    """Custo por requisição da validação do token, com e sem o cache de payloads."""
+    token = criar_token({"sub": USUARIO_BENCH, "role": "admin"})
+    resultados = []
+    for nome, func in (
+        ("auth_sem_cache", lambda: jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])),
+        ("auth_com_cache", lambda: decodificar_token(token)),
+    ):
+        r = Resultado(nome)
+        inicio = time.perf_counter()
+        for _ in range(n * 10):
+            t = time.perf_counter()
+            func()
+            r.latencias.append(time.perf_counter() - t)
+        r.duracao = time.perf_counter() - inicio
+        r.extra = {"us_por_chamada": round(1e6 * r.duracao / len(r.latencias), 2)}
+        resultados.append(r)
+    return resultados
+
+
+async def login(cliente, n: int):
+    """p99 do /api/saldo sozinho e durante uma rajada de 50 logins (bcrypt) simultâneos."""
+    h = cabecalhos()
+    base = await medir("saldo_sem_login", n, 5, lambda i: cliente.get("/api/saldo", headers=h))
+
+    form = {"username": USUARIO_BENCH, "password": SENHA_BENCH}
+    rajada = asyncio.create_task(medir("login_rajada", 50, 50, lambda i: cliente.post("/api/token", data=form)))
+    await asyncio.sleep(0)   # deixa a rajada começar
+    durante = await medir("saldo_durante_login", n, 5, lambda i: cliente.get("/api/saldo", headers=h))
+    return [base, durante, await rajada]
+
+
+# ------------------------------ MIDDLEWARE ------------------------------ #
+async def middleware(cliente, n: int):
+    """Requisições por segundo em / (só a pilha HTTP) e /api/saldo — compare entre revisões."""
+    h = cabecalhos()
+    return [
+        await medir("raiz", n * 5, 20, lambda i: cliente.get("/")),
+        await medir("saldo_rps", n, 20, lambda i: cliente.get("/api/saldo", headers=h)),
+    ]
+
+
+# ------------------------------ SOBRECARGA ------------------------------ #
+async def sobrecarga(cliente, n: int):
+    """
+    Rajada bem acima do pool no /dashboard/resumo: com o controle de admissão, as admitidas
+    (200) mantêm a latência e o excesso volta rápido com 503/429 em vez de esperar o timeout.
+    Cada requisição usa um usuário diferente, para medir a fila e não o limite por usuário.
+    """
+    tokens = [{"Authorization": f"Bearer {criar_token({'sub': f'carga{i}', 'role': 'user'})}"} for i in range(n)]
+    admitidas = Resultado("sobrecarga_admitidas", concorrencia=100)
+    recusadas = Resultado("sobrecarga_recusadas", concorrencia=100)
+
+    async def requisicao(i):
+        t = time.perf_counter()
+        resposta = await cliente.get("/api/dashboard/resumo", headers=tokens[i])
+        alvo = admitidas if resposta.status_code == 200 else recusadas
+        alvo.latencias.append(time.perf_counter() - t)
+        if resposta.status_code not in (200, 429, 503):
+            alvo.erros += 1
+
+    inicio = time.perf_counter()
+    fila = iter(range(n))
+
+    async def trabalhador():
+        for i in fila:
+            await requisicao(i)
+
+    await asyncio.gather(*[trabalhador() for _ in range(100)])
+    admitidas.duracao = recusadas.duracao = time.perf_counter() - inicio
+    return [admitidas, recusadas]
+
+
+# ------------------------------ SERIALIZAÇÃO ------------------------------ #
+async def serializacao(cliente, n: int):
+    """
+    CPU e alocação por resposta do /historico com 200, 10k e 100k linhas:
+    objetos + jsonable_encoder + json (caminho antigo) vs tuplas + orjson (caminho atual).
+    Não usa o banco: isola o custo de montar e serializar a resposta.
+    """
+    import json
+    import tracemalloc
+    from types import SimpleNamespace
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import ORJSONResponse
+    from backend.models.movimentacao import get_br_time
+
+    agora = get_br_time()
+    resultados = []
+    for linhas in (200, 10_000, 100_000):
+        tuplas = [(i, f"ORD-{i // 5}", "bench", "Macacão", "M", 3, "saida", agora) for i in range(linhas)]
+        objetos = [SimpleNamespace(id=t[0], ordem_id=t[1], usuario=t[2], tipo=t[3], tamanho=t[4],
+                                   quantidade=t[5], acao=t[6], data=t[7]) for t in tuplas]
+
+        def antigo():
+            corpo = [{"ordem_id": l.ordem_id, "usuario": l.usuario, "tipo": l.tipo, "tamanho": l.tamanho,
+                      "quantidade": l.quantidade, "acao": l.acao, "data": l.data.isoformat()} for l in objetos]
+            return json.dumps(jsonable_encoder(corpo)).encode()
+
+        def atual():
+            return ORJSONResponse([{"ordem_id": o, "usuario": u, "tipo": t, "tamanho": tm, "quantidade": q,
+                                    "acao": a, "data": d} for _, o, u, t, tm, q, a, d in tuplas]).body
+
+        for nome, func in (("antigo", antigo), ("orjson", atual)):
+            r = Resultado(f"serializacao_{nome}_{linhas}")
+            tracemalloc.start()
+            cpu = time.process_time()
+            inicio = time.perf_counter()
+            func()
+            r.duracao = time.perf_counter() - inicio
+            cpu = time.process_time() - cpu
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            r.latencias = [r.duracao]
+            r.extra = {"cpu_ms": round(cpu * 1000, 2), "pico_alocado_kb": round(pico / 1024, 1)}
+            resultados.append(r)
+    return resultados
+
+
+CENARIOS = {
+    "saldo": saldo,
+    "dashboard": dashboard,
+    "historico": historico,
+    "movimentar": movimentar,
+    "importar": importar,
+    "auth": auth,
+    "login": login,
+    "middleware": middleware,
+    "sobrecarga": sobrecarga,
+    "serializacao": serializacao,
+}
@@ -0,0 +1,122 @@
+# Gerador de dados sintéticos para roupas/movimentações (10k, 1M, 10M linhas)
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import delete, insert, select, update
+from backend.core.security import gerar_hash_senha
+from backend.database.connection import AsyncSessionLocal
+from backend.database.particoes import garantir_particoes
+from backend.models.catalogo import CatalogoItem
+from backend.models.estoque_versao import EstoqueVersao
+from backend.models.movimentacao import Movimentacao, get_br_time
+from backend.models.movimentacao_diaria import MovimentacaoDiaria
+from backend.models.roupa import Roupa
+from backend.models.usuario import Usuario
+from backend.services.rollup import reconstruir_diario
+
+ITENS = (
+    [("Macacão", t) for t in ["PP", "P", "M", "G", "GG", "G3", "G4"]]
+    + [("Botas", t) for t in ["36", "38", "40", "42", "44"]]
+    + [("Panos", None), ("Óculos", None)]
+)
+USUARIO_BENCH = "bench_admin"
+SENHA_BENCH = "bench"
+COLUNAS = ["ordem_id", "usuario", "item_id", "quantidade", "acao", "data"]
+
+
+def interpretar_tamanho(texto: str) -> int:
+    """'10k' -> 10_000, '1m' -> 1_000_000."""
+    texto = texto.lower().replace("_", "")
+    multiplicador = {"k": 1_000, "m": 1_000_000}.get(texto[-1], 1)
+    return int(float(texto.rstrip("km")) * multiplicador)
+
+
+def _linhas(total: int, anos: float, rnd: random.Random, item_ids: list):
+    """Gera as movimentações em ordem cronológica, em ordens de 1 a 8 itens."""
+    agora = get_br_time()
+    inicio = agora - timedelta(days=365 * anos)
+    passo = (agora - inicio) / max(total, 1)
+    data = inicio
+    gerado = 0
+    ordem = 0
+    while gerado < total:
+        ordem += 1
+        acao = "entrada" if rnd.random() < 0.5 else "saida"
+        ordem_id = f"ORD-BENCH-{ordem:09d}"
+        for _ in range(min(rnd.randint(1, 8), total - gerado)):
+            item_id = rnd.choice(item_ids)
+            quantidade = rnd.randint(20, 60) if acao == "entrada" else rnd.randint(1, 20)
+            data += passo
+            gerado += 1
+            yield (ordem_id, USUARIO_BENCH, item_id, quantidade, acao, data)
+
+
+async def gerar(total: int, lote: int = 10_000, anos: float = 3, semente: int = 42, limpar: bool = True):
+    rnd = random.Random(semente)
+    saldos = defaultdict(int)
+    inicio = time.perf_counter()
+
+    async with AsyncSessionLocal() as db:
+        if limpar:
+            for modelo in (Movimentacao, MovimentacaoDiaria, Roupa, CatalogoItem):
+                await db.execute(delete(modelo))
+            await db.commit()
+
+        # Catálogo na ordem de exibição
+        await db.execute(insert(CatalogoItem), [
+            {"tipo": tipo, "tamanho": tamanho, "sort_key": 10 * (i + 1), "ativo": True}
+            for i, (tipo, tamanho) in enumerate(ITENS)
+        ])
+        await db.commit()
+        item_ids = list((await db.execute(select(CatalogoItem.id).order_by(CatalogoItem.sort_key))).scalars())
+
+        postgres = db.bind.dialect.name == "postgresql"
+        buffer = []
+        if postgres:
+            # Tabela particionada por mês (migração): cria as partições do período gerado
+            conexao = await db.connection()
+            await garantir_particoes(conexao, inicio=(get_br_time() - timedelta(days=365 * anos)).date())
+            await db.commit()
+
+        async def descarregar():
+            if postgres:
+                # COPY: ordens de grandeza mais rápido que INSERT para milhões de linhas
+                conexao = await db.connection()
+                bruta = await conexao.get_raw_connection()
+                await bruta.driver_connection.copy_records_to_table(
+                    "movimentacoes", schema_name="sicro", columns=COLUNAS, records=buffer
+                )
+            else:
+                await db.execute(insert(Movimentacao), [dict(zip(COLUNAS, r)) for r in buffer])
+            await db.commit()
+            buffer.clear()
+
+        for linha in _linhas(total, anos, rnd, item_ids):
+            _, _, item_id, quantidade, acao, _ = linha
+            saldos[item_id] += quantidade if acao == "entrada" else -quantidade
+            buffer.append(linha)
+            if len(buffer) >= lote:
+                await descarregar()
+        if buffer:
+            await descarregar()
+
+        # Saldo atual = soma do histórico (nunca negativo)
+        await db.execute(insert(Roupa), [
+            {"item_id": item_id, "saldo": max(saldos[item_id], 0)} for item_id in item_ids
+        ])
+
+        # Usuário admin usado pelos cenários
+        existe = await db.scalar(select(Usuario.id).where(Usuario.username == USUARIO_BENCH))
+        if not existe:
+            db.add(Usuario(username=USUARIO_BENCH, hashed_password=gerar_hash_senha(SENHA_BENCH), role="admin"))
+
+        if await db.scalar(select(EstoqueVersao.id).where(EstoqueVersao.id == 1)) is None:
+            db.add(EstoqueVersao(id=1, versao=0))
+        else:
+            await db.execute(update(EstoqueVersao).values(versao=EstoqueVersao.versao + 1))
+        await db.commit()
+
+        linhas_diarias = await reconstruir_diario(db)
+
+    return {"movimentacoes": total, "diarias": linhas_diarias, "segundos": round(time.perf_counter() - inicio, 1)}
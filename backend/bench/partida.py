@@ -0,0 +1,73 @@
+# Partida a frio: sobe a API num processo novo (uvicorn) e mede quanto tempo até o primeiro
+# /api/saldo com sucesso e até o /pronto, com e sem o aquecimento do lifespan.
+# Roda com: python -m backend.bench partida [--vezes 3]
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+from backend.bench.cenarios import Resultado, cabecalhos
+
+INTERVALO_TENTATIVA = 0.02    # segundos entre tentativas enquanto o servidor sobe
+TIMEOUT_PARTIDA = 120.0
+
+
+async def _esperar(cliente, caminho: str, inicio: float, headers: dict = None):
+    """Tenta até responder 200. Devolve (segundos desde a partida, latência da requisição que deu certo)."""
+    while time.perf_counter() - inicio < TIMEOUT_PARTIDA:
+        t = time.perf_counter()
+        try:
+            resposta = await cliente.get(caminho, headers=headers)
+            if resposta.status_code == 200:
+                agora = time.perf_counter()
+                return agora - inicio, agora - t
+        except httpx.TransportError:
+            pass    # ainda não está escutando
+        await asyncio.sleep(INTERVALO_TENTATIVA)
+    raise TimeoutError(f"{caminho} não respondeu em {TIMEOUT_PARTIDA:.0f}s")
+
+
+async def uma_partida(porta: int, aquecer: bool) -> dict:
+    # Sem controle de admissão: as tentativas repetidas do _esperar esgotariam o limite por usuário
+    env = {**os.environ, "AQUECIMENTO": "true" if aquecer else "false", "ADMISSAO": "false"}
+    inicio = time.perf_counter()
+    processo = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(porta),
+        "--log-level", "warning", env=env,
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{porta}", timeout=30) as cliente:
+            h = cabecalhos()
+            (saldo_s, primeira_s), (pronto_s, _) = await asyncio.gather(
+                _esperar(cliente, "/api/saldo", inicio, h),
+                _esperar(cliente, "/pronto", inicio),
+            )
+            # Depois de pronto: como ficam as próximas requisições (pool e statements já quentes?)
+            seguintes = []
+            for _ in range(5):
+                t = time.perf_counter()
+                await cliente.get("/api/saldo", headers=h)
+                seguintes.append(time.perf_counter() - t)
+    finally:
+        processo.terminate()
+        await processo.wait()
+    return {"saldo_s": saldo_s, "primeira_s": primeira_s, "pronto_s": pronto_s, "seguinte_s": max(seguintes)}
+
+
+async def rodar(vezes: int = 3, porta: int = 8765) -> list:
+    resultados = []
+    for aquecer in (False, True):
+        nome = "partida_aquecida" if aquecer else "partida_fria"
+        partidas = [await uma_partida(porta, aquecer) for _ in range(vezes)]
+        r = Resultado(nome)
+        r.latencias = [p["saldo_s"] for p in partidas]     # até o primeiro /api/saldo com sucesso
+        r.duracao = sum(r.latencias)
+        r.extra = {
+            "primeira_req_ms": round(1000 * max(p["primeira_s"] for p in partidas), 1),
+            "pronto_ms": round(1000 * max(p["pronto_s"] for p in partidas), 1),
+            "seguintes_max_ms": round(1000 * max(p["seguinte_s"] for p in partidas), 1),
+        }
+        resultados.append(r)
+    return resultados
@@ -0,0 +1,180 @@
+# Verificador de planos: EXPLAIN (FORMAT JSON) das consultas quentes num Postgres populado
+# (python -m backend.bench gerar --linhas 1m) e conferência de índice usado, custo estimado,
+# linhas estimadas e poda das partições mensais de movimentacoes.
+# Roda com: python -m backend.bench planos (ou no pytest: backend/tests/test_planos.py)
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from sqlalchemy import select, text
+from backend.bench.dados import USUARIO_BENCH
+from backend.database.explain import plano, nos, relacoes
+from backend.database.particoes import nome_particao
+from backend.models.catalogo import CatalogoItem
+from backend.models.idempotencia import ChaveIdempotencia
+from backend.models.movimentacao import get_br_time
+from backend.models.roupa import Roupa
+from backend.models.usuario import Usuario
+from backend.routes.dashboard.entradas import (
+    consulta_totais_mes, consulta_top_saidas, consulta_encalhados, consulta_semanal,
+)
+from backend.routes.estoque import SELECT_SALDO, SELECT_HISTORICO
+from backend.services.exportacao import SELECT_EXPORTACAO
+from backend.services.historico import FiltrosHistorico, FUSO_BR, apos_cursor, codificar_cursor
+from backend.services.previsao import SELECT_ITENS, consulta_saidas
+
+# Tabelas com mais linhas que isso não podem aparecer num Seq Scan das consultas marcadas
+# (em tabela pequena o Seq Scan é a escolha certa e não conta como regressão)
+LINHAS_SEQ_SCAN = 10_000
+
+
+@dataclass
+class Verificacao:
+    nome: str
+    consulta: object
+    indices: tuple = ()          # pelo menos um destes índices precisa aparecer no plano
+    sem_seq_scan: tuple = ()     # prefixos de tabela que não podem ser lidos com Seq Scan
+    custo_max: float = None      # "Total Cost" da raiz
+    linhas_max: float = None     # "Plan Rows" da raiz
+    particoes: object = None     # função(partições de movimentacoes lidas) -> bool: poda certa?
+
+
+def verificacoes() -> list:
+    agora = get_br_time()
+    hoje = agora.date()
+    inicio_mes = hoje.replace(day=1)
+    proximo_mes = (inicio_mes + timedelta(days=32)).replace(day=1)
+    fim_janela = agora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    janela = FiltrosHistorico(data_inicio=(fim_janela - timedelta(days=1)).replace(day=1), data_fim=fim_janela)
+    cursor = codificar_cursor(datetime(hoje.year - 1, hoje.month, 1, tzinfo=FUSO_BR), 2**31 - 1)
+    # Poda: janela = mês passado inteiro, no horário de Brasília
+    mes_passado = nome_particao(janela.data_inicio.date())
+    meio_do_mes = janela.data_inicio.replace(day=15)
+
+    return [
+        # /saldo, previsão, catálogo: tabelas pequenas, só custo
+        Verificacao("saldo", SELECT_SALDO, custo_max=500),
+        Verificacao("previsao_itens", SELECT_ITENS, custo_max=500),
+        Verificacao("catalogo", select(CatalogoItem).order_by(CatalogoItem.sort_key, CatalogoItem.id), custo_max=500),
+
+        # /historico: primeira página, página funda (cursor) e cada filtro com o seu índice
+        Verificacao("historico_pagina", SELECT_HISTORICO.limit(201),
+                    indices=("ix_movimentacoes_data_id",), sem_seq_scan=("movimentacoes",),
+                    custo_max=5_000, linhas_max=201),
+        Verificacao("historico_cursor", apos_cursor(SELECT_HISTORICO, cursor).limit(201),
+                    indices=("ix_movimentacoes_data_id",), sem_seq_scan=("movimentacoes",),
+                    custo_max=5_000, linhas_max=201),
+        Verificacao("historico_usuario",
+                    FiltrosHistorico(usuario=USUARIO_BENCH).aplicar(SELECT_HISTORICO).limit(201),
+                    sem_seq_scan=("movimentacoes",), custo_max=20_000, linhas_max=201),
+        Verificacao("historico_ordem",
+                    FiltrosHistorico(ordem_id="ORD-inexistente").aplicar(SELECT_HISTORICO).limit(201),
+                    indices=("ix_movimentacoes_ordem_id",), sem_seq_scan=("movimentacoes",), custo_max=5_000),
+        Verificacao("historico_tipo",
+                    FiltrosHistorico(tipo="Macacão", tamanho="M").aplicar(SELECT_HISTORICO).limit(201),
+                    sem_seq_scan=("movimentacoes",), custo_max=20_000, linhas_max=201),
+
+        # Export de um mês: só a partição do mês, por índice
+        Verificacao("exportacao_mes", janela.aplicar(SELECT_EXPORTACAO),
+                    sem_seq_scan=("movimentacoes",), custo_max=100_000),
+
+        # Dashboard e previsão: agregado diário por período
+        Verificacao("dashboard_totais", consulta_totais_mes(inicio_mes, proximo_mes),
+                    sem_seq_scan=("movimentacao_diaria",), custo_max=2_000, linhas_max=2),
+        Verificacao("dashboard_top", consulta_top_saidas(inicio_mes, proximo_mes),
+                    sem_seq_scan=("movimentacao_diaria",), custo_max=2_000, linhas_max=5),
+        Verificacao("planejamento_encalhados", consulta_encalhados(hoje - timedelta(days=30)),
+                    indices=("ix_movimentacao_diaria_acao_dia",), sem_seq_scan=("movimentacao_diaria",),
+                    custo_max=2_000, linhas_max=5),
+        Verificacao("planejamento_semanal", consulta_semanal(hoje - timedelta(days=30)),
+                    indices=("ix_movimentacao_diaria_acao_dia",), sem_seq_scan=("movimentacao_diaria",),
+                    custo_max=2_000),
+        Verificacao("previsao_saidas", consulta_saidas(hoje),
+                    indices=("ix_movimentacao_diaria_acao_dia",), sem_seq_scan=("movimentacao_diaria",),
+                    custo_max=5_000),
+
+        # Poda de partições: com período, só a partição do mês; página seguinte, nada depois do cursor
+        Verificacao("poda_historico_periodo", janela.aplicar(SELECT_HISTORICO).limit(200),
+                    particoes=lambda lidas: lidas == {mes_passado}),
+        Verificacao("poda_exportacao_periodo", janela.aplicar(SELECT_EXPORTACAO),
+                    particoes=lambda lidas: lidas == {mes_passado}),
+        Verificacao("poda_historico_cursor",
+                    apos_cursor(SELECT_HISTORICO, codificar_cursor(meio_do_mes, 2**31 - 1)).limit(200),
+                    particoes=lambda lidas: not any(p > mes_passado for p in lidas if p != "movimentacoes_padrao")),
+
+        # Caminhos por chave
+        Verificacao("login_usuario", select(Usuario).where(Usuario.username == USUARIO_BENCH), custo_max=50),
+        Verificacao("movimentar_lock",
+                    select(Roupa.id, Roupa.item_id, Roupa.saldo).where(Roupa.item_id.in_([1, 2, 3]))
+                    .order_by(Roupa.item_id).with_for_update(),
+                    custo_max=100),
+        Verificacao("idempotencia",
+                    select(ChaveIdempotencia.resposta)
+                    .where(ChaveIdempotencia.usuario == USUARIO_BENCH, ChaveIdempotencia.chave == "x"),
+                    custo_max=50),
+    ]
+
+
+async def _tamanhos(conn, relacoes: set) -> dict:
+    if not relacoes:
+        return {}
+    result = await conn.execute(text(
+        "SELECT c.relname, c.reltuples FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = 'sicro' AND c.relname = ANY(:nomes)"
+    ), {"nomes": list(relacoes)})
+    return {nome: linhas for nome, linhas in result.all()}
+
+
+async def _com_indice_pai(conn, indices: set) -> set:
+    # Numa tabela particionada o plano mostra o índice de cada partição
+    # (movimentacoes_2026_10_data_id_idx); o nome declarado é o do índice pai
+    if not indices:
+        return set()
+    result = await conn.execute(text(
+        "SELECT pai.relname FROM pg_inherits i "
+        "JOIN pg_class filho ON filho.oid = i.inhrelid JOIN pg_class pai ON pai.oid = i.inhparent "
+        "WHERE filho.relname = ANY(:nomes)"
+    ), {"nomes": list(indices)})
+    return indices | set(result.scalars())
+
+
+async def conferir(conn, v: Verificacao, fator: float = 1.0) -> dict:
+    raiz = await plano(conn, v.consulta)
+    todos = list(nos(raiz))
+    indices = await _com_indice_pai(conn, {n["Index Name"] for n in todos if "Index Name" in n})
+    seq_scans = {n["Relation Name"] for n in todos if n["Node Type"] == "Seq Scan"}
+    tamanhos = await _tamanhos(conn, seq_scans)
+
+    problemas = []
+    if v.indices and not indices & set(v.indices):
+        problemas.append(f"não usou {' / '.join(v.indices)}")
+    for tabela in sorted(seq_scans):
+        if v.sem_seq_scan and tabela.startswith(v.sem_seq_scan) and tamanhos.get(tabela, 0) > LINHAS_SEQ_SCAN:
+            problemas.append(f"Seq Scan em {tabela} (~{int(tamanhos[tabela])} linhas)")
+    if v.custo_max is not None and raiz["Total Cost"] > v.custo_max * fator:
+        problemas.append(f"custo {raiz['Total Cost']:.0f} > {v.custo_max * fator:.0f}")
+    if v.linhas_max is not None and raiz["Plan Rows"] > v.linhas_max:
+        problemas.append(f"{raiz['Plan Rows']} linhas estimadas > {v.linhas_max}")
+    particoes = sorted(r for r in relacoes(raiz) if r.startswith("movimentacoes"))
+    if v.particoes is not None and not v.particoes(set(particoes)):
+        problemas.append(f"poda errada: leu {', '.join(particoes) or '-'}")
+
+    return {
+        "consulta": v.nome,
+        "ok": not problemas,
+        "custo": raiz["Total Cost"],
+        "linhas": raiz["Plan Rows"],
+        "indices": sorted(indices),
+        "particoes": particoes,
+        "problemas": problemas,
+        "plano": raiz,
+    }
+
+
+async def rodar(engine, analisar: bool = True, fator: float = 1.0) -> list:
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("O verificador de planos precisa de Postgres (os planos do SQLite não dizem nada)")
+    async with engine.connect() as conn:
+        if analisar:
+            # Estatísticas em dia: logo depois do "gerar" o autovacuum ainda não passou
+            await conn.execute(text("ANALYZE sicro.movimentacoes, sicro.movimentacao_diaria, sicro.roupas, sicro.catalogo_itens"))
+            await conn.commit()
+        return [await conferir(conn, v, fator) for v in verificacoes()]
@@ -0,0 +1,142 @@
+# backend/cli.py
+# Tarefas de manutenção: python -m backend.cli <comando>
+import argparse
+import asyncio
+import sys
+
+from backend.database.connection import AsyncSessionLocal
+
+
+async def _reconstruir_diario(args):
+    from backend.services.arquivo import arquivo_frio
+    from backend.services.rollup import reconstruir_diario
+    async with AsyncSessionLocal() as db:
+        # Os dias já arquivados não estão mais no banco: ficam como estão
+        total = await reconstruir_diario(db, desde=arquivo_frio.limite())
+    print(f"movimentacao_diaria reconstruída: {total} linhas")
+
+
+async def _arquivar(args):
+    from backend.services.arquivo import arquivar
+    async with AsyncSessionLocal() as db:
+        arquivados = await arquivar(db, horizonte_meses=args.meses)
+    for s in arquivados:
+        print(f"{s['mes']}: {s['linhas']} linhas -> {s['arquivo']}")
+    print(f"{len(arquivados)} mês(es) arquivado(s)")
+
+
+async def _limpar_idempotencia(args):
+    from backend.services.idempotencia import limpar_expiradas
+    async with AsyncSessionLocal() as db:
+        apagadas = await limpar_expiradas(db, ttl_horas=args.horas)
+    print(f"Chaves de idempotência apagadas: {apagadas}")
+
+
+async def _recalcular_alertas(args):
+    from backend.services.alertas import recalcular_alertas
+    async with AsyncSessionLocal() as db:
+        transicoes = await recalcular_alertas(db)
+        await db.commit()
+    for t in transicoes:
+        print(f"item {t['item_id']}: {t['anterior']} -> {t['estado']} (saldo {t['saldo']}, mínimo {t['estoque_minimo']})")
+    print(f"Alertas alterados: {len(transicoes)}")
+
+
+def _imprimir_conciliacao(resultado):
+    print(f"Snapshot {resultado.snapshot_id}: histórico até o id {resultado.ultimo_id}, "
+          f"{resultado.movimentacoes} movimentação(ões) somada(s) em {resultado.duracao_ms} ms")
+    for d in resultado.divergencias:
+        print(f"  DIVERGENTE item {d['item_id']}: saldo {d['saldo']}, histórico {d['esperado']} ({d['diferenca']:+d})")
+    if resultado.divergencias:
+        sys.exit(1)
+
+
+async def _snapshot(args):
+    from backend.services.conciliacao import tirar_snapshot
+    async with AsyncSessionLocal() as db:
+        resultado = await tirar_snapshot(db, do_historico=args.do_historico)
+    _imprimir_conciliacao(resultado)
+
+
+async def _conciliar(args):
+    from backend.services.conciliacao import conciliar
+    async with AsyncSessionLocal() as db:
+        resultado = await conciliar(db)
+    if resultado is None:
+        print("Nenhum snapshot de saldo ainda (rode: python -m backend.cli snapshot)")
+        sys.exit(1)
+    _imprimir_conciliacao(resultado)
+
+
+async def _criar_tabelas(args):
+    # Para SQLite/Postgres local de desenvolvimento; em produção use o Alembic
+    from sqlalchemy import insert, select
+    from backend.database.connection import engine, Base
+    from backend.models import usuario, catalogo, roupa, movimentacao, movimentacao_diaria, estoque_versao, idempotencia, alerta, snapshot
+
+    async with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            from sqlalchemy import text
+            await conn.execute(text("CREATE SCHEMA IF NOT EXISTS sicro"))
+        await conn.run_sync(Base.metadata.create_all)
+        versao = estoque_versao.EstoqueVersao
+        if await conn.scalar(select(versao.id).where(versao.id == 1)) is None:
+            await conn.execute(insert(versao).values(id=1, versao=0))
+    print(f"Tabelas criadas em {engine.url.render_as_string(hide_password=True)}")
+
+
+async def _particoes(args):
+    from backend.database.connection import engine
+    from backend.database.particoes import garantir_particoes
+    async with engine.begin() as conn:
+        criadas = await garantir_particoes(conn, meses_futuros=args.meses)
+    print(f"Partições criadas: {', '.join(criadas)}" if criadas else "Nenhuma partição nova")
+
+
+async def _executar(args):
+    from backend.database.replica import fechar_engines
+    try:
+        await args.func(args)
+    finally:
+        await fechar_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m backend.cli", description="Tarefas de manutenção do Sicro")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("reconstruir-diario", help="Recalcula a tabela movimentacao_diaria a partir do histórico")
+    p.set_defaults(func=_reconstruir_diario)
+
+    p = sub.add_parser("arquivar", help="Move os meses mais antigos que o horizonte para o arquivo frio")
+    p.add_argument("--meses", type=int, default=None, help="Horizonte em meses (padrão: ARQUIVO_HORIZONTE_MESES)")
+    p.set_defaults(func=_arquivar)
+
+    p = sub.add_parser("limpar-idempotencia", help="Apaga as Idempotency-Key mais velhas que o TTL")
+    p.add_argument("--horas", type=int, default=None, help="TTL em horas (padrão: IDEMPOTENCIA_TTL_HORAS)")
+    p.set_defaults(func=_limpar_idempotencia)
+
+    p = sub.add_parser("recalcular-alertas", help="Reavalia o alerta de estoque baixo de todos os itens")
+    p.set_defaults(func=_recalcular_alertas)
+
+    p = sub.add_parser("snapshot", help="Grava um snapshot do saldo (anterior + histórico posterior) e concilia")
+    p.add_argument("--do-historico", action="store_true",
+                   help="Primeiro snapshot somando o histórico inteiro em vez de partir de roupas.saldo")
+    p.set_defaults(func=_snapshot)
+
+    p = sub.add_parser("conciliar", help="Confere o saldo contra o último snapshot + histórico posterior")
+    p.set_defaults(func=_conciliar)
+
+    p = sub.add_parser("criar-tabelas", help="Cria as tabelas direto pelos models (SQLite/Postgres local)")
+    p.set_defaults(func=_criar_tabelas)
+
+    p = sub.add_parser("particoes", help="Cria as partições mensais de movimentacoes que faltam (Postgres)")
+    p.add_argument("--meses", type=int, default=None, help="Meses à frente (padrão: PARTICOES_MESES_FUTUROS)")
+    p.set_defaults(func=_particoes)
+
+    args = parser.parse_args()
+    asyncio.run(_executar(args))
+
+
+if __name__ == "__main__":
+    main()
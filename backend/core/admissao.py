@@ -0,0 +1,238 @@
+import asyncio
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from fastapi import HTTPException
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from backend.core.config import settings
+from backend.core.security import decodificar_token
+from backend.database.connection import engine
+from backend.database.pool import estatisticas_pool
+
+# Controle de admissão: com o pool esgotado, é melhor recusar na hora (503 + Retry-After) do que
+# deixar a requisição parada até o timeout do cliente, que então reenvia e piora a fila.
+#   1. taxa: token bucket por usuário (sub do JWT) em /api, e por IP no /token (bcrypt)  -> 429
+#   2. pool: espera recente por conexão acima de ADMISSAO_ESPERA_POOL_MS e nenhuma livre -> 503
+#   3. concorrência por rota: no máximo N em execução; quem chega espera no máximo
+#      ADMISSAO_FILA_SEGUNDOS por uma vaga e, com a fila cheia, nem espera                -> 503
+
+# Prefixo -> requisições simultâneas (o primeiro prefixo que casar vale)
+LIMITES_ROTA = [
+    ("/api/historico/exportar", 2),                            # streaming longo, segura uma conexão
+    ("/api/movimentar", settings.DB_POOL_SIZE),                # segura conexão + locks de roupas
+    ("/api/dashboard/", max(1, settings.DB_POOL_SIZE // 2)),   # agregados
+]
+# Sem controle: conexões longas sem banco, health checks e métricas
+IGNORAR = ("/api/saldo/stream", "/pronto", "/metrics")
+LOGIN = "/api/token"
+MAX_BALDES = 10_000     # usuários/IPs lembrados (LRU)
+
+
+@lru_cache(maxsize=4)
+def _redes(valor: str):
+    if valor.strip() == "*":
+        return None
+    return [ipaddress.ip_network(p.strip(), strict=False) for p in valor.split(",") if p.strip()]
+
+
+def _confiavel(redes, ip: str) -> bool:
+    if redes is None:
+        return True
+    try:
+        endereco = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(endereco in rede for rede in redes)
+
+
+def ip_cliente(request: Request) -> str:
+    """
+    IP de quem fez a requisição. Atrás de um proxy (Render) a conexão vem do proxy: se ela vier
+    de um dos PROXIES_CONFIAVEIS, o IP é o último do X-Forwarded-For que não é de um proxy
+    confiável (os da esquerda o próprio cliente pode inventar). Com "*", o último da lista.
+    """
+    ip = request.client.host if request.client else "?"
+    if not settings.PROXIES_CONFIAVEIS:
+        return ip
+    redes = _redes(settings.PROXIES_CONFIAVEIS)
+    encaminhado = request.headers.get("x-forwarded-for")
+    if not encaminhado or not _confiavel(redes, ip):
+        return ip
+    saltos = [h.strip() for h in encaminhado.split(",") if h.strip()]
+    if redes is None:
+        return saltos[-1] if saltos else ip
+    for salto in reversed(saltos):
+        if not _confiavel(redes, salto):
+            return salto
+    return saltos[0] if saltos else ip
+
+
+class Balde:
+    """Token bucket: `taxa` fichas por segundo, no máximo `rajada` acumuladas."""
+
+    __slots__ = ("fichas", "atualizado")
+
+    def __init__(self, rajada: float):
+        self.fichas = rajada
+        self.atualizado = time.monotonic()
+
+    def retirar(self, taxa: float, rajada: float) -> float:
+        """Gasta uma ficha. Devolve 0 se conseguiu, senão quantos segundos até a próxima."""
+        agora = time.monotonic()
+        self.fichas = min(rajada, self.fichas + (agora - self.atualizado) * taxa)
+        self.atualizado = agora
+        if self.fichas >= 1:
+            self.fichas -= 1
+            return 0.0
+        return (1 - self.fichas) / taxa
+
+
+class Baldes:
+    def __init__(self, taxa: float, rajada: int, maximo: int = MAX_BALDES):
+        self.taxa = taxa
+        self.rajada = rajada
+        self.maximo = maximo
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def retirar(self, chave: str) -> float:
+        with self._lock:
+            balde = self._itens.get(chave)
+            if balde is None:
+                balde = self._itens[chave] = Balde(self.rajada)
+                if len(self._itens) > self.maximo:
+                    self._itens.popitem(last=False)
+            else:
+                self._itens.move_to_end(chave)
+            return balde.retirar(self.taxa, self.rajada)
+
+
+class Vagas:
+    """Semáforo com fila limitada: espera pouco por uma vaga e, com a fila cheia, desiste na hora."""
+
+    def __init__(self, limite: int):
+        self.limite = limite
+        self.fila_max = limite * 2
+        self.esperando = 0
+        self._semaforo = asyncio.Semaphore(limite)
+
+    async def entrar(self, timeout: float) -> bool:
+        if self._semaforo.locked() and self.esperando >= self.fila_max:
+            return False
+        self.esperando += 1
+        try:
+            await asyncio.wait_for(self._semaforo.acquire(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.esperando -= 1
+
+    def sair(self):
+        self._semaforo.release()
+
+
+class EstatisticasAdmissao:
+    def __init__(self):
+        self.admitidas = 0
+        self.limitadas = 0          # 429 (token bucket)
+        self.recusadas_pool = 0     # 503 (pool saturado)
+        self.recusadas_fila = 0     # 503 (sem vaga na rota)
+
+
+estatisticas_admissao = EstatisticasAdmissao()
+
+
+def pool_saturado() -> bool:
+    """Espera recente alta e nenhuma conexão livre agora (a segunda condição deixa a média baixar)."""
+    if estatisticas_pool.espera_recente * 1000 < settings.ADMISSAO_ESPERA_POOL_MS:
+        return False
+    pool = engine.pool
+    return not hasattr(pool, "checkedin") or pool.checkedin() == 0
+
+
+def _retry_after(segundos: float) -> str:
+    return str(max(1, math.ceil(segundos)))
+
+
+class AdmissaoMiddleware:
+    """Middleware ASGI puro: decide antes de chamar a rota e libera a vaga quando a resposta termina."""
+
+    def __init__(self, app):
+        self.app = app
+        self.usuarios = Baldes(settings.ADMISSAO_USUARIO_TAXA, settings.ADMISSAO_USUARIO_RAJADA)
+        self.logins = Baldes(settings.ADMISSAO_LOGIN_TAXA, settings.ADMISSAO_LOGIN_RAJADA)
+        self.vagas = {prefixo: Vagas(limite) for prefixo, limite in LIMITES_ROTA}
+        _redes(settings.PROXIES_CONFIAVEIS)     # PROXIES_CONFIAVEIS inválido falha na subida
+
+    def _chave(self, request: Request) -> str:
+        autorizacao = request.headers.get("authorization", "")
+        if autorizacao.lower().startswith("bearer "):
+            try:
+                # Já validado antes fica no cache de tokens: não custa um decode por requisição
+                sub = decodificar_token(autorizacao[7:]).get("sub")
+                if sub:
+                    return f"u:{sub}"
+            except HTTPException:
+                pass    # token inválido: a rota responde 401; aqui conta pelo IP
+        return f"ip:{ip_cliente(request)}"
+
+    async def _recusar(self, scope, receive, send, status: int, detalhe: str, retry_after: str):
+        request = Request(scope)
+        resposta = JSONResponse(
+            status_code=status,
+            content={"detail": detalhe},
+            headers={
+                "Retry-After": retry_after,
+                "Access-Control-Allow-Origin": request.headers.get("origin") or "*",
+                "Access-Control-Allow-Credentials": "true",
+                "Access-Control-Expose-Headers": "Retry-After",
+            },
+        )
+        await resposta(scope, receive, send)
+
+    async def __call__(self, scope, receive, send):
+        caminho = scope.get("path", "")
+        if (
+            scope["type"] != "http" or not settings.ADMISSAO or scope["method"] == "OPTIONS"
+            or not caminho.startswith("/api/") or caminho.startswith(IGNORAR)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        # 1. Taxa por usuário (ou por IP no login, antes de gastar bcrypt)
+        request = Request(scope)
+        if caminho == LOGIN:
+            espera = self.logins.retirar(f"ip:{ip_cliente(request)}")
+        else:
+            espera = self.usuarios.retirar(self._chave(request))
+        if espera:
+            estatisticas_admissao.limitadas += 1
+            await self._recusar(scope, receive, send, 429, "Muitas requisições, aguarde", _retry_after(espera))
+            return
+
+        # 2. Pool saturado: recusa já, em vez de entrar na fila do pool
+        if pool_saturado():
+            estatisticas_admissao.recusadas_pool += 1
+            await self._recusar(scope, receive, send, 503, "Servidor ocupado, tente novamente",
+                                _retry_after(estatisticas_pool.espera_recente * 2))
+            return
+
+        # 3. Concorrência por rota
+        vagas = next((v for prefixo, v in self.vagas.items() if caminho.startswith(prefixo)), None)
+        if vagas is not None and not await vagas.entrar(settings.ADMISSAO_FILA_SEGUNDOS):
+            estatisticas_admissao.recusadas_fila += 1
+            await self._recusar(scope, receive, send, 503, "Servidor ocupado, tente novamente",
+                                _retry_after(settings.ADMISSAO_FILA_SEGUNDOS))
+            return
+
+        estatisticas_admissao.admitidas += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if vagas is not None:
+                vagas.sair()
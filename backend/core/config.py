@@ -8,6 +8,83 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     FRONTEND_URL: str = "http://localhost:5173"
     DATABASE_URL: str
+    # Réplica só de leitura para /saldo, /historico e /dashboard (vazio = tudo no primário)
+    DATABASE_REPLICA_URL: Optional[str] = None
+
+    # Pool de conexões com o banco
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0        # segundos esperando uma conexão livre
+    DB_POOL_RECYCLE: int = 280           # segundos; o Neon derruba conexões ociosas em ~5 min
+    DB_STATEMENT_CACHE_SIZE: int = 100   # prepared statements por conexão (asyncpg)
+    DB_PGBOUNCER: bool = False           # True atrás de PgBouncer em modo transaction
+    DB_SSL: str = "require"              # modo SSL do asyncpg quando a URL não traz ?sslmode= ("disable" no Postgres local)
+
+    # Métricas: consultas a partir deste tempo (ms) vão para o log de lentas (0 desliga)
+    SQL_LENTA_MS: float = 200.0
+    # /metrics exige "Authorization: Bearer <METRICAS_TOKEN>"; sem ele, só existe com SQLite (local)
+    METRICAS_TOKEN: Optional[str] = None
+
+    # Quantos tokens JWT já validados ficam em cache (0 desliga)
+    TOKEN_CACHE_TAMANHO: int = 1024
+    # Validade (s) do ticket que abre o /api/saldo/stream (EventSource não manda o header Authorization)
+    STREAM_TICKET_SEGUNDOS: int = 60
+
+    # bcrypt (login/criação de usuário): hashes simultâneos e quanto tempo esperar na fila (s)
+    SENHA_POOL_WORKERS: int = 2
+    SENHA_FILA_TIMEOUT: float = 10.0
+
+    # Por quanto tempo um worker confia na versão do estoque em memória antes de reler do banco
+    ESTOQUE_VERSAO_TTL_SEGUNDOS: float = 2.0
+
+    # Como os eventos de saldo chegam aos outros workers: "postgres" (LISTEN/NOTIFY) ou "memoria" (um processo só)
+    EVENTOS_BACKEND: str = "postgres"
+
+    # Partições mensais de movimentacoes criadas com antecedência (Postgres)
+    PARTICOES_MESES_FUTUROS: int = 3
+
+    # Arquivo frio: meses mais antigos que o horizonte saem do banco para segmentos em ARQUIVO_DIR
+    ARQUIVO_DIR: str = "arquivo"
+    ARQUIVO_HORIZONTE_MESES: int = 24
+
+    # Por quanto tempo uma Idempotency-Key do /movimentar é lembrada
+    IDEMPOTENCIA_TTL_HORAS: int = 24
+
+    # Alerta de estoque baixo só volta a "ok" com o saldo acima do mínimo + esta margem (%, no mínimo 1 peça)
+    ALERTA_HISTERESE_PCT: float = 10.0
+
+    # Réplica: depois do /movimentar o cliente lê do primário até a réplica alcançar a versão gravada
+    # (no máximo por REPLICA_FIXAR_SEGUNDOS); réplica mais atrasada que REPLICA_ATRASO_MAX_SEGUNDOS não é usada
+    REPLICA_FIXAR_SEGUNDOS: float = 30.0
+    REPLICA_ATRASO_MAX_SEGUNDOS: float = 5.0
+    REPLICA_VERIFICACAO_SEGUNDOS: float = 2.0
+
+    # Aquecimento na subida (lifespan): conexões abertas e consultas quentes preparadas em cada uma
+    AQUECIMENTO: bool = True
+    AQUECIMENTO_CONEXOES: int = 2
+    AQUECIMENTO_TIMEOUT: float = 60.0
+    # Falhou (banco fora do ar na subida)? Tenta de novo, esperando 1, 2, 4... s (até 30). Depois da
+    # última tentativa o /pronto responde 200 mesmo assim, com o erro no resumo
+    AQUECIMENTO_TENTATIVAS: int = 5
+    AQUECIMENTO_ESPERA_SEGUNDOS: float = 1.0
+
+    # Controle de admissão (core/admissao.py): taxa por usuário em /api e por IP no /token (req/s + rajada),
+    # recusa com 503 quando a espera recente do pool passa de ADMISSAO_ESPERA_POOL_MS e quanto
+    # tempo uma requisição espera por vaga na rota antes do 503
+    ADMISSAO: bool = True
+    ADMISSAO_USUARIO_TAXA: float = 10.0
+    ADMISSAO_USUARIO_RAJADA: int = 30
+    ADMISSAO_LOGIN_TAXA: float = 0.2
+    ADMISSAO_LOGIN_RAJADA: int = 5
+    ADMISSAO_ESPERA_POOL_MS: float = 500.0
+    ADMISSAO_FILA_SEGUNDOS: float = 2.0
+    # Proxies na frente da API cujo X-Forwarded-For vale como IP do cliente (limite do /token por IP):
+    # IPs/redes separados por vírgula, ou "*" para confiar em quem conecta (Render). Vazio = IP da conexão
+    PROXIES_CONFIAVEIS: str = ""
+
+    # Snapshots do saldo (conciliação com o histórico): intervalo entre snapshots e quantos guardar
+    SNAPSHOT_INTERVALO_HORAS: float = 24.0
+    SNAPSHOT_MANTER: int = 30
 
     # Configuração para ler o arquivo .env automaticamente
     model_config = SettingsConfigDict(
@@ -0,0 +1,47 @@
+import atexit
+import logging
+import queue
+import re
+from logging.handlers import QueueHandler, QueueListener
+
+FORMATO = "%(asctime)s - %(levelname)s - %(message)s"
+
+_listener = None
+
+# Credenciais que podem vir na query string (ticket do /api/saldo/stream): não vão para o log de acesso
+_SEGREDOS_URL = re.compile(r"([?&](?:ticket|token)=)[^&\s]*")
+
+
+class OcultarSegredosUrl(logging.Filter):
+    """Troca o valor de ?ticket= / ?token= por *** nos argumentos do registro (o uvicorn loga o caminho com a query)."""
+
+    def filter(self, record):
+        if isinstance(record.args, tuple):
+            record.args = tuple(
+                _SEGREDOS_URL.sub(r"\1***", a) if isinstance(a, str) else a for a in record.args
+            )
+        return True
+
+
+def configurar_logging(nivel=logging.INFO):
+    """
+    Logging sem bloquear o event loop: os handlers da aplicação só colocam o registro
+    numa fila, e uma thread separada (QueueListener) formata e escreve no console.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    logging.getLogger("uvicorn.access").addFilter(OcultarSegredosUrl())
+
+    fila = queue.SimpleQueue()
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(FORMATO))
+
+    raiz = logging.getLogger()
+    raiz.setLevel(nivel)
+    raiz.handlers = [QueueHandler(fila)]
+
+    _listener = QueueListener(fila, console, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
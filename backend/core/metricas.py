@@ -0,0 +1,170 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict
+from sqlalchemy import event
+
+logger = logging.getLogger("sicro.sql")
+
+# Limites (em segundos) dos buckets dos histogramas, no padrão do Prometheus
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_SQL = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histograma:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.contagens = [0] * (len(buckets) + 1)   # último = +Inf
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.contagens[i] += 1
+                break
+        else:
+            self.contagens[-1] += 1
+        self.soma += valor
+        self.total += 1
+
+
+class Metricas:
+    """Métricas em memória do processo (cada worker do uvicorn tem as suas)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.http = defaultdict(lambda: Histograma(BUCKETS_HTTP))   # (método, rota, status) -> histograma
+        self.sql_por_rota = defaultdict(lambda: [0, 0.0])          # (método, rota) -> [consultas, segundos]
+        self.sql = Histograma(BUCKETS_SQL)
+        self.sql_lentas = 0
+
+    def registrar_requisicao(self, metodo, rota, status, segundos, consultas, tempo_sql):
+        with self._lock:
+            self.http[(metodo, rota, status)].observar(segundos)
+            acumulado = self.sql_por_rota[(metodo, rota)]
+            acumulado[0] += consultas
+            acumulado[1] += tempo_sql
+
+    def registrar_sql(self, segundos: float, lenta: bool):
+        with self._lock:
+            self.sql.observar(segundos)
+            if lenta:
+                self.sql_lentas += 1
+
+
+metricas = Metricas()
+
+# Consultas da requisição atual: [quantidade, segundos]. Preenchido pelo MetricasMiddleware.
+_sql_requisicao = contextvars.ContextVar("sql_requisicao", default=None)
+
+
+# ----------------------------- SQL ------------------------------ #
+def instrumentar_engine(engine, limite_lenta_ms: float):
+    """Mede cada consulta do engine e registra as lentas com statement e parâmetros."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("inicio_consulta", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _depois(conn, cursor, statement, parameters, context, executemany):
+        segundos = time.perf_counter() - conn.info["inicio_consulta"].pop()
+        lenta = limite_lenta_ms > 0 and segundos * 1000 >= limite_lenta_ms
+        metricas.registrar_sql(segundos, lenta)
+
+        atual = _sql_requisicao.get()
+        if atual is not None:
+            atual[0] += 1
+            atual[1] += segundos
+
+        if lenta:
+            parametros = repr(parameters)
+            if len(parametros) > 500:
+                parametros = parametros[:500] + "..."
+            logger.warning("Consulta lenta (%.1f ms): %s | parâmetros: %s", segundos * 1000, statement, parametros)
+
+
+# ----------------------------- HTTP ------------------------------ #
+class MetricasMiddleware:
+    """Middleware ASGI: latência por rota (template, ex. /api/usuarios/{usuario_id}) e SQL por requisição."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        status = 500
+        sql = [0, 0.0]
+        marcador = _sql_requisicao.set(sql)
+
+        async def enviar(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _sql_requisicao.reset(marcador)
+            rota = getattr(scope.get("route"), "path", None) or "desconhecida"
+            metricas.registrar_requisicao(
+                scope["method"], rota, status, time.perf_counter() - inicio, sql[0], sql[1]
+            )
+
+
+# --------------------------- PROMETHEUS --------------------------- #
+def _rotulos(**kw) -> str:
+    partes = []
+    for chave, valor in kw.items():
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"')
+        partes.append(f'{chave}="{valor}"')
+    return "{" + ",".join(partes) + "}"
+
+
+def _histograma(linhas, nome, hist, **rotulos):
+    acumulado = 0
+    for limite, contagem in zip(hist.buckets, hist.contagens):
+        acumulado += contagem
+        linhas.append(f"{nome}_bucket{_rotulos(**rotulos, le=limite)} {acumulado}")
+    linhas.append(f'{nome}_bucket{_rotulos(**rotulos, le="+Inf")} {hist.total}')
+    linhas.append(f"{nome}_sum{_rotulos(**rotulos)} {hist.soma}")
+    linhas.append(f"{nome}_count{_rotulos(**rotulos)} {hist.total}")
+
+
+def formato_prometheus(extras: dict) -> str:
+    """Texto no formato de exposição do Prometheus. "extras" = gauges/contadores soltos {nome: valor}."""
+    linhas = []
+    with metricas._lock:
+        linhas.append("# HELP sicro_http_request_duration_seconds Latência das requisições por rota")
+        linhas.append("# TYPE sicro_http_request_duration_seconds histogram")
+        for (metodo, rota, status), hist in sorted(metricas.http.items()):
+            _histograma(linhas, "sicro_http_request_duration_seconds", hist, method=metodo, route=rota, status=status)
+
+        linhas.append("# HELP sicro_sql_queries_total Consultas SQL executadas por rota")
+        linhas.append("# TYPE sicro_sql_queries_total counter")
+        for (metodo, rota), (consultas, _) in sorted(metricas.sql_por_rota.items()):
+            linhas.append(f"sicro_sql_queries_total{_rotulos(method=metodo, route=rota)} {consultas}")
+
+        linhas.append("# HELP sicro_sql_seconds_total Tempo total em SQL por rota")
+        linhas.append("# TYPE sicro_sql_seconds_total counter")
+        for (metodo, rota), (_, segundos) in sorted(metricas.sql_por_rota.items()):
+            linhas.append(f"sicro_sql_seconds_total{_rotulos(method=metodo, route=rota)} {segundos}")
+
+        linhas.append("# HELP sicro_sql_query_duration_seconds Duração de cada consulta SQL")
+        linhas.append("# TYPE sicro_sql_query_duration_seconds histogram")
+        _histograma(linhas, "sicro_sql_query_duration_seconds", metricas.sql)
+
+        linhas.append("# TYPE sicro_sql_slow_queries_total counter")
+        linhas.append(f"sicro_sql_slow_queries_total {metricas.sql_lentas}")
+
+    for nome, valor in extras.items():
+        linhas.append(f"{nome} {valor}")
+    return "\n".join(linhas) + "\n"
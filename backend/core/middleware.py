@@ -0,0 +1,52 @@
+import logging
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+class ErroGlobalMiddleware:
+    """
+    Middleware ASGI puro (sem BaseHTTPMiddleware): não cria tarefas extras nem bufferiza o
+    corpo das respostas, então StreamingResponse/SSE passam direto.
+    Se algo explodir antes da resposta começar, devolve 500 com os cabeçalhos CORS.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        resposta_iniciada = False
+
+        async def enviar(message):
+            nonlocal resposta_iniciada
+            if message["type"] == "http.response.start":
+                resposta_iniciada = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, enviar)
+        except Exception as e:
+            logger.error(f"Erro interno: {e}", exc_info=True)
+            if resposta_iniciada:
+                # Cabeçalhos já foram enviados: não dá para trocar por um 500
+                raise
+
+            # 🔥 Retorna erro mas com cabeçalhos CORS garantidos
+            request = Request(scope)
+            headers = {
+                "Access-Control-Allow-Origin": request.headers.get("origin") or "*",
+                "Access-Control-Allow-Credentials": "true",
+                "Access-Control-Allow-Methods": "*",
+                "Access-Control-Allow-Headers": "*",
+            }
+            response = JSONResponse(
+                status_code=500,
+                content={"detail": "Erro interno do servidor"},
+                headers=headers,
+            )
+            await response(scope, receive, send)
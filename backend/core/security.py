@@ -1,7 +1,14 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+import hashlib
+import threading
+import time
 from jose import jwt, JWTError
 from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
+from typing import Optional
+from fastapi import HTTPException, status, Depends, Query, Request
 from fastapi.security import OAuth2PasswordBearer
 from backend.core.config import settings
 
@@ -17,10 +24,62 @@ def criar_token(data: dict):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
-def verificar_token(token: str = Depends(oauth2_scheme)):
+class CacheTokens:
+    """
+    LRU limitado com os payloads de tokens já validados, chaveado pelo hash do token.
+    Cada entrada vale até o "exp" do próprio token, então um token expirado nunca é aceito.
+    """
+
+    def __init__(self, maximo: int):
+        self.maximo = maximo
+        self._itens = OrderedDict()   # sha256(token) -> (exp, payload)
+        self._lock = threading.Lock() # verificar_token é síncrono e roda no threadpool
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave: bytes):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                return None
+            exp, payload = item
+            if exp <= time.time():
+                del self._itens[chave]
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return payload
+
+    def guardar(self, chave: bytes, payload: dict):
+        exp = payload.get("exp")
+        if self.maximo <= 0 or not isinstance(exp, (int, float)):
+            return
+        with self._lock:
+            self._itens[chave] = (exp, payload)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maximo:
+                self._itens.popitem(last=False)
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {"tamanho": len(self._itens), "maximo": self.maximo, "acertos": self.acertos, "falhas": self.falhas}
+
+
+cache_tokens = CacheTokens(maximo=settings.TOKEN_CACHE_TAMANHO)
+
+
+def decodificar_token(token: str):
+    chave = hashlib.sha256(token.encode()).digest()
+    payload = cache_tokens.obter(chave)
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
+        cache_tokens.guardar(chave, payload)
+        return dict(payload)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -28,9 +87,85 @@ def verificar_token(token: str = Depends(oauth2_scheme)):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+# EventSource (SSE) não consegue mandar o header Authorization. O JWT de acesso na URL iria
+# parar nos logs de acesso (uvicorn/Render), então a URL leva um ticket: um JWT que só abre o
+# stream e vale STREAM_TICKET_SEGUNDOS, emitido por POST /api/saldo/ticket (autenticado).
+TICKET_STREAM = "stream"
+
+
+def verificar_token(token: str = Depends(oauth2_scheme)):
+    payload = decodificar_token(token)
+    if payload.get("token_type") == TICKET_STREAM:
+        # Ticket do stream vai na URL (e pode parar em log): não serve para o resto da API
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido ou expirado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+def criar_ticket_stream(payload: dict) -> str:
+    expire = datetime.now(timezone.utc) + timedelta(seconds=settings.STREAM_TICKET_SEGUNDOS)
+    dados = {"sub": payload.get("sub"), "role": payload.get("role"), "token_type": TICKET_STREAM, "exp": expire}
+    return jwt.encode(dados, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def verificar_token_stream(request: Request, ticket: Optional[str] = Query(None)):
+    autorizacao = request.headers.get("authorization", "")
+    if autorizacao.lower().startswith("bearer "):
+        return verificar_token(autorizacao[7:])
+    if not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    payload = decodificar_token(ticket)
+    if payload.get("token_type") != TICKET_STREAM:
+        # Um JWT de acesso na URL não é aceito (é isso que vazaria nos logs)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido ou expirado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
 def verificar_senha(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def gerar_hash_senha(password):
     return pwd_context.hash(password)
 
+
+# ------------------ BCRYPT FORA DO EVENT LOOP ------------------ #
+# Cada hash bcrypt leva centenas de ms de CPU. Rodando direto num "async def" ele trava
+# todas as outras requisições; aqui ele vai para um pool próprio e limitado de threads
+# (o bcrypt libera o GIL), com fila de espera com timeout.
+_pool_senhas = ThreadPoolExecutor(max_workers=settings.SENHA_POOL_WORKERS, thread_name_prefix="bcrypt")
+_vagas_senhas = asyncio.Semaphore(settings.SENHA_POOL_WORKERS)
+
+
+async def _executar_no_pool(func, *args):
+    try:
+        await asyncio.wait_for(_vagas_senhas.acquire(), timeout=settings.SENHA_FILA_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, tente novamente",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_pool_senhas, func, *args)
+    finally:
+        _vagas_senhas.release()
+
+async def verificar_senha_async(plain_password, hashed_password):
+    return await _executar_no_pool(verificar_senha, plain_password, hashed_password)
+
+async def gerar_hash_senha_async(password):
+    return await _executar_no_pool(gerar_hash_senha, password)
+
+async def aquecer_senhas():
+    # O passlib só carrega o backend do bcrypt no primeiro uso: paga isso antes do primeiro login
+    await _executar_no_pool(pwd_context.dummy_verify)
+
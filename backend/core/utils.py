@@ -0,0 +1,16 @@
+import zlib
+from fastapi import Request
+
+
+def gerar_etag(versao: int, request: Request) -> str:
+    """ETag fraco: versão do estoque + rota e query string (filtros/cursor mudam o conteúdo)."""
+    chave = f"{request.url.path}?{request.url.query}".encode()
+    return f'W/"{versao}-{zlib.crc32(chave):08x}"'
+
+
+def nao_modificado(request: Request, etag: str) -> bool:
+    """True se o cliente já tem essa versão (If-None-Match) e podemos responder 304."""
+    recebido = request.headers.get("if-none-match")
+    if not recebido:
+        return False
+    return recebido.strip() == "*" or etag in [e.strip() for e in recebido.split(",")]
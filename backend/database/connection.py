@@ -1,29 +1,88 @@
+import uuid
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import StaticPool
 from backend.core.config import settings 
+from backend.core.metricas import instrumentar_engine
+from backend.database.pool import PoolInstrumentado
 
-# 1. Pega a URL original
-database_url = settings.DATABASE_URL
-
-# 2. Garante que o driver seja o assíncrono (asyncpg)
-if "postgresql://" in database_url:
-    database_url = database_url.replace("postgresql://", "postgresql+asyncpg://")
-
-# 3. TRUQUE DO NEON: Remove o '?sslmode=' da URL se existir
-# O asyncpg não aceita isso na string, ele trava se deixar.
-if "?sslmode=" in database_url:
-    database_url = database_url.split("?")[0]
-
-# 4. Criação do Engine Assíncrono com a configuração de SSL correta
-engine = create_async_engine(
-    database_url,
-    echo=False,           
-    pool_pre_ping=True,
-    # Aqui dizemos ao asyncpg para usar SSL (obrigatório no Neon)
-    connect_args={"ssl": "require"} 
-)
 
-# 5. Configuração da Sessão
+def normalizar_url(url: str):
+    """
+    Aceita as URLs "de sempre" e escolhe o driver assíncrono certo:
+      postgres://, postgresql://      -> postgresql+asyncpg://   (Neon ou Postgres local)
+      sqlite:///arquivo.db            -> sqlite+aiosqlite:///arquivo.db
+    Devolve (url, modo_ssl). O ?sslmode= do Neon sai da URL (o asyncpg trava com ele)
+    e vira o modo de SSL da conexão.
+    """
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    u = make_url(url)
+
+    if u.get_backend_name() == "sqlite":
+        return u.set(drivername="sqlite+aiosqlite"), None
+
+    query = dict(u.query)
+    ssl = query.pop("sslmode", None) or settings.DB_SSL
+    query.pop("channel_binding", None)
+    return u.set(drivername="postgresql+asyncpg", query=query), ssl
+
+
+def criar_engine(url: str):
+    """Cria o engine assíncrono para Postgres (asyncpg) ou SQLite (aiosqlite)."""
+    url, ssl = normalizar_url(url)
+
+    if url.get_backend_name() == "sqlite":
+        # SQLite não tem schemas: "sicro.tabela" vira só "tabela"
+        opcoes = {"execution_options": {"schema_translate_map": {"sicro": None}}}
+        if url.database in (None, "", ":memory:"):
+            # Banco em memória: uma conexão só, compartilhada
+            return create_async_engine(url, poolclass=StaticPool, **opcoes), None
+        return create_async_engine(
+            url,
+            poolclass=PoolInstrumentado,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            **opcoes,
+        ), None
+
+    # Parâmetros do asyncpg
+    connect_args = {
+        # "require" no Neon; "disable" para um Postgres local sem SSL
+        "ssl": ssl,
+        # Cache de prepared statements: o do próprio asyncpg e o do adaptador do SQLAlchemy
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+    if settings.DB_PGBOUNCER:
+        # PgBouncer em modo transaction (ex.: endpoint "-pooler" do Neon) não mantém prepared
+        # statements entre transações: desliga os caches e usa nomes únicos
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+
+    return create_async_engine(
+        url,
+        echo=False,
+        pool_pre_ping=True,
+        poolclass=PoolInstrumentado,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,   # recicla antes do Neon derrubar conexões ociosas
+        connect_args=connect_args,
+    ), ssl
+
+
+# Engine principal (DATABASE_URL)
+engine, ssl_modo = criar_engine(settings.DATABASE_URL)
+
+# Tempo de cada consulta + log das lentas (métricas em /metrics)
+instrumentar_engine(engine, settings.SQL_LENTA_MS)
+
+# Configuração da Sessão
 AsyncSessionLocal = async_sessionmaker(
     bind=engine, 
     class_=AsyncSession, 
@@ -32,10 +91,10 @@ AsyncSessionLocal = async_sessionmaker(
 
 Base = declarative_base()
 
-# 6. Função de Injeção de Dependência
+# Função de Injeção de Dependência
 async def get_db():
     async with AsyncSessionLocal() as db:
         try:
             yield db
         finally:
-            await db.close()
\ No newline at end of file
+            await db.close()
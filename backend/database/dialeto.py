@@ -0,0 +1,26 @@
+from sqlalchemy import false, func, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def insert_upsert(db, modelo):
+    """INSERT ... ON CONFLICT existe nos dois dialetos, mas cada um tem a sua construção."""
+    if db.bind.dialect.name == "sqlite":
+        return sqlite.insert(modelo)
+    return postgresql.insert(modelo)
+
+
+def dia_br(db, coluna):
+    """Dia de um timestamp no horário de Brasília (mesma regra de get_br_time)."""
+    if db.bind.dialect.name == "sqlite":
+        return func.date(coluna)
+    return func.date(func.timezone("America/Sao_Paulo", coluna))
+
+
+async def travar_escrita(db, modelo, coluna):
+    """
+    SQLite ignora o FOR UPDATE e só trava o arquivo na primeira escrita da transação: sem isso, duas
+    ordens leem o mesmo saldo e a segunda sobrescreve a primeira. Um UPDATE que não pega nenhuma
+    linha já abre a transação com o lock de escrita (as outras esperam o commit). No Postgres não faz nada.
+    """
+    if db.bind.dialect.name == "sqlite":
+        await db.execute(update(modelo).where(false()).values({coluna: getattr(modelo, coluna)}))
@@ -0,0 +1,31 @@
+import json
+
+
+async def plano(conn, query) -> dict:
+    """EXPLAIN (FORMAT JSON) de um select() do SQLAlchemy, com os parâmetros de verdade.
+
+    Os parâmetros vão como bind (e não como literal no SQL) para o plano ser o mesmo que a
+    rota recebe: é na hora do plano, com o valor da data, que o Postgres poda as partições.
+    """
+    compilado = query.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    if compilado.positiontup is not None:
+        params = tuple(compilado.params[nome] for nome in compilado.positiontup)
+    else:
+        params = compilado.params
+    result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + compilado.string, params)
+    bruto = result.scalar()
+    if isinstance(bruto, str):
+        bruto = json.loads(bruto)
+    return bruto[0]["Plan"]
+
+
+def nos(no: dict):
+    """Percorre o plano inteiro (o nó e todos os filhos)."""
+    yield no
+    for filho in no.get("Plans", []):
+        yield from nos(filho)
+
+
+def relacoes(no: dict) -> set:
+    """Todas as tabelas (partições inclusive) lidas em algum nó do plano."""
+    return {n["Relation Name"] for n in nos(no) if "Relation Name" in n}
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import text
+from backend.core.config import settings
+from backend.models.movimentacao import get_br_time
+
+# No Postgres, sicro.movimentacoes é particionada por mês (RANGE em "data"), uma partição
+# sicro.movimentacoes_AAAA_MM por mês no horário de Brasília, mais a movimentacoes_padrao
+# para o que cair fora. As futuras são criadas aqui, antes de serem necessárias.
+#
+# Se a padrão já tem linhas do mês (API parada por meses, importação com data adiantada), o
+# Postgres recusa o CREATE ... PARTITION OF. Aí a padrão sai da tabela, a partição é criada, as
+# linhas do mês mudam para ela e a padrão volta, tudo na mesma transação.
+
+TABELA = "sicro.movimentacoes"
+PADRAO = "sicro.movimentacoes_padrao"
+INTERVALO_VERIFICACAO = 6 * 3600     # segundos entre verificações com a API no ar
+LOCK_TIMEOUT = "5s"                  # DETACH trava a tabela inteira: melhor desistir e tentar depois
+_TRAVA = 74_120_015                  # pg_advisory_xact_lock: um worker cria por vez
+_FUSO = timezone(timedelta(hours=-3))
+
+logger = logging.getLogger(__name__)
+
+
+class EstatisticasParticoes:
+    def __init__(self):
+        self.bloqueadas = set()      # partições que não puderam ser criadas na última tentativa
+        self.realocadas = 0          # linhas movidas da padrão para a partição do mês
+
+
+estatisticas_particoes = EstatisticasParticoes()
+
+
+def _proximo_mes(dia: date) -> date:
+    return date(dia.year + (dia.month == 12), dia.month % 12 + 1, 1)
+
+
+def nome_particao(mes: date) -> str:
+    return f"movimentacoes_{mes.year:04d}_{mes.month:02d}"
+
+
+def _limites(mes: date) -> tuple:
+    """Início e fim (exclusivo) do mês à meia-noite de Brasília, sem horário de verão."""
+    inicio = date(mes.year, mes.month, 1)
+    fim = _proximo_mes(inicio)
+    return (datetime(inicio.year, inicio.month, 1, tzinfo=_FUSO), datetime(fim.year, fim.month, 1, tzinfo=_FUSO))
+
+
+def ddl_particao(mes: date) -> str:
+    """CREATE da partição do mês."""
+    inicio, fim = _limites(mes)
+    return (
+        f"CREATE TABLE IF NOT EXISTS sicro.{nome_particao(mes)} PARTITION OF {TABELA} "
+        f"FOR VALUES FROM ('{inicio.isoformat()}') TO ('{fim.isoformat()}')"
+    )
+
+
+async def _criar_particao(conn, mes: date) -> int:
+    """Cria a partição do mês, tirando da padrão as linhas que já caíram nela. Devolve quantas moveu."""
+    inicio, fim = _limites(mes)
+    no_padrao = await conn.scalar(text(
+        f"SELECT to_regclass('{PADRAO}') IS NOT NULL AND EXISTS "
+        f"(SELECT 1 FROM {PADRAO} WHERE data >= :inicio AND data < :fim)"
+    ), {"inicio": inicio, "fim": fim})
+    if not no_padrao:
+        await conn.execute(text(ddl_particao(mes)))
+        return 0
+
+    await conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+    await conn.execute(text(f"ALTER TABLE {TABELA} DETACH PARTITION {PADRAO}"))
+    await conn.execute(text(ddl_particao(mes)))
+    # As duas são PARTITION OF a mesma tabela: mesmas colunas, na mesma ordem
+    movidas = await conn.execute(text(
+        f"WITH movidas AS (DELETE FROM {PADRAO} WHERE data >= :inicio "
+        f"AND data < :fim RETURNING *) "
+        f"INSERT INTO sicro.{nome_particao(mes)} SELECT * FROM movidas"
+    ), {"inicio": inicio, "fim": fim})
+    await conn.execute(text(f"ALTER TABLE {TABELA} ATTACH PARTITION {PADRAO} DEFAULT"))
+    return movidas.rowcount
+
+
+async def particionada(conn) -> bool:
+    """True se a tabela foi convertida pela migração (no SQLite ou via criar-tabelas não é)."""
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(await conn.scalar(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:tabela))"
+    ), {"tabela": TABELA}))
+
+
+async def garantir_particoes(conn, inicio: date = None, meses_futuros: int = None) -> list:
+    """Cria as partições mensais de `inicio` (padrão: mês atual) até `meses_futuros` à frente.
+
+    Devolve os nomes das partições criadas agora. Não faz nada se a tabela não é particionada.
+    """
+    if not await particionada(conn):
+        return []
+    if meses_futuros is None:
+        meses_futuros = settings.PARTICOES_MESES_FUTUROS
+
+    hoje = get_br_time().date()
+    mes = date((inicio or hoje).year, (inicio or hoje).month, 1)
+    ultimo = date(hoje.year, hoje.month, 1)
+    for _ in range(meses_futuros):
+        ultimo = _proximo_mes(ultimo)
+
+    existentes = set((await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:tabela)"
+    ), {"tabela": TABELA})).scalars())
+
+    criadas = []
+    while mes <= ultimo:
+        nome = nome_particao(mes)
+        if nome not in existentes:
+            await conn.execute(text("SELECT pg_advisory_xact_lock(:trava)"), {"trava": _TRAVA})
+            try:
+                # Savepoint por mês: um mês bloqueado não impede os outros
+                async with conn.begin_nested():
+                    movidas = await _criar_particao(conn, mes)
+            except Exception as e:
+                estatisticas_particoes.bloqueadas.add(nome)
+                logger.warning("Partição %s não criada (as linhas do mês seguem na padrão): %s", nome, e)
+            else:
+                estatisticas_particoes.bloqueadas.discard(nome)
+                if movidas:
+                    estatisticas_particoes.realocadas += movidas
+                    logger.info("Partição %s criada com %s linhas que estavam na padrão", nome, movidas)
+                criadas.append(nome)
+        mes = _proximo_mes(mes)
+    return criadas
+
+
+async def manter_particoes(engine):
+    """Loop do lifespan: garante as partições futuras na subida e depois periodicamente."""
+    while True:
+        try:
+            async with engine.begin() as conn:
+                criadas = await garantir_particoes(conn)
+            if criadas:
+                logger.info("Partições criadas: %s", ", ".join(criadas))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Não foi possível garantir as partições de %s: %s", TABELA, e)
+        await asyncio.sleep(INTERVALO_VERIFICACAO)
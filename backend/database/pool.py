@@ -0,0 +1,70 @@
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class EstatisticasPool:
+    """Contadores do pool de conexões, para dimensionar pool_size/max_overflow com dados."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.espera_total = 0.0      # segundos somados esperando uma conexão
+        self.espera_max = 0.0
+        self.espera_recente = 0.0    # média móvel exponencial (reage rápido a picos)
+        self.timeouts = 0            # pool_timeout estourado (pool esgotado)
+        self.falhas_conexao = 0      # erro ao abrir conexão nova (rede, SSL, Neon dormindo...)
+        self.conexoes_abertas = 0
+
+    def registrar_espera(self, segundos: float):
+        with self._lock:
+            self.checkouts += 1
+            self.espera_total += segundos
+            self.espera_max = max(self.espera_max, segundos)
+            self.espera_recente = 0.8 * self.espera_recente + 0.2 * segundos
+
+
+estatisticas_pool = EstatisticasPool()
+
+
+class PoolInstrumentado(AsyncAdaptedQueuePool):
+    """O pool padrão do engine async, medindo quanto tempo cada checkout esperou."""
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            estatisticas_pool.timeouts += 1
+            raise
+        except Exception:
+            estatisticas_pool.falhas_conexao += 1
+            raise
+        finally:
+            estatisticas_pool.registrar_espera(time.perf_counter() - inicio)
+
+    def _create_connection(self):
+        conexao = super()._create_connection()
+        estatisticas_pool.conexoes_abertas += 1
+        return conexao
+
+
+def resumo_pool(pool) -> dict:
+    """Estado atual do pool + contadores acumulados."""
+    e = estatisticas_pool
+    # StaticPool (SQLite em memória) não tem esses contadores
+    fila = isinstance(pool, AsyncAdaptedQueuePool)
+    return {
+        "tamanho": pool.size() if fila else 1,
+        "em_uso": pool.checkedout() if fila else 0,
+        "livres": pool.checkedin() if fila else 1,
+        "overflow": pool.overflow() if fila else 0,
+        "checkouts": e.checkouts,
+        "espera_media_ms": round(1000 * e.espera_total / e.checkouts, 3) if e.checkouts else 0.0,
+        "espera_recente_ms": round(1000 * e.espera_recente, 3),
+        "espera_max_ms": round(1000 * e.espera_max, 3),
+        "timeouts": e.timeouts,
+        "falhas_conexao": e.falhas_conexao,
+        "conexoes_abertas": e.conexoes_abertas,
+    }
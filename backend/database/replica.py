@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from backend.core.config import settings
+from backend.core.metricas import instrumentar_engine
+from backend.database.connection import AsyncSessionLocal, criar_engine, engine
+from backend.models.estoque_versao import EstoqueVersao
+
+# Réplica de leitura (DATABASE_REPLICA_URL, opcional) para /saldo, /historico e /dashboard/*.
+# A réplica só é usada quando:
+#   - a última verificação conseguiu falar com ela e o atraso está dentro de REPLICA_ATRASO_MAX_SEGUNDOS
+#   - ela já tem a versão do estoque que este cliente acabou de gravar (read-your-writes): depois do
+#     /movimentar o cliente recebe o cookie COOKIE_VERSAO com a versão nova, válido por
+#     REPLICA_FIXAR_SEGUNDOS; até a réplica alcançar essa versão ele lê do primário
+# Qualquer outro caso (sem réplica, réplica fora, atrasada, erro ao conectar) cai no primário.
+
+COOKIE_VERSAO = "sicro_versao"
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    """Estado da réplica visto pela última verificação (uma por worker, a cada REPLICA_VERIFICACAO_SEGUNDOS)."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.sessao = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False) if engine else None
+        self.disponivel = False
+        self.versao = None            # versão do estoque lida na réplica (a réplica tem pelo menos isso)
+        self.atrasada_desde = None    # monotonic de quando a réplica ficou atrás do primário
+        self.erro = None
+        self.leituras = 0
+        self.desvios = 0              # leituras que iam para a réplica e foram para o primário
+
+    @property
+    def atraso(self) -> float:
+        return time.monotonic() - self.atrasada_desde if self.atrasada_desde is not None else 0.0
+
+    def usar(self, versao_minima: int = None) -> bool:
+        if self.engine is None or not self.disponivel or self.versao is None:
+            return False
+        if self.atraso > settings.REPLICA_ATRASO_MAX_SEGUNDOS:
+            return False
+        return versao_minima is None or self.versao >= versao_minima
+
+    def falhou(self, erro: Exception):
+        if self.disponivel:
+            logger.warning("Réplica indisponível, lendo do primário: %s", erro)
+        self.disponivel = False
+        self.erro = str(erro)
+
+    async def verificar(self):
+        """
+        Compara a versão do estoque nas duas pontas. O atraso conta desde a primeira verificação
+        em que a réplica ficou para trás (vale para Postgres com streaming ou para um SQLite copiado).
+        """
+        try:
+            async with engine.connect() as conn:
+                primario = await conn.scalar(select(EstoqueVersao.versao).where(EstoqueVersao.id == 1))
+            async with self.engine.connect() as conn:
+                versao = await asyncio.wait_for(
+                    conn.scalar(select(EstoqueVersao.versao).where(EstoqueVersao.id == 1)),
+                    timeout=settings.REPLICA_ATRASO_MAX_SEGUNDOS,
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.falhou(e)
+            return
+
+        versao = versao or 0
+        if versao >= (primario or 0):
+            self.atrasada_desde = None
+        elif self.atrasada_desde is None:
+            self.atrasada_desde = time.monotonic()
+        if not self.disponivel:
+            logger.info("Réplica disponível (versão %s, primário %s)", versao, primario)
+        self.versao = versao
+        self.disponivel = True
+        self.erro = None
+
+    async def monitorar(self):
+        """Loop do lifespan."""
+        while True:
+            await self.verificar()
+            await asyncio.sleep(settings.REPLICA_VERIFICACAO_SEGUNDOS)
+
+    def resumo(self) -> dict:
+        return {
+            "configurada": self.engine is not None,
+            "disponivel": self.disponivel,
+            "versao": self.versao,
+            "atraso_segundos": round(self.atraso, 3),
+            "erro": self.erro,
+            "leituras": self.leituras,
+            "desvios_primario": self.desvios,
+        }
+
+
+def _criar_replica() -> Replica:
+    if not settings.DATABASE_REPLICA_URL:
+        return Replica(None)
+    engine_replica, _ = criar_engine(settings.DATABASE_REPLICA_URL)
+    instrumentar_engine(engine_replica, settings.SQL_LENTA_MS)
+    return Replica(engine_replica)
+
+
+replica = _criar_replica()
+
+
+async def fechar_engines():
+    """Fecha as conexões do primário e da réplica (comandos de linha: sem isso o aiosqlite segura o processo)."""
+    await engine.dispose()
+    if replica.engine is not None:
+        await replica.engine.dispose()
+
+
+def _versao_gravada(request: Request):
+    try:
+        return int(request.cookies.get(COOKIE_VERSAO))
+    except (TypeError, ValueError):
+        return None
+
+
+def fixar_primario(response: Response, versao: int):
+    """Depois de uma gravação: as próximas leituras deste cliente precisam ver pelo menos `versao`."""
+    if replica.engine is None or versao is None:
+        return
+    response.set_cookie(
+        COOKIE_VERSAO, str(versao), max_age=int(settings.REPLICA_FIXAR_SEGUNDOS),
+        httponly=True, secure=True, samesite="none",    # front e API em domínios diferentes
+    )
+
+
+# Dependência das rotas só de leitura
+async def get_read_db(request: Request):
+    versao_minima = _versao_gravada(request)
+    if replica.usar(versao_minima):
+        db = replica.sessao()
+        try:
+            await db.connection()   # conecta já: se a réplica caiu agora, ainda dá para ir ao primário
+        except Exception as e:
+            await db.close()
+            replica.falhou(e)
+        else:
+            # ETag/caches por versão usam a versão que a réplica com certeza já tem
+            db.info["versao_estoque"] = replica.versao
+            replica.leituras += 1
+            try:
+                yield db
+            finally:
+                await db.close()
+            return
+    if replica.engine is not None:
+        replica.desvios += 1
+
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        finally:
+            await db.close()
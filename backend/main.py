@@ -4,19 +4,55 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from backend.routes import auth, estoque, usuario_routes
+from backend.routes import auth, estoque, usuario_routes, metricas, catalogo, alertas
 from backend.database.connection import engine
-import logging, traceback
+from backend.core.config import settings
+from backend.core.log import configurar_logging
+from backend.core.middleware import ErroGlobalMiddleware
+from backend.core.metricas import MetricasMiddleware
+from backend.core.admissao import AdmissaoMiddleware
 from backend.routes.dashboard import entradas
+from backend.services.eventos import broker
+from backend.database.particoes import manter_particoes
+from backend.database.replica import replica
+from backend.services.idempotencia import manter_idempotencia
+from backend.services.aquecimento import aquecimento
+from backend.services.conciliacao import manter_snapshots
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+
+
+# ♻️ Ciclo de vida: liga/desliga o LISTEN dos eventos de saldo e as tarefas de manutenção
+# (partições futuras, limpeza das chaves de idempotência vencidas, snapshot/conciliação do saldo,
+# saúde da réplica de leitura)
+# e o aquecimento de pool/consultas/caches, que roda em paralelo: /pronto só responde 200 quando acabar
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await broker.iniciar()
+    tarefas = [
+        asyncio.create_task(aquecimento.executar()),
+        asyncio.create_task(manter_particoes(engine)),
+        asyncio.create_task(manter_idempotencia()),
+        asyncio.create_task(manter_snapshots()),
+    ]
+    if replica.engine is not None:
+        tarefas.append(asyncio.create_task(replica.monitorar()))
+    yield
+    for tarefa in tarefas:
+        tarefa.cancel()
+    await broker.parar()
+
 
 app = FastAPI(
     title="Sistema de Controle de Roupas Estéreis",
     version="1.0.0",
-    description="API para controle e rastreio de roupas estéreis"
+    description="API para controle e rastreio de roupas estéreis",
+    lifespan=lifespan,
 )
 
-# 🧠 Logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+# 🧠 Logging (via fila, sem I/O síncrono no event loop)
+configurar_logging()
 
 # 🌐 CORS (MANTER ANTES das rotas e dos middlewares personalizados)
 
@@ -36,6 +72,7 @@ app.add_middleware(
     allow_credentials=True,   # se não usar cookies no front, pode pôr False
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Proximo-Cursor", "Idempotent-Replayed", "Retry-After"],  # cursor do histórico / resposta repetida do /movimentar / 429-503
 )
 
 
@@ -45,29 +82,23 @@ app.include_router(auth.router, prefix="/api")
 app.include_router(estoque.router, prefix="/api")
 app.include_router(usuario_routes.router, prefix="/api")
 app.include_router(entradas.router, prefix="/api")
+app.include_router(catalogo.router, prefix="/api")
+app.include_router(alertas.router, prefix="/api")
+app.include_router(metricas.router, prefix="/api")
+# /metrics não tem login de usuário: fora do SQLite local só é montado com METRICAS_TOKEN definido
+if settings.METRICAS_TOKEN or engine.dialect.name == "sqlite":
+    app.include_router(metricas.router_prometheus)
+else:
+    logging.getLogger(__name__).warning("METRICAS_TOKEN não definido: /metrics desligado")
+
+# 💥 Middleware de erro global (depois do CORS = fica por fora dele)
+app.add_middleware(ErroGlobalMiddleware)
 
-# 💥 Middleware de erro global (depois do CORS)
-@app.middleware("http")
-async def global_error_handler(request: Request, call_next):
-    try:
-        response = await call_next(request)
-        return response
-    except Exception as e:
-        logging.error(f"Erro interno: {e}", exc_info=True)
-        traceback.print_exc()
-
-        # 🔥 Retorna erro mas com cabeçalhos CORS garantidos
-        headers = {
-            "Access-Control-Allow-Origin": request.headers.get("origin") or "*",
-            "Access-Control-Allow-Credentials": "true",
-            "Access-Control-Allow-Methods": "*",
-            "Access-Control-Allow-Headers": "*",
-        }
-        return JSONResponse(
-            status_code=500,
-            content={"detail": "Erro interno do servidor"},
-            headers=headers,
-        )
+# 🚦 Controle de admissão (fora do erro global: recusa antes de qualquer trabalho)
+app.add_middleware(AdmissaoMiddleware)
+
+# 📈 Métricas por rota (o mais externo, para contar também os 500, 429 e 503)
+app.add_middleware(MetricasMiddleware)
 
 # 🚫 Handlers de erros
 @app.exception_handler(StarletteHTTPException)
@@ -75,7 +106,7 @@ async def http_exception_handler(request: Request, exc):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": str(exc.detail)},
-        headers={"Access-Control-Allow-Origin": request.headers.get("origin") or "*"},
+        headers={**(exc.headers or {}), "Access-Control-Allow-Origin": request.headers.get("origin") or "*"},
     )
 
 @app.exception_handler(RequestValidationError)
@@ -89,3 +120,8 @@ async def validation_exception_handler(request: Request, exc):
 @app.get("/")
 def root():
     return {"message": "API Sicro rodando 🚀"}
+
+# Readiness: 503 enquanto o aquecimento não terminou (o "/" acima é só liveness)
+@app.get("/pronto")
+def pronto():
+    return JSONResponse(status_code=200 if aquecimento.pronto else 503, content=aquecimento.resumo())
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from backend.database.connection import Base
+from backend.models.movimentacao import get_br_time
+
+class AlertaEstoque(Base):
+    """Estado atual do alerta de estoque de cada item (mantido pelo /movimentar, lido pelo /alertas)."""
+    __tablename__ = "alertas_estoque"
+    __table_args__ = {"schema": "sicro"}
+
+    item_id = Column(Integer, ForeignKey("sicro.catalogo_itens.id"), primary_key=True)
+    estado = Column(String, nullable=False, default="ok")     # ok / baixo / ruptura
+    desde = Column(DateTime(timezone=True), nullable=False, default=get_br_time)   # quando entrou no estado
+
+
+class EventoAlerta(Base):
+    """Cada mudança de estado de um alerta (o feed do /alertas/eventos)."""
+    __tablename__ = "eventos_alerta"
+    __table_args__ = (
+        Index("ix_eventos_alerta_item_id", "item_id", "id"),
+        {"schema": "sicro"},
+    )
+
+    id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, ForeignKey("sicro.catalogo_itens.id"), nullable=False)
+    anterior = Column(String, nullable=False)
+    estado = Column(String, nullable=False)
+    saldo = Column(Integer, nullable=False)
+    estoque_minimo = Column(Integer, nullable=True)
+    ordem_id = Column(String, nullable=True)      # ordem que causou a mudança (vazio = mudança de limite)
+    data = Column(DateTime(timezone=True), nullable=False, default=get_br_time)
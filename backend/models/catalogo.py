@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, Boolean, Index, and_, func, literal_column
+from sqlalchemy.orm import validates
+from backend.database.connection import Base
+
+class CatalogoItem(Base):
+    """Cada item controlado (tipo + tamanho). Roupa e Movimentacao apontam para cá pelo id."""
+    __tablename__ = "catalogo_itens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tipo = Column(String, nullable=False)          # ex: Macacão, Botas...
+    tamanho = Column(String, nullable=True)        # ex: P, M, G (vazio = item sem tamanho)
+    sort_key = Column(Integer, nullable=False, default=0)  # ordem de exibição (saldo, gráficos)
+    ativo = Column(Boolean, nullable=False, default=True)
+
+    __table_args__ = (
+        # Um item por (tipo, tamanho); o COALESCE faz o "sem tamanho" contar como valor único
+        Index("uq_catalogo_itens_tipo_tamanho", "tipo", func.coalesce(tamanho, ""), unique=True),
+        Index("ix_catalogo_itens_sort_key", "sort_key", "id"),
+        {"schema": "sicro"},
+    )
+
+    @validates("tamanho")
+    def _validar_tamanho(self, chave, tamanho):
+        return normalizar_tamanho(tamanho)
+
+
+def normalizar_tamanho(tamanho):
+    """"" e None são o mesmo item (o índice único usa COALESCE(tamanho, '')): guarda sempre None."""
+    return tamanho or None
+
+
+# Mesma expressão do índice único (literal, não parâmetro, para o Postgres conseguir usar o índice)
+TAMANHO_CHAVE = func.coalesce(CatalogoItem.tamanho, literal_column("''"))
+
+
+def filtro_item(tipo: str, tamanho):
+    """WHERE do item (tipo, tamanho) com a mesma regra do índice único: NULL e "" são o mesmo tamanho."""
+    return and_(CatalogoItem.tipo == tipo, TAMANHO_CHAVE == (tamanho or ""))
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, BigInteger
+from backend.database.connection import Base
+
+class EstoqueVersao(Base):
+    """Linha única com um contador que sobe a cada /movimentar (base dos ETags de leitura)."""
+    __tablename__ = "estoque_versao"
+    __table_args__ = {"schema": "sicro"}
+
+    id = Column(Integer, primary_key=True, default=1)
+    versao = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, DateTime, JSON, Index
+from backend.database.connection import Base
+from backend.models.movimentacao import get_br_time
+
+class ChaveIdempotencia(Base):
+    """Idempotency-Key já usada no /movimentar, com a resposta que foi dada (para repetir sem refazer)."""
+    __tablename__ = "chaves_idempotencia"
+    __table_args__ = (
+        Index("ix_chaves_idempotencia_criada_em", "criada_em"),   # limpeza por TTL
+        {"schema": "sicro"},
+    )
+
+    usuario = Column(String, primary_key=True)     # a chave vale por usuário
+    chave = Column(String, primary_key=True)
+    hash_requisicao = Column(String, nullable=False)   # sha256 do corpo: mesma chave com outro corpo é erro
+    resposta = Column(JSON, nullable=True)
+    criada_em = Column(DateTime(timezone=True), nullable=False, default=get_br_time)
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index, ForeignKey
 from backend.database.connection import Base
 
 # Se quiser manter fixo o fuso de Brasília aqui:
@@ -7,14 +7,24 @@ def get_br_time():
     return datetime.now(timezone(timedelta(hours=-3)))
 
 class Movimentacao(Base):
+    # No Postgres a tabela é particionada por mês em "data" (migração e7d3b91f4a58) e a PK real
+    # é (id, data); o id continua único (vem da sequência) e é a identidade usada pelo ORM.
+    # Partições futuras: backend/database/particoes.py
     __tablename__ = "movimentacoes"
-    __table_args__ = {"schema": "sicro"}
+    __table_args__ = (
+        # Índices da paginação por cursor (data, id) do histórico e dos filtros mais usados
+        Index("ix_movimentacoes_data_id", "data", "id"),
+        Index("ix_movimentacoes_usuario_data_id", "usuario", "data", "id"),
+        Index("ix_movimentacoes_item_data_id", "item_id", "data", "id"),
+        Index("ix_movimentacoes_acao_data_id", "acao", "data", "id"),
+        Index("ix_movimentacoes_ordem_id", "ordem_id"),
+        {"schema": "sicro"},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     ordem_id = Column(String, nullable=False) # Agrupador de itens
     usuario = Column(String, nullable=False) # Quem fez a ação
-    tipo = Column(String, nullable=False) # Macacão, Bota, etc
-    tamanho = Column(String, nullable=True)
+    item_id = Column(Integer, ForeignKey("sicro.catalogo_itens.id"), nullable=False) # Macacão M, Bota 40, etc
     quantidade = Column(Integer, nullable=False)
     acao = Column(String, nullable=False) # entrada / saída
     data = Column(DateTime(timezone=True), default=get_br_time)
\ No newline at end of file
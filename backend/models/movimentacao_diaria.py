@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Index
+from backend.database.connection import Base
+
+class MovimentacaoDiaria(Base):
+    """Total movimentado por dia/item/ação. Mantida junto com o /movimentar e lida pelo dashboard."""
+    __tablename__ = "movimentacao_diaria"
+    __table_args__ = (
+        # Saídas de um período (planejamento, previsão): só lê o índice, sem ir na tabela
+        Index("ix_movimentacao_diaria_acao_dia", "acao", "dia", "item_id", postgresql_include=["quantidade"]),
+        {"schema": "sicro"},
+    )
+
+    dia = Column(Date, primary_key=True)
+    item_id = Column(Integer, ForeignKey("sicro.catalogo_itens.id"), primary_key=True)
+    acao = Column(String, primary_key=True)
+    quantidade = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, ForeignKey
 from backend.database.connection import Base
 
 class Roupa(Base):
@@ -6,6 +6,7 @@ class Roupa(Base):
     __table_args__ = {"schema": "sicro"}
 
     id = Column(Integer, primary_key=True, index=True)
-    tipo = Column(String, nullable=False)          # ex: Macacão, Botas...
-    tamanho = Column(String, nullable=True)        # ex: P, M, G, etc.
+    item_id = Column(Integer, ForeignKey("sicro.catalogo_itens.id"), unique=True, nullable=False)  # tipo/tamanho no catálogo
     saldo = Column(Integer, default=0)             # quantidade atual
+    estoque_minimo = Column(Integer, nullable=True)   # no mínimo ou abaixo: alerta (vazio = sem alerta)
+    estoque_alvo = Column(Integer, nullable=True)     # até onde repor quando o alerta dispara
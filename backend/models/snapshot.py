@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from backend.database.connection import Base
+from backend.models.movimentacao import get_br_time
+
+class SnapshotSaldo(Base):
+    """Fotografia do saldo de todos os itens, válida até a movimentação `ultimo_id` (inclusive)."""
+    __tablename__ = "snapshots_saldo"
+    __table_args__ = {"schema": "sicro"}
+
+    id = Column(Integer, primary_key=True)
+    ultimo_id = Column(Integer, nullable=False)   # maior movimentacoes.id já somado
+    criado_em = Column(DateTime(timezone=True), nullable=False, default=get_br_time)
+    divergencias = Column(Integer, nullable=False, default=0)   # itens com saldo diferente do histórico ao tirar
+
+
+class SnapshotSaldoItem(Base):
+    """Saldo de um item segundo o histórico (snapshot anterior + movimentações até ultimo_id)."""
+    __tablename__ = "snapshots_saldo_itens"
+    __table_args__ = {"schema": "sicro"}
+
+    snapshot_id = Column(Integer, ForeignKey("sicro.snapshots_saldo.id", ondelete="CASCADE"), primary_key=True)
+    item_id = Column(Integer, ForeignKey("sicro.catalogo_itens.id"), primary_key=True)
+    saldo = Column(Integer, nullable=False)
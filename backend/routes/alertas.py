@@ -0,0 +1,130 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, case, desc
+from typing import Optional
+from backend.core.security import verificar_token
+from backend.core.utils import gerar_etag, nao_modificado
+from backend.database.connection import get_db
+from backend.database.dialeto import insert_upsert
+from backend.models.alerta import AlertaEstoque, EventoAlerta
+from backend.models.catalogo import CatalogoItem
+from backend.models.roupa import Roupa
+from backend.schemas.alerta import LimitesRequest
+from backend.services.alertas import OK, RUPTURA, reavaliar
+from backend.services.versao import versao_estoque
+from backend.services.eventos import evento_saldo, publicar_mudanca
+
+router = APIRouter(tags=["Alertas"])
+
+# Estado já calculado pelo /movimentar: só os itens em alerta, ruptura primeiro e depois na ordem do catálogo
+SELECT_ALERTAS = (
+    select(
+        AlertaEstoque.item_id, CatalogoItem.tipo, CatalogoItem.tamanho, AlertaEstoque.estado, AlertaEstoque.desde,
+        Roupa.saldo, Roupa.estoque_minimo, Roupa.estoque_alvo,
+    )
+    .join(CatalogoItem, CatalogoItem.id == AlertaEstoque.item_id)
+    .join(Roupa, Roupa.item_id == AlertaEstoque.item_id)
+    .where(AlertaEstoque.estado != OK)
+    .order_by(case((AlertaEstoque.estado == RUPTURA, 0), else_=1), CatalogoItem.sort_key, CatalogoItem.id)
+)
+
+
+# --------------------- ALERTAS ATIVOS --------------------- #
+@router.get("/alertas")
+async def listar_alertas(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    token: dict = Depends(verificar_token),
+):
+    # Alerta só muda junto com o estoque (ou os limites, que também sobem a versão)
+    etag = gerar_etag(await versao_estoque.atual(db), request)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if nao_modificado(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    result = await db.execute(SELECT_ALERTAS)
+    return ORJSONResponse(
+        [
+            {
+                "item_id": item_id,
+                "tipo": tipo,
+                "tamanho": tamanho,
+                "estado": estado,
+                "desde": desde,
+                "saldo": saldo or 0,
+                "estoque_minimo": minimo,
+                "estoque_alvo": alvo,
+                "repor": max(alvo - (saldo or 0), 0) if alvo is not None else None,
+            }
+            for item_id, tipo, tamanho, estado, desde, saldo, minimo, alvo in result.all()
+        ],
+        headers=headers,
+    )
+
+
+# --------------------- FEED DE EVENTOS --------------------- #
+@router.get("/alertas/eventos")
+async def listar_eventos(
+    apos: Optional[int] = Query(None),   # id do último evento já visto: devolve só os novos, em ordem
+    limite: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    token: dict = Depends(verificar_token),
+):
+    query = (
+        select(EventoAlerta.id, EventoAlerta.item_id, CatalogoItem.tipo, CatalogoItem.tamanho, EventoAlerta.anterior,
+               EventoAlerta.estado, EventoAlerta.saldo, EventoAlerta.estoque_minimo, EventoAlerta.ordem_id,
+               EventoAlerta.data)
+        .join(CatalogoItem, CatalogoItem.id == EventoAlerta.item_id)
+        .limit(limite)
+    )
+    if apos is not None:
+        query = query.where(EventoAlerta.id > apos).order_by(EventoAlerta.id)
+    else:
+        query = query.order_by(desc(EventoAlerta.id))   # sem cursor: os mais recentes
+    result = await db.execute(query)
+    return ORJSONResponse([dict(row._mapping) for row in result.all()])
+
+
+# --------------------- LIMITES --------------------- #
+@router.put("/alertas/limites")
+async def definir_limites(
+    dados: LimitesRequest,
+    db: AsyncSession = Depends(get_db),
+    token: dict = Depends(verificar_token),
+):
+    if token.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Apenas administradores podem alterar os limites de estoque")
+    if not dados.itens:
+        return {"status": "ok", "alertas": []}
+
+    limites = {item.item_id: item for item in dados.itens}
+    catalogo = (await db.execute(
+        select(CatalogoItem.id, CatalogoItem.tipo, CatalogoItem.tamanho).where(CatalogoItem.id.in_(sorted(limites)))
+    )).all()
+    faltando = sorted(set(limites) - {row.id for row in catalogo})
+    if faltando:
+        raise HTTPException(status_code=404, detail=f"Itens não encontrados no catálogo: {faltando}")
+
+    # Item do catálogo que nunca teve entrada ainda não tem linha em roupas
+    await db.execute(
+        insert_upsert(db, Roupa).on_conflict_do_nothing(index_elements=["item_id"]),
+        [{"item_id": item_id, "saldo": 0} for item_id in sorted(limites)],
+    )
+    # Mesma ordem de lock do /movimentar (item_id)
+    saldos = {}
+    for item_id in sorted(limites):
+        item = limites[item_id]
+        saldos[item_id] = await db.scalar(
+            update(Roupa).where(Roupa.item_id == item_id)
+            .values(estoque_minimo=item.estoque_minimo, estoque_alvo=item.estoque_alvo)
+            .returning(Roupa.saldo)
+        )
+
+    alertas = await reavaliar(
+        db, {item_id: (saldos[item_id], limites[item_id].estoque_minimo) for item_id in limites}, sem_minimo=True
+    )
+    await db.commit()
+    itens = {row.id: (row.tipo, row.tamanho) for row in catalogo}
+    await publicar_mudanca(db, (lambda versao: evento_saldo(versao, itens, {}, {}, alertas)) if alertas else None)
+    return {"status": "ok", "alertas": alertas}
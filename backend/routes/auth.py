@@ -9,7 +9,8 @@ import os
 from backend.core.config import settings
 from backend.database.connection import get_db
 from backend.models.usuario import Usuario
-from backend.core.security import verificar_senha
+from backend.core.admissao import ip_cliente
+from backend.core.security import verificar_senha_async
 
 router = APIRouter(tags=["Autenticação"])
 
@@ -28,7 +29,7 @@ async def login(response: Response, request: Request, form_data: OAuth2PasswordR
     result = await db.execute(select(Usuario).filter(Usuario.username == form_data.username))
     user = result.scalar_one_or_none()
 
-    if not user or not verificar_senha(form_data.password, user.hashed_password):
+    if not user or not await verificar_senha_async(form_data.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Usuário ou senha incorretos")
 
     access_token, exp_access = criar_token(
@@ -41,7 +42,7 @@ async def login(response: Response, request: Request, form_data: OAuth2PasswordR
         {
             "sub": user.username, 
             "role": user.role,
-            "ip": request.client.host,
+            "ip": ip_cliente(request),
             "agent": request.headers.get("user-agent", "unknown")
         },
         timedelta(hours=REFRESH_TOKEN_EXPIRE_HOURS),
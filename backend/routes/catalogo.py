@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from backend.core.security import verificar_token
+from backend.database.connection import get_db
+from backend.models.catalogo import CatalogoItem, filtro_item
+from backend.schemas.catalogo import CatalogoItemCreate, CatalogoItemUpdate, CatalogoItemResponse
+from backend.services.eventos import publicar_mudanca
+
+router = APIRouter(tags=["Catálogo"])
+
+
+def _somente_admin(token: dict):
+    if token.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Apenas administradores podem alterar o catálogo")
+
+
+# --------------------- LISTAR --------------------- #
+@router.get("/catalogo", response_model=list[CatalogoItemResponse])
+async def listar_catalogo(db: AsyncSession = Depends(get_db), token: dict = Depends(verificar_token)):
+    result = await db.execute(select(CatalogoItem).order_by(CatalogoItem.sort_key, CatalogoItem.id))
+    return result.scalars().all()
+
+
+# --------------------- CRIAR --------------------- #
+@router.post("/catalogo", response_model=CatalogoItemResponse)
+async def criar_item(
+    item: CatalogoItemCreate,
+    db: AsyncSession = Depends(get_db),
+    token: dict = Depends(verificar_token)
+):
+    _somente_admin(token)
+
+    query = select(CatalogoItem).where(filtro_item(item.tipo, item.tamanho))
+    if (await db.execute(query)).scalar_one_or_none():
+        raise HTTPException(status_code=400, detail="Item já existe no catálogo")
+
+    sort_key = item.sort_key
+    if sort_key is None:
+        sort_key = await db.scalar(select(func.coalesce(func.max(CatalogoItem.sort_key), 0) + 10))
+
+    novo = CatalogoItem(tipo=item.tipo, tamanho=item.tamanho, sort_key=sort_key, ativo=item.ativo)
+    db.add(novo)
+    await db.commit()
+    await publicar_mudanca(db)   # a lista do /saldo muda
+    await db.refresh(novo)
+    return novo
+
+
+# --------------------- ALTERAR ORDEM / ATIVO --------------------- #
+@router.patch("/catalogo/{item_id}", response_model=CatalogoItemResponse)
+async def alterar_item(
+    item_id: int,
+    dados: CatalogoItemUpdate,
+    db: AsyncSession = Depends(get_db),
+    token: dict = Depends(verificar_token)
+):
+    _somente_admin(token)
+
+    item = (await db.execute(select(CatalogoItem).where(CatalogoItem.id == item_id))).scalar_one_or_none()
+    if not item:
+        raise HTTPException(status_code=404, detail="Item não encontrado")
+
+    if dados.sort_key is not None:
+        item.sort_key = dados.sort_key
+    if dados.ativo is not None:
+        item.ativo = dados.ativo
+    await db.commit()
+    await publicar_mudanca(db)
+    await db.refresh(item)
+    return item
@@ -1,45 +1,110 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, extract, desc
-from backend.database.connection import get_db
-from backend.models.movimentacao import Movimentacao
+from backend.database.replica import get_read_db
+from backend.models.movimentacao import get_br_time
+from backend.models.movimentacao_diaria import MovimentacaoDiaria
+from backend.models.catalogo import CatalogoItem
 from backend.models.roupa import Roupa
 from backend.core.security import verificar_token
-from datetime import datetime, timedelta
+from backend.services.previsao import cache_previsao
+from datetime import date, timedelta
 
 router = APIRouter(tags=["Dashboard"])
 
-# 1. ROTA DE RESUMO (MANTIDA IGUAL)
+# As consultas daqui leem a tabela agregada movimentacao_diaria (uma linha por dia/item/ação),
+# então o custo depende da quantidade de itens e não do tamanho do histórico.
+# Ficam em funções para o verificador de planos (python -m backend.bench planos) usar as mesmas.
+
+def consulta_totais_mes(inicio, fim):
+    # Intervalo [início, fim) em "dia" -> usa índice (extract() não usaria)
+    return select(
+        MovimentacaoDiaria.acao,
+        func.sum(MovimentacaoDiaria.quantidade).label("total")
+    ).where(
+        MovimentacaoDiaria.dia >= inicio,
+        MovimentacaoDiaria.dia < fim,
+        MovimentacaoDiaria.acao.in_(["entrada", "saida"])
+    ).group_by(MovimentacaoDiaria.acao)
+
+
+def consulta_top_saidas(inicio, fim):
+    return select(
+        CatalogoItem.tipo,
+        CatalogoItem.tamanho,
+        func.sum(MovimentacaoDiaria.quantidade).label("total")
+    ).select_from(MovimentacaoDiaria).join(
+        CatalogoItem, CatalogoItem.id == MovimentacaoDiaria.item_id
+    ).where(
+        MovimentacaoDiaria.dia >= inicio,
+        MovimentacaoDiaria.dia < fim,
+        MovimentacaoDiaria.acao == "saida"
+    ).group_by(CatalogoItem.id, CatalogoItem.tipo, CatalogoItem.tamanho).order_by(desc("total")).limit(5)
+
+
+def consulta_encalhados(desde):
+    saidas = select(
+        MovimentacaoDiaria.item_id,
+        func.sum(MovimentacaoDiaria.quantidade).label("total")
+    ).where(
+        MovimentacaoDiaria.acao == 'saida',
+        MovimentacaoDiaria.dia >= desde
+    ).group_by(MovimentacaoDiaria.item_id).subquery()
+
+    return select(
+        CatalogoItem.tipo,
+        CatalogoItem.tamanho,
+        func.coalesce(saidas.c.total, 0).label("total_saidas"),
+        Roupa.saldo.label("estoque_atual")
+    ).select_from(Roupa).join(
+        CatalogoItem, CatalogoItem.id == Roupa.item_id
+    ).outerjoin(
+        saidas, saidas.c.item_id == Roupa.item_id
+    ).where(CatalogoItem.ativo.is_(True)).order_by("total_saidas", CatalogoItem.sort_key).limit(5)
+
+
+def consulta_semanal(desde):
+    por_semana = select(
+        MovimentacaoDiaria.item_id,
+        extract('week', MovimentacaoDiaria.dia).label("semana"),
+        func.sum(MovimentacaoDiaria.quantidade).label("qtd_semana")
+    ).where(
+        MovimentacaoDiaria.acao == 'saida',
+        MovimentacaoDiaria.dia >= desde
+    ).group_by(MovimentacaoDiaria.item_id, "semana").subquery()
+
+    return select(
+        CatalogoItem.tipo,
+        CatalogoItem.tamanho,
+        func.avg(por_semana.c.qtd_semana).label("media")
+    ).select_from(por_semana).join(
+        CatalogoItem, CatalogoItem.id == por_semana.c.item_id
+    ).group_by(
+        CatalogoItem.id, CatalogoItem.tipo, CatalogoItem.tamanho, CatalogoItem.sort_key
+    ).order_by(CatalogoItem.sort_key, CatalogoItem.id)
+
+
+# 1. ROTA DE RESUMO
 @router.get("/dashboard/resumo")
 async def get_resumo_mensal(
-    db: AsyncSession = Depends(get_db), 
+    db: AsyncSession = Depends(get_read_db), 
     token: dict = Depends(verificar_token)
 ):
-    hoje = datetime.now()
+    hoje = get_br_time().date()
     mes_atual = hoje.month
     ano_atual = hoje.year
 
-    async def get_total_by_acao(acao_tipo: str):
-        query = select(func.sum(Movimentacao.quantidade)).where(
-            extract('month', Movimentacao.data) == mes_atual,
-            extract('year', Movimentacao.data) == ano_atual,
-            Movimentacao.acao == acao_tipo
-        )
-        result = await db.execute(query)
-        return result.scalar() or 0
-
-    total_entradas = await get_total_by_acao("entrada")
-    total_saidas = await get_total_by_acao("saida")
-
-    query_top = select(
-        Movimentacao.tipo,
-        Movimentacao.tamanho,
-        func.sum(Movimentacao.quantidade).label("total")
-    ).where(
-        extract('month', Movimentacao.data) == mes_atual,
-        extract('year', Movimentacao.data) == ano_atual,
-        Movimentacao.acao == "saida"
-    ).group_by(Movimentacao.tipo, Movimentacao.tamanho).order_by(desc("total")).limit(5)
+    # Intervalo do mês [início, próximo mês) -> usa o índice em "dia" (extract() não usaria)
+    inicio_mes = date(ano_atual, mes_atual, 1)
+    proximo_mes = date(ano_atual + (mes_atual == 12), mes_atual % 12 + 1, 1)
+
+    query_totais = consulta_totais_mes(inicio_mes, proximo_mes)
+
+    totais = {row.acao: row.total for row in (await db.execute(query_totais)).all()}
+    total_entradas = totais.get("entrada") or 0
+    total_saidas = totais.get("saida") or 0
+
+    query_top = consulta_top_saidas(inicio_mes, proximo_mes)
 
     result_top = await db.execute(query_top)
     top_itens = [{"item": f"{row.tipo} {row.tamanho or ''}".strip(), "qtd": row.total} for row in result_top.all()]
@@ -55,25 +120,14 @@ async def get_resumo_mensal(
 # 2. ROTA DE PLANEJAMENTO (ATUALIZADA COM GRÁFICO EMPILHADO)
 @router.get("/dashboard/planejamento")
 async def get_dados_planejamento(
-    db: AsyncSession = Depends(get_db), 
+    db: AsyncSession = Depends(get_read_db), 
     token: dict = Depends(verificar_token)
 ):
-    hoje = datetime.now()
+    hoje = get_br_time().date()
     data_30_dias_atras = hoje - timedelta(days=30)
     
-    # 2.1 Itens Parados (Mantido)
-    query_encalhados = select(
-        Roupa.tipo,
-        Roupa.tamanho,
-        func.coalesce(func.sum(Movimentacao.quantidade), 0).label("total_saidas"),
-        Roupa.saldo.label("estoque_atual")
-    ).outerjoin(
-        Movimentacao, 
-        (Movimentacao.tipo == Roupa.tipo) & 
-        (Movimentacao.tamanho == Roupa.tamanho) & 
-        (Movimentacao.acao == 'saida') &
-        (Movimentacao.data >= data_30_dias_atras)
-    ).group_by(Roupa.tipo, Roupa.tamanho, Roupa.saldo).order_by("total_saidas").limit(5)
+    # 2.1 Itens Parados (junção por item_id inteiro, não mais por texto)
+    query_encalhados = consulta_encalhados(data_30_dias_atras)
     
     res_encalhados = await db.execute(query_encalhados)
     lista_encalhados = [
@@ -81,58 +135,25 @@ async def get_dados_planejamento(
         for row in res_encalhados.all()
     ]
 
-    # 2.2 PREVISÃO (Mantido simplificado)
-    # ... (Cálculo de dias de cobertura simplificado para focar no gráfico)
-    # Se quiser, mantenha a lógica anterior de Dias de Cobertura aqui.
-    
-    # 2.3 GRÁFICO DE CONSUMO POR TAMANHO (NOVA LÓGICA)
-    query_semanal = select(
-        Movimentacao.tipo,
-        Movimentacao.tamanho,
-        extract('week', Movimentacao.data).label("semana"),
-        func.sum(Movimentacao.quantidade).label("qtd_semana")
-    ).where(
-        Movimentacao.acao == 'saida',
-        Movimentacao.data >= data_30_dias_atras
-    ).group_by(Movimentacao.tipo, Movimentacao.tamanho, "semana")
-
-    res_semanal = await db.execute(query_semanal)
-    dados_semanais = res_semanal.all()
+    # 2.2 PREVISÃO: consumo diário (EWMA) e dias de cobertura de todos os itens (services/previsao.py)
+    previsao = await cache_previsao.obter(db)
 
-    # Processamento para estrutura Empilhada: { "name": "Macacão", "P": 10, "M": 20 }
-    temp_dados = {}
-    todos_tamanhos = set() # Guarda lista de tamanhos encontrados (P, M, G...)
+    # 2.3 GRÁFICO DE CONSUMO POR TAMANHO
+    # Média semanal por item calculada no banco (soma por semana -> média das semanas com saída).
+    # Já vem na ordem do catálogo (sort_key), então os tamanhos saem na ordem certa (PP, P, M...)
+    query_semanal = consulta_semanal(data_30_dias_atras)
 
-    for row in dados_semanais:
-        tipo = row.tipo
+    # Estrutura empilhada: { "name": "Macacão", "P": 10, "M": 20 } (dict mantém a ordem do banco)
+    grafico = {}
+    todos_tamanhos = {}
+    for row in (await db.execute(query_semanal)).all():
         tam = row.tamanho or "Padrão"
-        qtd = row.qtd_semana
-        
-        if tipo not in temp_dados: temp_dados[tipo] = {}
-        if tam not in temp_dados[tipo]: temp_dados[tipo][tam] = []
-        
-        temp_dados[tipo][tam].append(qtd)
-        todos_tamanhos.add(tam)
-
-    grafico_consumo = []
-    for tipo, tamanhos in temp_dados.items():
-        obj = {"name": tipo}
-        # Tira a média das semanas
-        for tam, lista_qtds in tamanhos.items():
-            media = sum(lista_qtds) / len(lista_qtds)
-            obj[tam] = round(media, 1)
-        grafico_consumo.append(obj)
-
-    # Ordena lista de tamanhos para ficar bonito no gráfico (PP, P, M...)
-    ordem_tamanhos = ["PP", "P", "M", "G", "GG", "G3", "G4", "Padrão"]
-    lista_tamanhos_ordenada = sorted(
-        list(todos_tamanhos), 
-        key=lambda t: ordem_tamanhos.index(t) if t in ordem_tamanhos else 999
-    )
+        grafico.setdefault(row.tipo, {"name": row.tipo})[tam] = round(float(row.media), 1)
+        todos_tamanhos[tam] = True
 
     return {
         "menos_movimentados": lista_encalhados,
-        "previsao_dias": [], # Simplifiquei aqui, mas pode manter o anterior se quiser
-        "grafico_consumo": grafico_consumo,
-        "lista_tamanhos": lista_tamanhos_ordenada
-    }
\ No newline at end of file
+        "previsao_dias": previsao,
+        "grafico_consumo": list(grafico.values()),
+        "lista_tamanhos": list(todos_tamanhos)
+    }
@@ -1,43 +1,154 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
 from backend.database.connection import get_db
+from backend.database.replica import get_read_db, fixar_primario
+from backend.models.catalogo import CatalogoItem
 from backend.models.roupa import Roupa
 from backend.models.movimentacao import Movimentacao
-from backend.core.security import verificar_token
+from backend.core.security import verificar_token, verificar_token_stream, criar_ticket_stream
+from backend.core.config import settings
+from backend.core.utils import gerar_etag, nao_modificado
 from datetime import datetime
+from typing import Optional, Literal
+import asyncio
+import json
 import uuid
 
 from backend.schemas.estoque import MovimentacaoRequest
+from backend.services.estoque import aplicar_movimentacoes
+from backend.services.importacao import importar_entradas
+from backend.services.exportacao import exportar_movimentacoes
+from backend.services.versao import versao_estoque
+from backend.services.eventos import broker, publicar_mudanca
+from backend.services.historico import FiltrosHistorico, filtros_historico, apos_cursor, codificar_cursor
+from backend.services.arquivo import arquivo_frio
+from backend.services.conciliacao import conciliar, tirar_snapshot
+from backend.services import idempotencia
 
 router = APIRouter(tags=["Estoque"])
 
+# Consultas de leitura montadas uma vez só (o SQLAlchemy reaproveita a compilação)
+# Ordem de exibição vem do catálogo (sort_key), ordenada pelo banco via índice
+SELECT_SALDO = (
+    select(CatalogoItem.tipo, CatalogoItem.tamanho, Roupa.saldo)
+    .select_from(Roupa)
+    .join(CatalogoItem, CatalogoItem.id == Roupa.item_id)
+    .where(CatalogoItem.ativo.is_(True))
+    .order_by(CatalogoItem.sort_key, CatalogoItem.id)
+)
+SELECT_HISTORICO = (
+    select(
+        Movimentacao.id,
+        Movimentacao.ordem_id,
+        Movimentacao.usuario,
+        CatalogoItem.tipo,
+        CatalogoItem.tamanho,
+        Movimentacao.quantidade,
+        Movimentacao.acao,
+        Movimentacao.data,
+    )
+    .join(CatalogoItem, CatalogoItem.id == Movimentacao.item_id)
+    .order_by(desc(Movimentacao.data), desc(Movimentacao.id))
+)
+
 # ------------------------------- SALDO -------------------------------- #
 @router.get("/saldo")
-async def get_saldo(db: AsyncSession = Depends(get_db), token: dict = Depends(verificar_token)):
-    # Busca assíncrona
-    result = await db.execute(select(Roupa))
-    roupas = result.scalars().all()
-
-    ordem_tipos = ["Macacão", "Botas", "Panos", "Óculos"]
-    ordem_tamanhos = ["PP", "P", "M", "G", "GG", "G3", "G4"]
-
-    # Ordenação continua via Python (não muda nada aqui)
-    roupas_ordenadas = sorted(
-        roupas,
-        key=lambda r: (
-            ordem_tipos.index(r.tipo) if r.tipo in ordem_tipos else 999,
-            ordem_tamanhos.index(r.tamanho) if r.tamanho in ordem_tamanhos else 999
-        )
+async def get_saldo(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    token: dict = Depends(verificar_token),
+):
+    # Nada mudou desde a última leitura do cliente? 304 sem consultar o estoque
+    etag = gerar_etag(await versao_estoque.atual(db), request)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if nao_modificado(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    # Só as colunas necessárias, como tuplas (sem ORM / identity map), já na ordem do catálogo
+    result = await db.execute(SELECT_SALDO)
+
+    # ORJSONResponse direto: pula o jsonable_encoder do FastAPI
+    return ORJSONResponse(
+        [{"tipo": tipo, "tamanho": tamanho, "saldo": saldo} for tipo, tamanho, saldo in result.all()],
+        headers=headers,
+    )
+
+
+# Ticket curto para abrir o /saldo/stream (o EventSource só consegue autenticar pela URL)
+@router.post("/saldo/ticket")
+async def ticket_stream(token: dict = Depends(verificar_token)):
+    return {"ticket": criar_ticket_stream(token), "expires_in": settings.STREAM_TICKET_SEGUNDOS}
+
+
+@router.get("/saldo/stream")
+async def stream_saldo(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    token: dict = Depends(verificar_token_stream),
+):
+    # Server-Sent Events: manda a versão atual e depois cada variação de saldo logo após o commit
+    versao = await versao_estoque.atual(db)
+    await db.close()   # não segura conexão do pool enquanto o cliente fica conectado
+    fila = broker.assinar()
+
+    async def eventos():
+        try:
+            yield f"event: versao\ndata: {json.dumps({'versao': versao})}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    evento = await asyncio.wait_for(fila.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"   # mantém a conexão viva em proxies
+                    continue
+                yield f"id: {evento.get('versao')}\nevent: saldo\ndata: {json.dumps(evento, ensure_ascii=False)}\n\n"
+        finally:
+            broker.cancelar(fila)
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    return [{"tipo": r.tipo, "tamanho": r.tamanho, "saldo": r.saldo} for r in roupas_ordenadas]
+
+# ----------------------------- CONCILIAÇÃO ------------------------------ #
+# Confere o saldo contra o histórico: último snapshot + movimentações posteriores (services/conciliacao.py)
+@router.get("/saldo/conciliacao")
+async def conciliar_saldo(
+    db: AsyncSession = Depends(get_db),
+    token: dict = Depends(verificar_token),
+):
+    if token.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Apenas administradores podem conciliar o estoque")
+    resultado = await conciliar(db)
+    if resultado is None:
+        raise HTTPException(status_code=409, detail="Nenhum snapshot de saldo ainda: crie um em POST /saldo/snapshots")
+    return ORJSONResponse({"status": "ok" if not resultado.divergencias else "divergente", **resultado.relatorio()})
+
+
+@router.post("/saldo/snapshots")
+async def criar_snapshot(
+    db: AsyncSession = Depends(get_db),
+    token: dict = Depends(verificar_token),
+):
+    if token.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Apenas administradores podem conciliar o estoque")
+    resultado = await tirar_snapshot(db)
+    return ORJSONResponse({"status": "ok" if not resultado.divergencias else "divergente", **resultado.relatorio()})
 
 
 # ----------------------------- MOVIMENTAR ------------------------------ #
+def nova_ordem_id() -> str:
+    return f"ORD-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:4]}"
+
+
 @router.post("/movimentar")
 async def movimentar(
     dados: MovimentacaoRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     db: AsyncSession = Depends(get_db),
     token: dict = Depends(verificar_token),
 ):
@@ -47,70 +158,128 @@ async def movimentar(
     if role != "admin":
         raise HTTPException(status_code=403, detail="Apenas administradores podem movimentar estoque")
 
-    mensagens = []
-    ordem_id = f"ORD-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:4]}"
-
-    for mov in dados.itens:
-        tipo = mov.tipo
-        tamanho = mov.tamanho
-        quantidade = int(mov.quantidade)
-        acao = mov.acao
-
-        # Busca Assíncrona (Substitui o db.query)
-        query = select(Roupa).filter_by(tipo=tipo, tamanho=tamanho)
-        result = await db.execute(query)
-        roupa = result.scalar_one_or_none()
-
-        if acao == "entrada":
-            if roupa:
-                roupa.saldo += quantidade
-            else:
-                roupa = Roupa(tipo=tipo, tamanho=tamanho, saldo=quantidade)
-                db.add(roupa)
-            mensagens.append(f"Entrada de {quantidade} {tipo} {tamanho or ''}".strip())
-
-        elif acao == "saida":
-            if not roupa:
-                mensagens.append(f"Erro: {tipo} {tamanho or ''} não encontrado")
-                continue
-            if roupa.saldo < quantidade:
-                mensagens.append(f"Erro: saldo insuficiente para {tipo} {tamanho or ''}")
-                continue
-            roupa.saldo -= quantidade
-            mensagens.append(f"Saída de {quantidade} {tipo} {tamanho or ''}".strip())
-
-        registro = Movimentacao(
-            ordem_id=ordem_id,
-            usuario=usuario,
-            tipo=mov.tipo,
-            tamanho=tamanho,
-            quantidade=quantidade,
-            acao=mov.acao,
-        )
-        db.add(registro)
-
-    # Commit assíncrono
+    # Mesma Idempotency-Key (duplo clique, reenvio do interceptor após o refresh do token):
+    # devolve a resposta da primeira vez sem movimentar de novo
+    if idempotency_key:
+        hash_ = idempotencia.hash_requisicao(dados.model_dump(mode="json"))
+        anterior = await idempotencia.reservar(db, usuario, idempotency_key, hash_)
+        if anterior is not None:
+            await db.rollback()
+            response.headers["Idempotent-Replayed"] = "true"
+            return anterior
+
+    ordem_id = nova_ordem_id()
+
+    # Tudo em lote: 1 SELECT ... FOR UPDATE + INSERT/UPDATE em massa (ver services/estoque.py)
+    resultado = await aplicar_movimentacoes(db, dados.itens, usuario, ordem_id)
+    resposta = {"status": "ok", "ordem_id": ordem_id, "mensagem": resultado.mensagens}
+    if idempotency_key:
+        await idempotencia.gravar_resposta(db, usuario, idempotency_key, resposta)
+
+    # Commit assíncrono (movimentação e chave de idempotência juntas)
+    await db.commit()
+    if resultado.registros:
+        # Versão + evento do /saldo/stream numa transação curta, fora da que travou as roupas
+        resultado.versao = await publicar_mudanca(db, resultado.evento)
+    if resultado.versao is not None:
+        fixar_primario(response, resultado.versao)   # read-your-writes com a réplica
+    return resposta
+
+
+# Recebimento em planilha: corpo = CSV (tipo;tamanho;quantidade), lido em streaming
+@router.post("/movimentar/importar")
+async def importar_movimentacoes(
+    request: Request,
+    parcial: bool = Query(False),   # True: importa as linhas válidas mesmo com erros em outras
+    db: AsyncSession = Depends(get_db),
+    token: dict = Depends(verificar_token),
+):
+    usuario = token.get("sub")
+    if token.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Apenas administradores podem movimentar estoque")
+
+    ordem_id = nova_ordem_id()
+    resultado = await importar_entradas(db, request.stream(), usuario, ordem_id, parcial)
+    if not resultado.importadas:
+        # Nada gravado (arquivo com erro sem ?parcial=true, ou sem linhas válidas)
+        await db.rollback()
+        if resultado.erros_total:
+            return ORJSONResponse({"status": "erro", "ordem_id": None, **resultado.relatorio()}, status_code=422)
+        return ORJSONResponse({"status": "ok", "ordem_id": None, **resultado.relatorio()})
+
     await db.commit()
-    return {"status": "ok", "ordem_id": ordem_id, "mensagem": mensagens}
+    resultado.versao = await publicar_mudanca(db, resultado.evento)
+    resposta = ORJSONResponse({"status": "ok", "ordem_id": ordem_id, **resultado.relatorio()})
+    fixar_primario(resposta, resultado.versao)
+    return resposta
 
 
 # ----------------------------- HISTÓRICO ------------------------------ #
 @router.get("/historico")
-async def get_historico(db: AsyncSession = Depends(get_db), token: dict = Depends(verificar_token)):
-    # Select Async com Ordenação e Limite
-    query = select(Movimentacao).order_by(desc(Movimentacao.data)).limit(200)
+async def get_historico(
+    request: Request,
+    filtros: FiltrosHistorico = Depends(filtros_historico),
+    cursor: Optional[str] = Query(None),
+    limite: int = Query(200, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+    token: dict = Depends(verificar_token),
+):
+    etag = gerar_etag(await versao_estoque.atual(db), request)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if nao_modificado(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    # Paginação por cursor (keyset) em (data, id): usa o índice e não precisa de OFFSET
+    query = apos_cursor(filtros.aplicar(SELECT_HISTORICO), cursor).limit(limite + 1)
     result = await db.execute(query)
-    logs = result.scalars().all()
-    
-    return [
-        {
-            "ordem_id": l.ordem_id,
-            "usuario": l.usuario,
-            "tipo": l.tipo,
-            "tamanho": l.tamanho,
-            "quantidade": l.quantidade,
-            "acao": l.acao,
-            "data": l.data.isoformat() if l.data else None,
-        }
-        for l in logs
-    ]
\ No newline at end of file
+    logs = result.all()
+
+    # Acabou o que está no banco e o período pedido volta até o arquivo frio: completa de lá
+    # (tudo que foi arquivado é mais antigo que qualquer linha que ficou no banco)
+    if len(logs) <= limite and arquivo_frio.alcanca(filtros):
+        logs += await arquivo_frio.pagina(filtros, cursor, limite + 1 - len(logs))
+
+    # Veio uma linha a mais? Então existe próxima página
+    if len(logs) > limite:
+        logs = logs[:limite]
+        headers["X-Proximo-Cursor"] = codificar_cursor(logs[-1].data, logs[-1].id)
+
+    # O orjson já serializa datetime em ISO 8601 (mesmo formato do isoformat())
+    return ORJSONResponse(
+        [
+            {
+                "ordem_id": ordem_id,
+                "usuario": usuario,
+                "tipo": tipo,
+                "tamanho": tamanho,
+                "quantidade": quantidade,
+                "acao": acao,
+                "data": data,
+            }
+            for _, ordem_id, usuario, tipo, tamanho, quantidade, acao, data in logs
+        ],
+        headers=headers,
+    )
+
+
+# ----------------------------- EXPORTAÇÃO ------------------------------ #
+@router.get("/historico/exportar")
+async def exportar_historico(
+    formato: Literal["csv", "ndjson"] = Query("csv"),
+    gzip: bool = Query(False),
+    filtros: FiltrosHistorico = Depends(filtros_historico),
+    token: dict = Depends(verificar_token),
+):
+    # Exporta o histórico completo em streaming (memória constante, seja 1 mil ou 10 milhões de linhas)
+    extensao = "csv" if formato == "csv" else "ndjson"
+    media_type = "text/csv; charset=utf-8" if formato == "csv" else "application/x-ndjson"
+    nome = f"movimentacoes-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extensao}"
+    if gzip:
+        media_type = "application/gzip"
+        nome += ".gz"
+
+    return StreamingResponse(
+        exportar_movimentacoes(filtros, formato, compactar=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nome}"'},
+    )
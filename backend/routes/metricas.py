@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from backend.core.config import settings
+from backend.core.metricas import formato_prometheus
+from backend.core.admissao import estatisticas_admissao
+from backend.core.security import verificar_token, cache_tokens
+from backend.database.connection import engine
+from backend.database.particoes import estatisticas_particoes
+from backend.database.pool import resumo_pool
+from backend.database.replica import replica
+from backend.services import conciliacao
+
+router = APIRouter(tags=["Métricas"])
+
+# /metrics fica fora do prefixo /api, no caminho que o Prometheus procura por padrão
+router_prometheus = APIRouter(tags=["Métricas"])
+
+
+# --------------------------- POOL DE CONEXÕES --------------------------- #
+@router.get("/metricas/pool")
+async def metricas_pool(token: dict = Depends(verificar_token)):
+    if token.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Apenas administradores podem ver as métricas")
+    return resumo_pool(engine.pool)
+
+
+# --------------------------- RÉPLICA DE LEITURA --------------------------- #
+@router.get("/metricas/replica")
+async def metricas_replica(token: dict = Depends(verificar_token)):
+    if token.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Apenas administradores podem ver as métricas")
+    return replica.resumo()
+
+
+# ------------------------------ PROMETHEUS ------------------------------ #
+@router_prometheus.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    # Com METRICAS_TOKEN o scraper precisa mandar "Authorization: Bearer <token>" (sem ele a rota
+    # só é montada com SQLite, ver main.py)
+    if settings.METRICAS_TOKEN and request.headers.get("authorization") != f"Bearer {settings.METRICAS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Não autorizado")
+
+    pool = resumo_pool(engine.pool)
+    tokens = cache_tokens.estatisticas()
+    rep = replica.resumo()
+    extras = {
+        "sicro_db_pool_size": pool["tamanho"],
+        "sicro_db_pool_checked_out": pool["em_uso"],
+        "sicro_db_pool_overflow": pool["overflow"],
+        "sicro_db_pool_checkouts_total": pool["checkouts"],
+        "sicro_db_pool_wait_seconds_max": pool["espera_max_ms"] / 1000,
+        "sicro_db_pool_timeouts_total": pool["timeouts"],
+        "sicro_db_pool_connect_failures_total": pool["falhas_conexao"],
+        "sicro_auth_token_cache_hits_total": tokens["acertos"],
+        "sicro_auth_token_cache_misses_total": tokens["falhas"],
+        "sicro_admission_admitted_total": estatisticas_admissao.admitidas,
+        "sicro_admission_rate_limited_total": estatisticas_admissao.limitadas,
+        "sicro_admission_rejected_pool_total": estatisticas_admissao.recusadas_pool,
+        "sicro_admission_rejected_queue_total": estatisticas_admissao.recusadas_fila,
+        "sicro_db_partitions_blocked": len(estatisticas_particoes.bloqueadas),
+        "sicro_db_partition_rows_moved_total": estatisticas_particoes.realocadas,
+        "sicro_stock_drift_items": len(conciliacao.ultima_conciliacao.divergencias) if conciliacao.ultima_conciliacao else 0,
+        "sicro_db_replica_available": int(rep["disponivel"]),
+        "sicro_db_replica_lag_seconds": rep["atraso_segundos"],
+        "sicro_db_replica_reads_total": rep["leituras"],
+        "sicro_db_replica_fallbacks_total": rep["desvios_primario"],
+    }
+    return PlainTextResponse(formato_prometheus(extras), media_type="text/plain; version=0.0.4")
@@ -1,19 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from backend.models.usuario import Usuario
-from backend.core.security import gerar_hash_senha, verificar_token
+from backend.core.security import gerar_hash_senha_async, verificar_token
 from backend.database.connection import get_db
 from backend.schemas.usuario import UsuarioCreate, UsuarioResponse
 
 router = APIRouter(tags=["Usuários"])
 
+SELECT_USUARIOS = select(Usuario.id, Usuario.username, Usuario.role)
+
 # --------------------- LISTAR (Já estava async, mantive) --------------------- #
 @router.get("/usuarios")
 async def listar_usuarios(db: AsyncSession = Depends(get_db), token: dict = Depends(verificar_token)):
-    result = await db.execute(select(Usuario))
-    usuarios = result.scalars().all()
-    return [{"id": u.id, "username": u.username, "role": u.role} for u in usuarios]
+    # Só as colunas públicas, sem carregar o hash da senha nem passar pelo ORM
+    result = await db.execute(SELECT_USUARIOS)
+    return ORJSONResponse([{"id": id, "username": username, "role": role} for id, username, role in result.all()])
 
 
 # --------------------- CRIAR (Convertido para Async) --------------------- #
@@ -31,7 +34,7 @@ async def criar_usuario(
 
     novo_usuario = Usuario(
         username=usuario.username,
-        hashed_password=gerar_hash_senha(usuario.senha),
+        hashed_password=await gerar_hash_senha_async(usuario.senha),
         role=usuario.role
     )
     db.add(novo_usuario) # db.add não precisa de await
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, model_validator
+from typing import List, Optional
+
+class LimiteEstoque(BaseModel):
+    item_id: int
+    estoque_minimo: Optional[int] = None   # vazio = item sem alerta
+    estoque_alvo: Optional[int] = None
+
+    @model_validator(mode="after")
+    def validar(self):
+        if self.estoque_minimo is not None and self.estoque_minimo < 0:
+            raise ValueError("estoque_minimo não pode ser negativo")
+        if self.estoque_alvo is not None and self.estoque_minimo is not None and self.estoque_alvo < self.estoque_minimo:
+            raise ValueError("estoque_alvo deve ser maior ou igual ao estoque_minimo")
+        return self
+
+class LimitesRequest(BaseModel):
+    itens: List[LimiteEstoque]
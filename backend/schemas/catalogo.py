@@ -0,0 +1,28 @@
+from pydantic import BaseModel, field_validator
+from typing import Optional
+from backend.models.catalogo import normalizar_tamanho
+
+class CatalogoItemCreate(BaseModel):
+    tipo: str
+    tamanho: Optional[str] = None   # "" vira None (o mesmo item no catálogo)
+    sort_key: Optional[int] = None   # vazio = vai para o fim da lista
+    ativo: bool = True
+
+    @field_validator("tamanho")
+    @classmethod
+    def validar_tamanho(cls, tamanho):
+        return normalizar_tamanho(tamanho)
+
+class CatalogoItemUpdate(BaseModel):
+    sort_key: Optional[int] = None
+    ativo: Optional[bool] = None
+
+class CatalogoItemResponse(BaseModel):
+    id: int
+    tipo: str
+    tamanho: Optional[str] = None
+    sort_key: int
+    ativo: bool
+
+    class Config:
+        from_attributes = True
@@ -1,11 +1,17 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import List, Optional
+from backend.models.catalogo import normalizar_tamanho
 
 class ItemMovimentacao(BaseModel):
     tipo: str
-    tamanho: Optional[str] = None
+    tamanho: Optional[str] = None   # "" vira None (o mesmo item no catálogo)
     quantidade: int
     acao: str # "entrada" ou "saida"
 
+    @field_validator("tamanho")
+    @classmethod
+    def validar_tamanho(cls, tamanho):
+        return normalizar_tamanho(tamanho)
+
 class MovimentacaoRequest(BaseModel):
     itens: List[ItemMovimentacao]
\ No newline at end of file
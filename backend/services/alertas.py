@@ -0,0 +1,87 @@
+import math
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core.config import settings
+from backend.database.dialeto import insert_upsert
+from backend.models.alerta import AlertaEstoque, EventoAlerta
+from backend.models.movimentacao import get_br_time
+from backend.models.roupa import Roupa
+
+# Alertas de estoque baixo, avaliados só para os itens que cada ordem mexeu (na mesma transação,
+# com as linhas de roupas já travadas). O estado fica em alertas_estoque e cada mudança vira
+# uma linha em eventos_alerta, então o /alertas nunca precisa varrer o estoque.
+#   ruptura  saldo <= 0
+#   baixo    saldo <= estoque_minimo
+#   ok       saldo > estoque_minimo + margem   (histerese: entre o mínimo e a margem o estado não muda)
+
+OK = "ok"
+BAIXO = "baixo"
+RUPTURA = "ruptura"
+
+
+def margem(minimo: int) -> int:
+    return max(1, math.ceil(minimo * settings.ALERTA_HISTERESE_PCT / 100))
+
+
+def avaliar(anterior: str, saldo: int, minimo) -> str:
+    """Novo estado do alerta de um item. Sem estoque mínimo definido o item nunca alerta."""
+    if minimo is None:
+        return OK
+    if saldo <= 0:
+        return RUPTURA
+    if saldo <= minimo:
+        return BAIXO
+    if anterior != OK and saldo <= minimo + margem(minimo):
+        return BAIXO    # ainda dentro da faixa: não volta para "ok" por uma peça
+    return OK
+
+
+async def reavaliar(db: AsyncSession, itens: dict, ordem_id: str = None, sem_minimo: bool = False) -> list:
+    """
+    itens: item_id -> (saldo, estoque_minimo) dos itens que mudaram.
+    Grava as mudanças de estado e devolve as transições (para o evento do /saldo/stream).
+    Itens sem mínimo são ignorados, a não ser com `sem_minimo` (limite removido: fecha o alerta).
+    """
+    if not sem_minimo:
+        itens = {item_id: v for item_id, v in itens.items() if v[1] is not None}
+    if not itens:
+        return []
+
+    result = await db.execute(
+        select(AlertaEstoque.item_id, AlertaEstoque.estado).where(AlertaEstoque.item_id.in_(sorted(itens)))
+    )
+    estados = dict(result.all())
+
+    agora = get_br_time()
+    transicoes = []
+    for item_id in sorted(itens):
+        saldo, minimo = itens[item_id]
+        anterior = estados.get(item_id, OK)
+        novo = avaliar(anterior, saldo or 0, minimo)
+        if novo != anterior:
+            transicoes.append({
+                "item_id": item_id,
+                "anterior": anterior,
+                "estado": novo,
+                "saldo": saldo or 0,
+                "estoque_minimo": minimo,
+            })
+    if not transicoes:
+        return []
+
+    stmt = insert_upsert(db, AlertaEstoque)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["item_id"],
+        set_={"estado": stmt.excluded.estado, "desde": stmt.excluded.desde},
+    )
+    await db.execute(stmt, [{"item_id": t["item_id"], "estado": t["estado"], "desde": agora} for t in transicoes])
+    await db.execute(insert(EventoAlerta), [{**t, "ordem_id": ordem_id, "data": agora} for t in transicoes])
+    return transicoes
+
+
+async def recalcular_alertas(db: AsyncSession) -> list:
+    """Reavalia todos os itens (depois de correção manual de saldo). O commit fica com quem chamou."""
+    result = await db.execute(
+        select(Roupa.item_id, Roupa.saldo, Roupa.estoque_minimo).order_by(Roupa.item_id).with_for_update()
+    )
+    return await reavaliar(db, {r.item_id: (r.saldo, r.estoque_minimo) for r in result.all()}, sem_minimo=True)
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from jose import jwt
+from sqlalchemy import select, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from backend.core.config import settings
+from backend.core.security import aquecer_senhas
+from backend.database.connection import AsyncSessionLocal, engine
+from backend.database.replica import replica
+from backend.models.estoque_versao import EstoqueVersao
+from backend.models.movimentacao import get_br_time
+from backend.models.usuario import Usuario
+from backend.routes.alertas import SELECT_ALERTAS
+from backend.routes.dashboard.entradas import (
+    consulta_totais_mes, consulta_top_saidas, consulta_encalhados, consulta_semanal,
+)
+from backend.routes.estoque import SELECT_SALDO, SELECT_HISTORICO
+from backend.services.arquivo import arquivo_frio
+from backend.services.previsao import SELECT_ITENS, consulta_saidas, cache_previsao
+from backend.services.versao import versao_estoque
+
+# Aquecimento da subida (o Render dorme e acorda a frio): em vez de o primeiro usuário pagar
+# TLS com o Neon, introspecção de tipos do asyncpg, compilação das consultas pelo SQLAlchemy e
+# prepare de cada statement, isso tudo acontece aqui, antes do /pronto responder 200.
+#   1. conexões: abre AQUECIMENTO_CONEXOES do pool ao mesmo tempo e valida cada uma
+#   2. consultas: roda os selects quentes em cada conexão aberta (compila uma vez; o prepared
+#      statement do asyncpg é por conexão)
+#   3. caches: versão do estoque, previsão do planejamento, manifesto do arquivo frio, bcrypt e JWT
+
+ESPERA_MAXIMA = 30.0    # segundos entre tentativas, no máximo
+
+logger = logging.getLogger(__name__)
+
+
+def consultas_quentes() -> list:
+    """Os selects das rotas mais chamadas, com a mesma forma (e portanto o mesmo SQL) da rota."""
+    hoje = get_br_time().date()
+    inicio_mes = hoje.replace(day=1)
+    proximo_mes = (inicio_mes + timedelta(days=32)).replace(day=1)
+    return [
+        select(EstoqueVersao.versao).where(EstoqueVersao.id == 1),
+        SELECT_SALDO,
+        SELECT_HISTORICO.limit(201),
+        consulta_totais_mes(inicio_mes, proximo_mes),
+        consulta_top_saidas(inicio_mes, proximo_mes),
+        consulta_encalhados(hoje - timedelta(days=30)),
+        consulta_semanal(hoje - timedelta(days=30)),
+        SELECT_ITENS,
+        consulta_saidas(hoje),
+        SELECT_ALERTAS,
+        select(Usuario).filter(Usuario.username == ""),
+    ]
+
+
+class Aquecimento:
+    """Estado do aquecimento, lido pelo /pronto."""
+
+    def __init__(self):
+        self.estado = "pendente"     # pendente / aquecendo / pronto / incompleto (desistiu, ver erro)
+        self.etapas = {}             # etapa -> ms
+        self.erro = None
+        self.tentativas = 0
+        self.duracao_ms = None
+
+    @property
+    def pronto(self) -> bool:
+        # Incompleto também atende: sem aquecimento só a primeira requisição paga a partida a frio
+        return self.estado in ("pronto", "incompleto")
+
+    async def _etapa(self, nome: str, coro):
+        inicio = time.perf_counter()
+        resultado = await coro
+        self.etapas[nome] = round((time.perf_counter() - inicio) * 1000, 1)
+        return resultado
+
+    async def _conexoes(self, engine_alvo, consultas: list) -> int:
+        # SQLite em memória (StaticPool) tem uma conexão só
+        n = min(settings.AQUECIMENTO_CONEXOES, settings.DB_POOL_SIZE)
+        if not isinstance(engine_alvo.pool, AsyncAdaptedQueuePool):
+            n = 1
+
+        async def preparar(conn):
+            await conn.execute(text("SELECT 1"))
+            for consulta in consultas:
+                await conn.execute(consulta)
+
+        # Todas abertas ao mesmo tempo (handshakes em paralelo): cada uma é uma conexão diferente
+        # do pool, que volta para ele aquecida
+        abertas = await asyncio.gather(*(engine_alvo.connect().start() for _ in range(n)), return_exceptions=True)
+        conexoes = [c for c in abertas if not isinstance(c, BaseException)]
+        try:
+            for c in abertas:
+                if isinstance(c, BaseException):
+                    raise c
+            await asyncio.gather(*(preparar(c) for c in conexoes))
+        finally:
+            for conn in conexoes:
+                await conn.close()
+        return n
+
+    async def _caches(self):
+        async with AsyncSessionLocal() as db:
+            await versao_estoque.atual(db)
+            await cache_previsao.obter(db)
+        await asyncio.to_thread(arquivo_frio.segmentos)
+
+    async def _auth(self):
+        token = jwt.encode({"sub": "aquecimento"}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        await aquecer_senhas()
+
+    async def _executar(self):
+        consultas = consultas_quentes()
+        await self._etapa("primario", self._conexoes(engine, consultas))
+        if replica.engine is not None:
+            await replica.verificar()
+            if replica.disponivel:
+                await self._etapa("replica", self._conexoes(replica.engine, consultas))
+        await self._etapa("caches", self._caches())
+        await self._etapa("auth", self._auth())
+
+    async def executar(self):
+        if not settings.AQUECIMENTO:
+            self.estado = "pronto"
+            return
+        self.estado = "aquecendo"
+        inicio = time.perf_counter()
+        espera = settings.AQUECIMENTO_ESPERA_SEGUNDOS
+        for tentativa in range(1, settings.AQUECIMENTO_TENTATIVAS + 1):
+            self.tentativas = tentativa
+            try:
+                await asyncio.wait_for(self._executar(), timeout=settings.AQUECIMENTO_TIMEOUT)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Um soluço do banco na subida não pode deixar a instância fora do balanceador para sempre
+                self.erro = f"{type(e).__name__}: {e}"
+                logger.warning("Aquecimento falhou (tentativa %s de %s): %s",
+                               tentativa, settings.AQUECIMENTO_TENTATIVAS, self.erro)
+                if tentativa < settings.AQUECIMENTO_TENTATIVAS:
+                    await asyncio.sleep(espera)
+                    espera = min(espera * 2, ESPERA_MAXIMA)
+            else:
+                self.erro = None
+                break
+        self.estado = "pronto" if self.erro is None else "incompleto"
+        self.duracao_ms = round((time.perf_counter() - inicio) * 1000, 1)
+        logger.info("Aquecimento %s em %s ms: %s", self.estado, self.duracao_ms, self.etapas)
+
+    def resumo(self) -> dict:
+        return {
+            "estado": self.estado, "duracao_ms": self.duracao_ms, "tentativas": self.tentativas,
+            "etapas": self.etapas, "erro": self.erro,
+        }
+
+
+aquecimento = Aquecimento()
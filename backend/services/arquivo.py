@@ -0,0 +1,323 @@
+import asyncio
+import bisect
+import hashlib
+import os
+import struct
+import threading
+import zlib
+from collections import namedtuple
+from datetime import date, datetime, timezone
+from typing import Optional
+import orjson
+from sqlalchemy import select, delete, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core.config import settings
+from backend.database.particoes import particionada, nome_particao
+from backend.models.catalogo import CatalogoItem
+from backend.models.movimentacao import Movimentacao, get_br_time
+from backend.services.historico import FiltrosHistorico, FUSO_BR, decodificar_cursor
+
+# Arquivo frio do histórico: movimentações antigas saem do banco para um segmento por mês
+# em ARQUIVO_DIR, mais um manifesto.json com o período e a contagem de cada segmento.
+#
+# Segmento (colunar): MAGICO | tamanho do cabeçalho (uint32) | cabeçalho JSON | blocos
+# Cada coluna é um bloco separado (lista JSON comprimida com zlib); o cabeçalho guarda
+# offset e tamanho de cada bloco. tipo/tamanho vão junto, para o arquivo não depender
+# do catálogo de hoje.
+
+MAGICO = b"SICROSEG1\n"
+MANIFESTO = "manifesto.json"
+COLUNAS = ["id", "ordem_id", "usuario", "item_id", "tipo", "tamanho", "quantidade", "acao", "data"]
+SEGMENTOS_EM_CACHE = 4
+
+# Mesma ordem de colunas do SELECT_HISTORICO / SELECT_EXPORTACAO
+LinhaArquivo = namedtuple("LinhaArquivo", ["id", "ordem_id", "usuario", "tipo", "tamanho", "quantidade", "acao", "data"])
+
+
+def _proximo_mes(dia: date) -> date:
+    return date(dia.year + (dia.month == 12), dia.month % 12 + 1, 1)
+
+
+def _inicio_mes(dia: date) -> datetime:
+    return datetime(dia.year, dia.month, 1, tzinfo=FUSO_BR)
+
+
+def _micros(data: datetime) -> int:
+    if data.tzinfo is None:    # SQLite devolve sem fuso: horário de Brasília, como no resto da API
+        data = data.replace(tzinfo=FUSO_BR)
+    return int(data.timestamp() * 1_000_000)
+
+
+def _de_micros(valor: int) -> datetime:
+    return datetime.fromtimestamp(valor / 1_000_000, tz=timezone.utc).astimezone(FUSO_BR)
+
+
+# ----------------------------- SEGMENTOS ------------------------------ #
+
+def _escrever_arquivo(caminho: str, conteudo: bytes):
+    # Grava em .tmp e troca com os.replace: quem estiver lendo vê o antigo ou o novo, nunca pela metade
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as f:
+        f.write(conteudo)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+def codificar_segmento(colunas: dict) -> bytes:
+    blocos = []
+    indice = {}
+    offset = 0
+    for nome in COLUNAS:
+        bloco = zlib.compress(orjson.dumps(colunas[nome]), 9)
+        indice[nome] = [offset, len(bloco)]
+        offset += len(bloco)
+        blocos.append(bloco)
+    cabecalho = orjson.dumps({"linhas": len(colunas["id"]), "colunas": indice})
+    return MAGICO + struct.pack(">I", len(cabecalho)) + cabecalho + b"".join(blocos)
+
+
+class Segmento:
+    """Segmento aberto: o cabeçalho é lido na hora, cada coluna só é descomprimida quando pedida."""
+
+    def __init__(self, conteudo: bytes):
+        if not conteudo.startswith(MAGICO):
+            raise ValueError("Segmento de arquivo inválido")
+        inicio = len(MAGICO)
+        (tamanho,) = struct.unpack(">I", conteudo[inicio:inicio + 4])
+        cabecalho = orjson.loads(conteudo[inicio + 4:inicio + 4 + tamanho])
+        self.linhas = cabecalho["linhas"]
+        self._blocos = cabecalho["colunas"]
+        self._base = inicio + 4 + tamanho
+        self._conteudo = conteudo
+        self._colunas = {}
+
+    def coluna(self, nome: str) -> list:
+        valores = self._colunas.get(nome)
+        if valores is None:
+            # Duas threads podem descomprimir a mesma coluna ao mesmo tempo: dá o mesmo resultado
+            offset, comprimento = self._blocos[nome]
+            inicio = self._base + offset
+            valores = self._colunas[nome] = orjson.loads(zlib.decompress(self._conteudo[inicio:inicio + comprimento]))
+        return valores
+
+
+def decodificar_segmento(conteudo: bytes) -> dict:
+    segmento = Segmento(conteudo)
+    return {nome: segmento.coluna(nome) for nome in COLUNAS}
+
+
+class ArquivoFrio:
+    """Segmentos mensais + manifesto num diretório local."""
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self._manifesto = None
+        self._manifesto_mtime = None
+        self._cache = {}    # (arquivo, mtime) -> colunas decodificadas (poucos, os mais recentes)
+        self._lock = threading.Lock()   # leituras rodam em threads (asyncio.to_thread)
+
+    def _caminho(self, nome: str) -> str:
+        return os.path.join(self.diretorio, nome)
+
+    def segmentos(self) -> list:
+        """Entradas do manifesto, ordenadas por mês (relido só quando o arquivo muda)."""
+        caminho = self._caminho(MANIFESTO)
+        try:
+            mtime = os.stat(caminho).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if mtime != self._manifesto_mtime:
+            with open(caminho, "rb") as f:
+                self._manifesto = sorted(orjson.loads(f.read())["segmentos"], key=lambda s: s["mes"])
+            self._manifesto_mtime = mtime
+        return self._manifesto
+
+    def limite(self) -> Optional[datetime]:
+        """Fim (exclusivo) do período arquivado; tudo antes disso está só nos segmentos."""
+        segmentos = self.segmentos()
+        return datetime.fromisoformat(segmentos[-1]["fim"]) if segmentos else None
+
+    def alcanca(self, filtros: FiltrosHistorico) -> bool:
+        """A consulta volta até o período arquivado?"""
+        limite = self.limite()
+        return limite is not None and (filtros.data_inicio is None or filtros.data_inicio < limite)
+
+    def _ler(self, segmento: dict) -> Segmento:
+        caminho = self._caminho(segmento["arquivo"])
+        chave = (segmento["arquivo"], os.stat(caminho).st_mtime_ns)
+        with self._lock:
+            if chave in self._cache:
+                return self._cache[chave]
+        with open(caminho, "rb") as f:
+            aberto = Segmento(f.read())
+        with self._lock:
+            if len(self._cache) >= SEGMENTOS_EM_CACHE:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[chave] = aberto
+        return aberto
+
+    def _indices(self, seg: Segmento, filtros: FiltrosHistorico, cursor) -> list:
+        """
+        Posições que passam nos filtros, em ordem crescente. Só descomprime as colunas filtradas:
+        o segmento está ordenado por (data, id), então período e cursor são uma busca binária em
+        "data"; cada filtro de texto lê a sua coluna, e só para o que sobrou dos anteriores.
+        """
+        datas = seg.coluna("data")
+        primeira = bisect.bisect_left(datas, _micros(filtros.data_inicio)) if filtros.data_inicio else 0
+        ultima = bisect.bisect_left(datas, _micros(filtros.data_fim)) if filtros.data_fim else seg.linhas
+        if cursor:
+            # Antes do cursor: data menor, ou a mesma data com id menor
+            data, id_ = _micros(cursor[0]), cursor[1]
+            fim = bisect.bisect_left(datas, data)
+            ids = seg.coluna("id")
+            while fim < seg.linhas and datas[fim] == data and ids[fim] < id_:
+                fim += 1
+            ultima = min(ultima, fim)
+        indices = range(primeira, max(primeira, ultima))
+
+        for campo in ("acao", "usuario", "tipo", "tamanho", "ordem_id"):
+            valor = getattr(filtros, campo)
+            if valor and indices:
+                coluna = seg.coluna(campo)
+                indices = [i for i in indices if coluna[i] == valor]
+        return indices
+
+    def _linhas(self, seg: Segmento, indices) -> list:
+        if not indices:
+            return []
+        c = {nome: seg.coluna(nome) for nome in LinhaArquivo._fields}
+        return [
+            LinhaArquivo(
+                c["id"][i], c["ordem_id"][i], c["usuario"][i], c["tipo"][i], c["tamanho"][i],
+                c["quantidade"][i], c["acao"][i], _de_micros(c["data"][i]),
+            )
+            for i in indices
+        ]
+
+    def _lotes_segmento(self, segmento: dict, filtros: FiltrosHistorico, tamanho: int):
+        seg = self._ler(segmento)
+        indices = self._indices(seg, filtros, None)
+        for i in range(0, len(indices), tamanho):
+            yield self._linhas(seg, indices[i:i + tamanho])
+
+    def _no_periodo(self, filtros: FiltrosHistorico, ate: Optional[datetime] = None) -> list:
+        fim_consulta = min(filter(None, [filtros.data_fim, ate]), default=None)
+        return [
+            s for s in self.segmentos()
+            if (filtros.data_inicio is None or datetime.fromisoformat(s["fim"]) > filtros.data_inicio)
+            and (fim_consulta is None or datetime.fromisoformat(s["inicio"]) <= fim_consulta)
+        ]
+
+    def _pagina(self, filtros: FiltrosHistorico, cursor: Optional[str], limite: int) -> list:
+        posicao = decodificar_cursor(cursor) if cursor else None
+        linhas = []
+        # Do mês mais novo para o mais antigo, já na ordem (data DESC, id DESC) do /historico
+        for segmento in reversed(self._no_periodo(filtros, posicao[0] if posicao else None)):
+            seg = self._ler(segmento)
+            indices = self._indices(seg, filtros, posicao)
+            linhas += self._linhas(seg, indices[::-1][:limite - len(linhas)])
+            if len(linhas) >= limite:
+                break
+        return linhas
+
+    async def pagina(self, filtros: FiltrosHistorico, cursor: Optional[str], limite: int) -> list:
+        """Até `limite` linhas arquivadas depois do cursor, mais novas primeiro."""
+        return await asyncio.to_thread(self._pagina, filtros, cursor, limite)
+
+    async def lotes(self, filtros: FiltrosHistorico, tamanho: int):
+        """Linhas arquivadas em ordem crescente (data, id), em listas de até `tamanho` (export)."""
+        for segmento in self._no_periodo(filtros):
+            # Cada lote é montado na thread: o mês nunca fica inteiro em memória como linhas
+            lotes = self._lotes_segmento(segmento, filtros, tamanho)
+            while (lote := await asyncio.to_thread(next, lotes, None)) is not None:
+                yield lote
+
+    def gravar_segmento(self, mes: date, linhas: list) -> dict:
+        """Grava (ou completa) o segmento do mês e atualiza o manifesto. Devolve a entrada do manifesto."""
+        os.makedirs(self.diretorio, exist_ok=True)
+        nome = f"{nome_particao(mes)}.seg"
+        atual = next((s for s in self.segmentos() if s["mes"] == mes.isoformat()[:7]), None)
+
+        # Rodar de novo é seguro: junta com o que já estava no segmento, sem repetir id
+        colunas = {c: [] for c in COLUNAS}
+        if atual:
+            seg = self._ler(atual)
+            colunas = {c: list(seg.coluna(c)) for c in COLUNAS}
+        vistos = set(colunas["id"])
+        novas = [l for l in linhas if l["id"] not in vistos]
+        for linha in novas:
+            for c in COLUNAS:
+                colunas[c].append(_micros(linha[c]) if c == "data" else linha[c])
+        ordem = sorted(range(len(colunas["id"])), key=lambda i: (colunas["data"][i], colunas["id"][i]))
+        colunas = {c: [v[i] for i in ordem] for c, v in colunas.items()}
+
+        conteudo = codificar_segmento(colunas)
+        _escrever_arquivo(self._caminho(nome), conteudo)
+
+        entrada = {
+            "mes": mes.isoformat()[:7],
+            "arquivo": nome,
+            "linhas": len(colunas["id"]),
+            "inicio": _inicio_mes(mes).isoformat(),
+            "fim": _inicio_mes(_proximo_mes(mes)).isoformat(),
+            "id_min": min(colunas["id"]),
+            "id_max": max(colunas["id"]),
+            "sha256": hashlib.sha256(conteudo).hexdigest(),
+        }
+        segmentos = [s for s in self.segmentos() if s["mes"] != entrada["mes"]] + [entrada]
+        _escrever_arquivo(
+            self._caminho(MANIFESTO),
+            orjson.dumps({"segmentos": sorted(segmentos, key=lambda s: s["mes"])}, option=orjson.OPT_INDENT_2),
+        )
+        return entrada
+
+
+arquivo_frio = ArquivoFrio(settings.ARQUIVO_DIR)
+
+
+# ----------------------------- JOB DE ARQUIVAMENTO ------------------------------ #
+
+async def arquivar(db: AsyncSession, horizonte_meses: int = None) -> list:
+    """
+    Move para o arquivo os meses inteiros mais antigos que o horizonte. Para cada mês:
+    grava o segmento, atualiza o manifesto e só então apaga do banco (partição inteira
+    com DROP no Postgres particionado). Se cair no meio, rodar de novo completa o serviço.
+    """
+    if horizonte_meses is None:
+        horizonte_meses = settings.ARQUIVO_HORIZONTE_MESES
+    hoje = get_br_time().date()
+    corte = date(hoje.year, hoje.month, 1)
+    for _ in range(horizonte_meses):
+        corte = date(corte.year - (corte.month == 1), (corte.month - 2) % 12 + 1, 1)
+
+    mais_antiga = await db.scalar(select(func.min(Movimentacao.data)).where(Movimentacao.data < _inicio_mes(corte)))
+    if mais_antiga is None:
+        return []
+
+    conexao = await db.connection()
+    partes = await particionada(conexao)
+    arquivados = []
+    mes = mais_antiga.astimezone(FUSO_BR).date().replace(day=1)
+    while mes < corte:
+        inicio, fim = _inicio_mes(mes), _inicio_mes(_proximo_mes(mes))
+        query = (
+            select(
+                Movimentacao.id, Movimentacao.ordem_id, Movimentacao.usuario, Movimentacao.item_id,
+                CatalogoItem.tipo, CatalogoItem.tamanho, Movimentacao.quantidade, Movimentacao.acao,
+                Movimentacao.data,
+            )
+            .join(CatalogoItem, CatalogoItem.id == Movimentacao.item_id)
+            .where(Movimentacao.data >= inicio, Movimentacao.data < fim)
+        )
+        linhas = [dict(r._mapping) for r in (await db.execute(query)).all()]
+        if linhas:
+            entrada = await asyncio.to_thread(arquivo_frio.gravar_segmento, mes, linhas)
+            if partes:
+                await db.execute(text(f"DROP TABLE IF EXISTS sicro.{nome_particao(mes)}"))
+            # Sem partição (ou o que caiu na movimentacoes_padrao): DELETE pelo período
+            await db.execute(delete(Movimentacao).where(Movimentacao.data >= inicio, Movimentacao.data < fim))
+            await db.commit()
+            arquivados.append(entrada)
+        mes = _proximo_mes(mes)
+    return arquivados
@@ -0,0 +1,43 @@
+from sqlalchemy import select, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database.dialeto import insert_upsert
+from backend.models.catalogo import CatalogoItem, filtro_item, normalizar_tamanho
+
+
+def _filtro_chaves(chaves):
+    return or_(*[filtro_item(tipo, tamanho) for tipo, tamanho in chaves])
+
+
+async def _buscar(db: AsyncSession, chaves) -> dict:
+    result = await db.execute(select(CatalogoItem.id, CatalogoItem.tipo, CatalogoItem.tamanho).where(_filtro_chaves(chaves)))
+    return {(row.tipo, normalizar_tamanho(row.tamanho)): row.id for row in result.all()}
+
+
+async def resolver_itens(db: AsyncSession, chaves: set, criar: set = frozenset()) -> dict:
+    """
+    (tipo, tamanho) -> id do catálogo.
+    Itens em `criar` que ainda não existem são cadastrados no fim da ordem de exibição
+    (assim um tipo novo não depende de deploy; a ordem pode ser ajustada em /catalogo).
+    """
+    if not chaves:
+        return {}
+    # Busca e cadastro pela chave normalizada (tamanho "" = None); a resposta usa as chaves recebidas
+    normalizadas = {(tipo, normalizar_tamanho(tamanho)) for tipo, tamanho in chaves}
+    ids = await _buscar(db, normalizadas)
+
+    novos = {(tipo, normalizar_tamanho(tamanho)) for tipo, tamanho in criar}
+    faltando = sorted((novos & normalizadas) - set(ids), key=lambda c: (c[0], c[1] or ""))
+    if faltando:
+        proximo = select(func.coalesce(func.max(CatalogoItem.sort_key), 0) + 10).scalar_subquery()
+        for tipo, tamanho in faltando:
+            # DO NOTHING: se outra requisição cadastrou o mesmo item ao mesmo tempo, fica o dela
+            await db.execute(
+                insert_upsert(db, CatalogoItem)
+                .values(tipo=tipo, tamanho=tamanho, sort_key=proximo, ativo=True)
+                .on_conflict_do_nothing()
+            )
+        ids.update(await _buscar(db, faltando))
+    return {
+        (tipo, tamanho): ids[(tipo, normalizar_tamanho(tamanho))]
+        for tipo, tamanho in chaves if (tipo, normalizar_tamanho(tamanho)) in ids
+    }
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from sqlalchemy import select, insert, delete, func, case, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core.config import settings
+from backend.database.connection import AsyncSessionLocal
+from backend.models.movimentacao import Movimentacao, get_br_time
+from backend.models.roupa import Roupa
+from backend.models.snapshot import SnapshotSaldo, SnapshotSaldoItem
+from backend.services.arquivo import arquivo_frio
+
+# Conciliação do saldo (roupas.saldo, um contador) com o histórico (movimentacoes):
+#   saldo esperado = saldo do último snapshot + entradas - saídas com id > snapshot.ultimo_id
+# Só as movimentações depois do snapshot são lidas (pela PK, que começa pelo id), então o custo
+# depende do que aconteceu desde o último snapshot e não da idade do histórico.
+#
+# Consistência: o /movimentar e a importação atualizam roupas ANTES de inserir no histórico.
+# Com LOCK TABLE roupas IN SHARE MODE, quem já inseriu no histórico terminou (o lock espera) e
+# quem ainda não inseriu vai pegar um id maior que o max(id) lido aqui. O lock dura milissegundos.
+
+INTERVALO_VERIFICACAO = 3600     # segundos entre verificações com a API no ar
+LOCK_TIMEOUT = "5s"
+
+logger = logging.getLogger(__name__)
+
+_VARIACAO = case(
+    (Movimentacao.acao == "entrada", Movimentacao.quantidade),
+    (Movimentacao.acao == "saida", -Movimentacao.quantidade),
+    else_=0,
+)
+
+
+@dataclass
+class ResultadoConciliacao:
+    snapshot_id: int = None          # snapshot usado como base (ou o criado agora)
+    ultimo_id: int = 0               # histórico somado até este id
+    movimentacoes: int = 0           # linhas do histórico lidas (as posteriores ao snapshot)
+    divergencias: list = field(default_factory=list)
+    duracao_ms: float = 0.0
+    esperados: dict = field(default_factory=dict, repr=False)   # item_id -> saldo segundo o histórico
+
+    def relatorio(self) -> dict:
+        return {
+            "snapshot_id": self.snapshot_id,
+            "ultimo_id": self.ultimo_id,
+            "movimentacoes": self.movimentacoes,
+            "itens": len(self.esperados),
+            "divergencias": self.divergencias,
+            "duracao_ms": self.duracao_ms,
+        }
+
+
+ultima_conciliacao = None    # para o /metrics
+
+
+async def _travar(db: AsyncSession, modo: str):
+    # SQLite: um escritor por vez no arquivo inteiro, não precisa
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+        await db.execute(text(f"LOCK TABLE sicro.roupas IN {modo} MODE"))
+
+
+async def _ultimo_snapshot(db: AsyncSession):
+    return (await db.execute(
+        select(SnapshotSaldo.id, SnapshotSaldo.ultimo_id, SnapshotSaldo.criado_em)
+        .order_by(SnapshotSaldo.id.desc()).limit(1)
+    )).first()
+
+
+async def _somar(db: AsyncSession, resultado: ResultadoConciliacao, base: dict, desde_id: int):
+    """Saldo esperado = base + variação de cada item nas movimentações com id > desde_id."""
+    result = await db.execute(
+        select(Movimentacao.item_id, func.sum(_VARIACAO), func.count(), func.max(Movimentacao.id))
+        .where(Movimentacao.id > desde_id)
+        .group_by(Movimentacao.item_id)
+    )
+    resultado.esperados = dict(base)
+    resultado.ultimo_id = desde_id
+    for item_id, variacao, linhas, maior_id in result.all():
+        resultado.esperados[item_id] = resultado.esperados.get(item_id, 0) + (variacao or 0)
+        resultado.movimentacoes += linhas
+        resultado.ultimo_id = max(resultado.ultimo_id, maior_id)
+
+
+async def _comparar(db: AsyncSession, resultado: ResultadoConciliacao):
+    saldos = dict((await db.execute(select(Roupa.item_id, Roupa.saldo))).all())
+    for item_id in sorted(set(saldos) | set(resultado.esperados)):
+        esperado = resultado.esperados.get(item_id, 0)
+        saldo = saldos.get(item_id) or 0
+        if saldo != esperado:
+            resultado.divergencias.append({
+                "item_id": item_id, "saldo": saldo, "esperado": esperado, "diferenca": saldo - esperado,
+            })
+
+
+def _registrar(resultado: ResultadoConciliacao, inicio: float):
+    global ultima_conciliacao
+    resultado.duracao_ms = round((time.perf_counter() - inicio) * 1000, 2)
+    ultima_conciliacao = resultado
+    if resultado.divergencias:
+        logger.warning("Saldo divergente do histórico em %s item(ns): %s",
+                       len(resultado.divergencias), resultado.divergencias[:20])
+
+
+async def conciliar(db: AsyncSession):
+    """Confere roupas.saldo contra o último snapshot + histórico posterior. None se não há snapshot."""
+    inicio = time.perf_counter()
+    try:
+        await _travar(db, "SHARE")
+        snapshot = await _ultimo_snapshot(db)
+        if snapshot is None:
+            return None
+        resultado = ResultadoConciliacao(snapshot_id=snapshot.id)
+        base = dict((await db.execute(
+            select(SnapshotSaldoItem.item_id, SnapshotSaldoItem.saldo).where(SnapshotSaldoItem.snapshot_id == snapshot.id)
+        )).all())
+        await _somar(db, resultado, base, snapshot.ultimo_id)
+        await _comparar(db, resultado)
+    finally:
+        await db.rollback()    # só leitura: solta o lock
+    _registrar(resultado, inicio)
+    return resultado
+
+
+async def tirar_snapshot(db: AsyncSession, do_historico: bool = False, intervalo_horas: float = None):
+    """
+    Grava um snapshot novo: o anterior + o histórico posterior (o saldo segundo o histórico, mesmo
+    que roupas.saldo tenha divergido; assim a divergência continua aparecendo até ser corrigida).
+
+    Sem snapshot anterior, a base é roupas.saldo de agora, ou com `do_historico` a soma do
+    histórico inteiro (uma vez só; não serve depois que meses foram para o arquivo frio).
+    Com `intervalo_horas`, não faz nada (devolve None) se o último é mais novo que isso.
+    """
+    if do_historico and arquivo_frio.segmentos():
+        raise ValueError("Há meses no arquivo frio: o histórico do banco não tem mais tudo para somar")
+    inicio = time.perf_counter()
+    # SHARE ROW EXCLUSIVE: como o SHARE, e também um worker por vez
+    await _travar(db, "SHARE ROW EXCLUSIVE")
+    agora = get_br_time()
+    if intervalo_horas is not None and await db.scalar(
+        select(func.count()).select_from(SnapshotSaldo).where(SnapshotSaldo.criado_em > agora - timedelta(hours=intervalo_horas))
+    ):
+        await db.rollback()
+        return None
+    anterior = await _ultimo_snapshot(db)
+
+    resultado = ResultadoConciliacao()
+    if anterior is not None:
+        base = dict((await db.execute(
+            select(SnapshotSaldoItem.item_id, SnapshotSaldoItem.saldo).where(SnapshotSaldoItem.snapshot_id == anterior.id)
+        )).all())
+        await _somar(db, resultado, base, anterior.ultimo_id)
+    elif do_historico:
+        await _somar(db, resultado, {}, 0)
+    else:
+        resultado.esperados = {item_id: saldo or 0 for item_id, saldo in (await db.execute(select(Roupa.item_id, Roupa.saldo))).all()}
+        resultado.ultimo_id = await db.scalar(select(func.coalesce(func.max(Movimentacao.id), 0)))
+    await _comparar(db, resultado)
+
+    resultado.snapshot_id = await db.scalar(
+        insert(SnapshotSaldo)
+        .values(ultimo_id=resultado.ultimo_id, criado_em=agora, divergencias=len(resultado.divergencias))
+        .returning(SnapshotSaldo.id)
+    )
+    if resultado.esperados:
+        await db.execute(insert(SnapshotSaldoItem), [
+            {"snapshot_id": resultado.snapshot_id, "item_id": item_id, "saldo": saldo}
+            for item_id, saldo in sorted(resultado.esperados.items())
+        ])
+
+    # Guarda só os SNAPSHOT_MANTER mais recentes
+    antigos = select(SnapshotSaldo.id).order_by(SnapshotSaldo.id.desc()).offset(settings.SNAPSHOT_MANTER).scalar_subquery()
+    antigos = select(SnapshotSaldo.id).where(SnapshotSaldo.id <= antigos)
+    await db.execute(delete(SnapshotSaldoItem).where(SnapshotSaldoItem.snapshot_id.in_(antigos)))
+    await db.execute(delete(SnapshotSaldo).where(SnapshotSaldo.id.in_(antigos)))
+
+    await db.commit()
+    _registrar(resultado, inicio)
+    return resultado
+
+
+async def manter_snapshots():
+    """Loop do lifespan: um snapshot (com conciliação) a cada SNAPSHOT_INTERVALO_HORAS."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                resultado = await tirar_snapshot(db, intervalo_horas=settings.SNAPSHOT_INTERVALO_HORAS)
+            if resultado is not None:
+                logger.info("Snapshot de saldo %s: %s movimentações somadas em %s ms",
+                            resultado.snapshot_id, resultado.movimentacoes, resultado.duracao_ms)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Não foi possível tirar o snapshot de saldo: %s", e)
+        await asyncio.sleep(INTERVALO_VERIFICACAO)
@@ -0,0 +1,125 @@
+from dataclasses import dataclass, field
+from sqlalchemy import select, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database.dialeto import insert_upsert, travar_escrita
+from backend.models.roupa import Roupa
+from backend.models.movimentacao import Movimentacao, get_br_time
+from backend.services.catalogo import resolver_itens
+from backend.services.rollup import registrar_diario
+from backend.services.alertas import reavaliar
+from backend.services.eventos import evento_saldo
+
+
+@dataclass
+class ResultadoMovimentacao:
+    mensagens: list = field(default_factory=list)
+    registros: list = field(default_factory=list)   # linhas gravadas no histórico
+    itens: dict = field(default_factory=dict)       # item_id -> (tipo, tamanho)
+    saldos: dict = field(default_factory=dict)      # item_id -> saldo final
+    deltas: dict = field(default_factory=dict)      # item_id -> variação nesta ordem
+    versao: int = None                              # nova versão do estoque (depois do commit)
+    alertas: list = field(default_factory=list)     # mudanças de estado dos alertas de estoque baixo
+
+    def evento(self, versao: int) -> dict:
+        """Evento do /saldo/stream com a versão nova (eventos.publicar_mudanca)."""
+        return evento_saldo(versao, self.itens, self.saldos, self.deltas, self.alertas)
+
+
+async def aplicar_movimentacoes(db: AsyncSession, itens, usuario: str, ordem_id: str) -> ResultadoMovimentacao:
+    """
+    Aplica uma ordem inteira em poucas idas ao banco:
+    resolve os itens no catálogo, 1 SELECT ... FOR UPDATE com todas as roupas envolvidas,
+    o cálculo em memória e depois INSERT/UPDATE em lote. O commit fica por conta de quem chamou,
+    e depois dele, se houve registros, a versão/evento (eventos.publicar_mudanca).
+    """
+    resultado = ResultadoMovimentacao()
+    if not itens:
+        return resultado
+
+    # 1. (tipo, tamanho) -> item do catálogo. Entrada de item novo cadastra o item.
+    chaves = {(mov.tipo, mov.tamanho) for mov in itens}
+    entradas = {(mov.tipo, mov.tamanho) for mov in itens if mov.acao == "entrada"}
+    ids = await resolver_itens(db, chaves, criar=entradas)
+    resultado.itens = {item_id: chave for chave, item_id in ids.items()}
+
+    # Itens com entrada precisam de linha em roupas antes do lock (ON CONFLICT: sem corrida na criação)
+    ids_entrada = sorted(ids[c] for c in entradas if c in ids)
+    if ids_entrada:
+        await db.execute(
+            insert_upsert(db, Roupa).on_conflict_do_nothing(index_elements=["item_id"]),
+            [{"item_id": item_id, "saldo": 0} for item_id in ids_entrada],
+        )
+
+    # 2. Busca (e trava) todas as roupas da ordem de uma vez só.
+    # O ORDER BY item_id garante a mesma ordem de lock entre requisições concorrentes (evita deadlock).
+    await travar_escrita(db, Roupa, "saldo")
+    result = await db.execute(
+        select(Roupa.id, Roupa.item_id, Roupa.saldo, Roupa.estoque_minimo)
+        .where(Roupa.item_id.in_(sorted(ids.values())))
+        .order_by(Roupa.item_id)
+        .with_for_update()
+    )
+    # item_id -> {"id": ..., "saldo": ..., "inicial": ..., "minimo": ...}
+    estoque = {}
+    for row in result.all():
+        saldo = row.saldo or 0
+        estoque[row.item_id] = {"id": row.id, "saldo": saldo, "inicial": saldo, "minimo": row.estoque_minimo}
+
+    alterados = set()
+    agora = get_br_time()
+
+    # 3. Processa os itens na ordem recebida, com o saldo "corrente" em memória
+    for mov in itens:
+        tipo = mov.tipo
+        tamanho = mov.tamanho
+        quantidade = int(mov.quantidade)
+        acao = mov.acao
+        item_id = ids.get((tipo, tamanho))
+        roupa = estoque.get(item_id)
+
+        if acao == "entrada":
+            roupa["saldo"] += quantidade
+            alterados.add(item_id)
+            resultado.mensagens.append(f"Entrada de {quantidade} {tipo} {tamanho or ''}".strip())
+
+        elif acao == "saida":
+            if not roupa:
+                resultado.mensagens.append(f"Erro: {tipo} {tamanho or ''} não encontrado")
+                continue
+            if roupa["saldo"] < quantidade:
+                resultado.mensagens.append(f"Erro: saldo insuficiente para {tipo} {tamanho or ''}")
+                continue
+            roupa["saldo"] -= quantidade
+            alterados.add(item_id)
+            resultado.mensagens.append(f"Saída de {quantidade} {tipo} {tamanho or ''}".strip())
+
+        elif item_id is None:
+            # Ação desconhecida de item que nem existe no catálogo: não há o que registrar
+            continue
+
+        resultado.registros.append({
+            "ordem_id": ordem_id,
+            "usuario": usuario,
+            "item_id": item_id,
+            "quantidade": quantidade,
+            "acao": acao,
+            "data": agora,
+        })
+
+    # 4. Grava tudo em lote
+    if alterados:
+        await db.execute(update(Roupa), [   # UPDATE em lote por chave primária
+            {"id": estoque[item_id]["id"], "saldo": estoque[item_id]["saldo"]} for item_id in sorted(alterados)
+        ])
+    if resultado.registros:
+        await db.execute(insert(Movimentacao), resultado.registros)
+        await registrar_diario(db, resultado.registros)   # agregado diário do dashboard
+
+    # Alertas de estoque baixo: só os itens desta ordem (as linhas já estão travadas)
+    resultado.alertas = await reavaliar(
+        db, {item_id: (estoque[item_id]["saldo"], estoque[item_id]["minimo"]) for item_id in alterados}, ordem_id
+    )
+
+    resultado.saldos = {item_id: estoque[item_id]["saldo"] for item_id in alterados}
+    resultado.deltas = {item_id: estoque[item_id]["saldo"] - estoque[item_id]["inicial"] for item_id in alterados}
+    return resultado
@@ -0,0 +1,181 @@
+import asyncio
+import json
+import logging
+from typing import Callable, Optional
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from backend.core.config import settings
+from backend.database.connection import engine, ssl_modo
+from backend.services.versao import versao_estoque
+
+CANAL = "sicro_estoque"
+LIMITE_PAYLOAD = 7900      # o NOTIFY do Postgres aceita até 8000 bytes
+TAMANHO_FILA = 100         # eventos pendentes por cliente antes de mandar "recarregar"
+
+logger = logging.getLogger(__name__)
+
+
+def evento_saldo(versao: int, itens: dict, saldos: dict, deltas: dict, alertas: list = None) -> dict:
+    """Monta o evento publicado depois de um /movimentar (itens: item_id -> (tipo, tamanho))."""
+    evento = {
+        "versao": versao,
+        "itens": [
+            {
+                "item_id": item_id,
+                "tipo": itens[item_id][0],
+                "tamanho": itens[item_id][1],
+                "saldo": saldos[item_id],
+                "delta": deltas[item_id],
+            }
+            for item_id in saldos
+        ],
+    }
+    if alertas:
+        evento["alertas"] = alertas    # mudanças de estado dos alertas de estoque baixo
+    return evento
+
+
+class _Broker:
+    """Parte comum: guarda as filas dos clientes conectados neste processo."""
+
+    def __init__(self):
+        self.assinantes = set()
+
+    def assinar(self) -> asyncio.Queue:
+        fila = asyncio.Queue(maxsize=TAMANHO_FILA)
+        self.assinantes.add(fila)
+        return fila
+
+    def cancelar(self, fila: asyncio.Queue):
+        self.assinantes.discard(fila)
+
+    def distribuir(self, evento: dict):
+        # Entrega local: também mantém a versão em memória deste worker em dia
+        if evento.get("versao") is not None:
+            versao_estoque.definir(evento["versao"])
+        for fila in list(self.assinantes):
+            try:
+                fila.put_nowait(evento)
+            except asyncio.QueueFull:
+                # Cliente lento: descarta o acumulado e pede para ele recarregar tudo
+                while not fila.empty():
+                    fila.get_nowait()
+                fila.put_nowait({"versao": evento.get("versao"), "recarregar": True})
+
+    async def iniciar(self):
+        pass
+
+    async def parar(self):
+        pass
+
+
+class BrokerMemoria(_Broker):
+    """Para desenvolvimento/testes (um único processo): entrega logo após o commit da sessão."""
+
+    async def publicar(self, db, evento: dict):
+        db.sync_session.info.setdefault("eventos_pendentes", []).append(evento)
+
+
+class BrokerPostgres(_Broker):
+    """
+    Fan-out entre workers via LISTEN/NOTIFY. O pg_notify é feito dentro da transação que sobe a
+    versão (publicar_mudanca), então o Postgres só entrega depois do commit (e nunca se houver rollback).
+    Cada worker mantém uma conexão asyncpg dedicada escutando o canal.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._tarefa = None
+
+    async def publicar(self, db, evento: dict):
+        payload = json.dumps(evento, ensure_ascii=False)
+        if len(payload.encode()) > LIMITE_PAYLOAD:
+            payload = json.dumps({"versao": evento.get("versao"), "recarregar": True})
+        await db.execute(text("SELECT pg_notify(:canal, :payload)"), {"canal": CANAL, "payload": payload})
+
+    def _ao_notificar(self, conexao, pid, canal, payload):
+        try:
+            self.distribuir(json.loads(payload))
+        except ValueError:
+            logger.warning("Payload inválido no canal %s: %r", canal, payload)
+
+    async def _escutar(self):
+        import asyncpg
+
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        espera = 1
+        while True:
+            try:
+                conexao = await asyncpg.connect(dsn, ssl=ssl_modo)
+                # try logo depois do connect: se o LISTEN falhar, a conexão não fica aberta
+                try:
+                    perdida = asyncio.Event()
+                    conexao.add_termination_listener(lambda _c: perdida.set())
+                    await conexao.add_listener(CANAL, self._ao_notificar)
+                    # Eventos podem ter se perdido enquanto estávamos desconectados
+                    versao_estoque.invalidar()
+                    espera = 1
+                    await perdida.wait()
+                finally:
+                    if not conexao.is_closed():
+                        await conexao.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("LISTEN %s falhou (%s); tentando de novo em %ss", CANAL, e, espera)
+            versao_estoque.invalidar()
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, 30)
+
+    async def iniciar(self):
+        if self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._escutar())
+
+    async def parar(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+
+# SQLite não tem LISTEN/NOTIFY: lá o broker é sempre o de memória
+if settings.EVENTOS_BACKEND == "postgres" and engine.dialect.name == "postgresql":
+    broker = BrokerPostgres()
+else:
+    broker = BrokerMemoria()
+
+
+async def publicar_mudanca(db, evento: Optional[Callable[[int], dict]] = None) -> Optional[int]:
+    """
+    Depois do commit de uma mudança no estoque: sobe a versão e publica o evento (`evento(versao)`)
+    numa transação curta só para isso. A linha da versão é uma só; subindo a versão dentro da
+    transação do /movimentar, a trava dela serializava ordens de itens diferentes até o commit.
+    Quem ler entre os dois commits vê o estoque novo ainda com a versão anterior (milissegundos).
+    Devolve a versão nova, ou None se não conseguiu (a mudança já está gravada: só avisa no log).
+    """
+    try:
+        versao = await versao_estoque.incrementar(db)
+        if evento is not None:
+            await broker.publicar(db, evento(versao))
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.warning("Não foi possível subir a versão do estoque: %s", e)
+        return None
+    versao_estoque.definir(versao)
+    return versao
+
+
+# Entrega dos eventos do BrokerMemoria só depois do commit (rollback descarta)
+@event.listens_for(Session, "after_commit")
+def _apos_commit(session):
+    for evento in session.info.pop("eventos_pendentes", []):
+        broker.distribuir(evento)
+
+
+@event.listens_for(Session, "after_rollback")
+def _apos_rollback(session):
+    session.info.pop("eventos_pendentes", None)
@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+import zlib
+from sqlalchemy import select
+from backend.database.connection import AsyncSessionLocal
+from backend.models.catalogo import CatalogoItem
+from backend.models.movimentacao import Movimentacao
+from backend.services.arquivo import arquivo_frio
+from backend.services.historico import FiltrosHistorico
+
+# Quantas linhas o cursor do servidor busca por vez (e quantas viram um pedaço da resposta)
+LINHAS_POR_LOTE = 2000
+
+# Ordenado por (data, id): no Postgres a tabela é particionada por mês em "data", então o
+# export lê as partições em sequência (Append ordenado) em vez de intercalar todas por id
+SELECT_EXPORTACAO = (
+    select(
+        Movimentacao.id,
+        Movimentacao.ordem_id,
+        Movimentacao.usuario,
+        CatalogoItem.tipo,
+        CatalogoItem.tamanho,
+        Movimentacao.quantidade,
+        Movimentacao.acao,
+        Movimentacao.data,
+    )
+    .join(CatalogoItem, CatalogoItem.id == Movimentacao.item_id)
+    .order_by(Movimentacao.data, Movimentacao.id)
+)
+
+COLUNAS = ["id", "ordem_id", "usuario", "tipo", "tamanho", "quantidade", "acao", "data"]
+
+
+def _linha_dict(row):
+    return {
+        "id": row.id,
+        "ordem_id": row.ordem_id,
+        "usuario": row.usuario,
+        "tipo": row.tipo,
+        "tamanho": row.tamanho,
+        "quantidade": row.quantidade,
+        "acao": row.acao,
+        "data": row.data.isoformat() if row.data else None,
+    }
+
+
+def _csv(linhas, cabecalho: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=COLUNAS)
+    if cabecalho:
+        writer.writeheader()
+    writer.writerows(linhas)
+    return buffer.getvalue()
+
+
+def _ndjson(linhas) -> str:
+    return "".join(json.dumps(l, ensure_ascii=False) + "\n" for l in linhas)
+
+
+async def _lotes_texto(filtros: FiltrosHistorico, formato: str):
+    """
+    Lê o histórico com cursor do lado do servidor (stream_results) e devolve texto em lotes.
+    A sessão é aberta aqui dentro (e não via Depends) porque precisa viver enquanto a
+    StreamingResponse ainda está sendo enviada.
+    """
+    query = filtros.aplicar(SELECT_EXPORTACAO).execution_options(yield_per=LINHAS_POR_LOTE)
+    primeiro = True
+
+    # Meses arquivados primeiro (são os mais antigos), depois o que está no banco
+    if arquivo_frio.alcanca(filtros):
+        async for lote in arquivo_frio.lotes(filtros, LINHAS_POR_LOTE):
+            linhas = [_linha_dict(row) for row in lote]
+            if formato == "csv":
+                yield _csv(linhas, cabecalho=primeiro)
+            else:
+                yield _ndjson(linhas)
+            primeiro = False
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        async for particao in result.partitions():
+            linhas = [_linha_dict(row) for row in particao]
+            if formato == "csv":
+                yield _csv(linhas, cabecalho=primeiro)
+            else:
+                yield _ndjson(linhas)
+            primeiro = False
+
+        # Export vazio em CSV ainda leva o cabeçalho
+        if primeiro and formato == "csv":
+            yield _csv([], cabecalho=True)
+
+
+async def exportar_movimentacoes(filtros: FiltrosHistorico, formato: str, compactar: bool):
+    """Gerador assíncrono de bytes para a StreamingResponse (memória constante)."""
+    if not compactar:
+        async for texto in _lotes_texto(filtros, formato):
+            yield texto.encode("utf-8")
+        return
+
+    # wbits=31 -> formato gzip (com cabeçalho), compactado pedaço a pedaço
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for texto in _lotes_texto(filtros, formato):
+        pedaco = compressor.compress(texto.encode("utf-8"))
+        if pedaco:
+            yield pedaco
+    yield compressor.flush()
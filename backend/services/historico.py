@@ -0,0 +1,102 @@
+import base64
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+from fastapi import HTTPException, Query
+from sqlalchemy import select, tuple_
+from backend.models.catalogo import CatalogoItem
+from backend.models.movimentacao import Movimentacao
+
+FUSO_BR = timezone(timedelta(hours=-3))
+
+
+@dataclass
+class FiltrosHistorico:
+    usuario: Optional[str] = None
+    tipo: Optional[str] = None
+    tamanho: Optional[str] = None
+    acao: Optional[str] = None
+    ordem_id: Optional[str] = None
+    data_inicio: Optional[datetime] = None   # inclusiva
+    data_fim: Optional[datetime] = None      # exclusiva
+
+    def aplicar(self, query):
+        """Aplica os filtros informados num select() que já tenha Movimentacao no FROM."""
+        if self.usuario:
+            query = query.where(Movimentacao.usuario == self.usuario)
+        if self.tipo or self.tamanho:
+            # tipo/tamanho ficam no catálogo: filtra pelos item_id correspondentes
+            itens = select(CatalogoItem.id)
+            if self.tipo:
+                itens = itens.where(CatalogoItem.tipo == self.tipo)
+            if self.tamanho:
+                itens = itens.where(CatalogoItem.tamanho == self.tamanho)
+            query = query.where(Movimentacao.item_id.in_(itens))
+        if self.acao:
+            query = query.where(Movimentacao.acao == self.acao)
+        if self.ordem_id:
+            query = query.where(Movimentacao.ordem_id == self.ordem_id)
+        if self.data_inicio:
+            query = query.where(Movimentacao.data >= self.data_inicio)
+        if self.data_fim:
+            query = query.where(Movimentacao.data < self.data_fim)
+        return query
+
+
+def _com_fuso(data: Optional[datetime]):
+    # Datas sem fuso vindas da query string são consideradas horário de Brasília
+    if data is not None and data.tzinfo is None:
+        return data.replace(tzinfo=FUSO_BR)
+    return data
+
+
+# Dependência do FastAPI: lê os filtros da query string
+def filtros_historico(
+    usuario: Optional[str] = Query(None),
+    tipo: Optional[str] = Query(None),
+    tamanho: Optional[str] = Query(None),
+    acao: Optional[str] = Query(None),
+    ordem_id: Optional[str] = Query(None),
+    data_inicio: Optional[datetime] = Query(None),
+    data_fim: Optional[datetime] = Query(None),
+) -> FiltrosHistorico:
+    return FiltrosHistorico(
+        usuario=usuario,
+        tipo=tipo,
+        tamanho=tamanho,
+        acao=acao,
+        ordem_id=ordem_id,
+        data_inicio=_com_fuso(data_inicio),
+        data_fim=_com_fuso(data_fim),
+    )
+
+
+# ----------------------------- CURSOR (KEYSET) ------------------------------ #
+# O cursor é a posição (data, id) da última linha entregue, em base64 para ir na URL.
+
+def codificar_cursor(data: datetime, id: int) -> str:
+    bruto = f"{data.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str):
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        data, id = bruto.rsplit("|", 1)
+        # Cursor de linha do SQLite vem sem fuso: horário de Brasília, como as datas da query string
+        return _com_fuso(datetime.fromisoformat(data)), int(id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def apos_cursor(query, cursor: Optional[str]):
+    """Continua a listagem (ordenada por data DESC, id DESC) a partir do cursor."""
+    if not cursor:
+        return query
+    data, id = decodificar_cursor(cursor)
+    # "data <= ..." é redundante com a tupla, mas é o que deixa o Postgres podar as partições
+    # mensais mais novas que o cursor (comparação de tupla não entra na poda)
+    return query.where(
+        Movimentacao.data <= data,
+        tuple_(Movimentacao.data, Movimentacao.id) < tuple_(data, id),
+    )
@@ -0,0 +1,89 @@
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import timedelta
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core.config import settings
+from backend.database.connection import AsyncSessionLocal
+from backend.database.dialeto import insert_upsert
+from backend.models.idempotencia import ChaveIdempotencia
+from backend.models.movimentacao import get_br_time
+
+TAMANHO_MAXIMO_CHAVE = 255
+TENTATIVAS_RESERVA = 3       # INSERT de novo quando a chave que conflitou sumiu antes do SELECT
+INTERVALO_LIMPEZA = 3600     # segundos entre limpezas com a API no ar
+
+logger = logging.getLogger(__name__)
+
+
+def hash_requisicao(corpo: dict) -> str:
+    return hashlib.sha256(json.dumps(corpo, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+async def reservar(db: AsyncSession, usuario: str, chave: str, hash_: str) -> Optional[dict]:
+    """
+    Registra a chave na transação atual. Devolve None se esta requisição é a primeira (e deve
+    executar) ou a resposta guardada se a chave já foi usada.
+
+    O INSERT ... ON CONFLICT DO NOTHING espera o commit/rollback de outra transação que tenha
+    acabado de inserir a mesma chave: uma duplicata simultânea fica parada até a primeira
+    terminar e então repete a resposta dela (ou executa, se a primeira falhou).
+    """
+    if len(chave) > TAMANHO_MAXIMO_CHAVE:
+        raise HTTPException(status_code=400, detail="Idempotency-Key muito longa")
+
+    stmt = insert_upsert(db, ChaveIdempotencia).values(
+        usuario=usuario, chave=chave, hash_requisicao=hash_, criada_em=get_br_time()
+    ).on_conflict_do_nothing(index_elements=["usuario", "chave"]).returning(ChaveIdempotencia.chave)
+    consulta = (
+        select(ChaveIdempotencia.hash_requisicao, ChaveIdempotencia.resposta)
+        .where(ChaveIdempotencia.usuario == usuario, ChaveIdempotencia.chave == chave)
+    )
+    for _ in range(TENTATIVAS_RESERVA):
+        if (await db.execute(stmt)).first() is not None:
+            return None
+        existente = (await db.execute(consulta)).first()
+        if existente is None:
+            # Conflitou com uma chave que o limpar_expiradas apagou logo depois: é chave nova, insere de novo
+            continue
+        if existente.hash_requisicao != hash_:
+            raise HTTPException(status_code=422, detail="Idempotency-Key já usada com outra requisição")
+        return existente.resposta
+    raise HTTPException(status_code=409, detail="Idempotency-Key em uso, tente novamente", headers={"Retry-After": "1"})
+
+
+async def gravar_resposta(db: AsyncSession, usuario: str, chave: str, resposta: dict):
+    """Guarda a resposta junto com a movimentação (mesmo commit)."""
+    await db.execute(
+        update(ChaveIdempotencia)
+        .where(ChaveIdempotencia.usuario == usuario, ChaveIdempotencia.chave == chave)
+        .values(resposta=resposta)
+    )
+
+
+async def limpar_expiradas(db: AsyncSession, ttl_horas: int = None) -> int:
+    if ttl_horas is None:
+        ttl_horas = settings.IDEMPOTENCIA_TTL_HORAS
+    limite = get_br_time() - timedelta(hours=ttl_horas)
+    result = await db.execute(delete(ChaveIdempotencia).where(ChaveIdempotencia.criada_em < limite))
+    await db.commit()
+    return result.rowcount
+
+
+async def manter_idempotencia():
+    """Loop do lifespan: apaga as chaves vencidas de tempos em tempos."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                apagadas = await limpar_expiradas(db)
+            if apagadas:
+                logger.info("Chaves de idempotência vencidas apagadas: %s", apagadas)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Não foi possível limpar as chaves de idempotência: %s", e)
+        await asyncio.sleep(INTERVALO_LIMPEZA)
@@ -0,0 +1,219 @@
+import codecs
+import csv
+from dataclasses import dataclass, field
+from sqlalchemy import Table, Column, Integer, MetaData, DateTime, String, select, insert, literal, func, text, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database.dialeto import insert_upsert
+from backend.models.catalogo import CatalogoItem
+from backend.models.movimentacao import Movimentacao, get_br_time
+from backend.models.roupa import Roupa
+from backend.services.rollup import registrar_diario
+from backend.services.alertas import reavaliar
+from backend.services.eventos import evento_saldo
+
+# Importação de recebimentos (entradas) em planilha CSV:
+#   tipo;tamanho;quantidade        (vírgula ou ponto e vírgula, cabeçalho obrigatório)
+# As linhas válidas vão para uma tabela temporária (COPY no Postgres) e saldo e histórico são
+# atualizados com um INSERT ... SELECT cada a partir dela, sem uma query por linha do arquivo.
+
+LOTE_STAGING = 10_000
+MAX_ERROS_RELATORIO = 1000    # o resto só entra na contagem
+COLUNAS_CSV = ("tipo", "tamanho", "quantidade")
+
+STAGING = Table(
+    "importacao_staging", MetaData(),
+    Column("linha", Integer),
+    Column("item_id", Integer),
+    Column("quantidade", Integer),
+)
+
+
+@dataclass
+class ResultadoImportacao:
+    linhas: int = 0
+    importadas: int = 0
+    erros: list = field(default_factory=list)
+    erros_total: int = 0
+    itens: dict = field(default_factory=dict)     # item_id -> (tipo, tamanho)
+    saldos: dict = field(default_factory=dict)    # item_id -> saldo final
+    deltas: dict = field(default_factory=dict)    # item_id -> quantidade importada (linhas válidas)
+    versao: int = None                            # nova versão do estoque (depois do commit)
+    alertas: list = field(default_factory=list)
+
+    def evento(self, versao: int) -> dict:
+        """Evento do /saldo/stream com a versão nova (eventos.publicar_mudanca)."""
+        return evento_saldo(versao, self.itens, self.saldos, self.deltas, self.alertas)
+
+    def erro(self, linha: int, mensagem: str):
+        self.erros_total += 1
+        if len(self.erros) < MAX_ERROS_RELATORIO:
+            self.erros.append({"linha": linha, "erro": mensagem})
+
+    def relatorio(self) -> dict:
+        return {
+            "linhas": self.linhas,
+            "importadas": self.importadas,
+            "erros_total": self.erros_total,
+            "erros": self.erros,
+        }
+
+
+async def linhas_csv(pedacos):
+    """
+    Lê o corpo da requisição aos pedaços e devolve (nº da linha, campos) conforme cada linha
+    fica completa, sem juntar o arquivo inteiro na memória. Aceita UTF-8 com ou sem BOM.
+    """
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    resto = ""
+    numero = 0
+    delimitador = None
+    async for pedaco in pedacos:
+        texto = resto + decodificador.decode(pedaco)
+        linhas = texto.split("\n")
+        resto = linhas.pop()
+        if delimitador is None and linhas:
+            delimitador = ";" if linhas[0].count(";") > linhas[0].count(",") else ","
+        for campos in csv.reader(linhas, delimiter=delimitador or ","):
+            numero += 1
+            yield numero, campos
+    resto += decodificador.decode(b"", final=True)
+    if resto.strip():
+        delimitador = delimitador or (";" if resto.count(";") > resto.count(",") else ",")
+        for campos in csv.reader([resto], delimiter=delimitador):
+            numero += 1
+            yield numero, campos
+
+
+async def _catalogo(db: AsyncSession) -> dict:
+    result = await db.execute(
+        select(CatalogoItem.id, CatalogoItem.tipo, CatalogoItem.tamanho).where(CatalogoItem.ativo.is_(True))
+    )
+    return {(row.tipo.casefold(), (row.tamanho or "").casefold()): (row.id, row.tipo, row.tamanho) for row in result.all()}
+
+
+async def _criar_staging(db: AsyncSession):
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(text(
+            "CREATE TEMP TABLE importacao_staging (linha integer, item_id integer, quantidade integer) ON COMMIT DROP"
+        ))
+    else:
+        await db.execute(text(
+            "CREATE TEMP TABLE IF NOT EXISTS importacao_staging (linha integer, item_id integer, quantidade integer)"
+        ))
+        await db.execute(STAGING.delete())
+
+
+async def _carregar(db: AsyncSession, registros: list):
+    if db.bind.dialect.name == "postgresql":
+        # COPY binário direto na tabela temporária (mesma conexão/transação da sessão)
+        conexao = await db.connection()
+        bruta = await conexao.get_raw_connection()
+        await bruta.driver_connection.copy_records_to_table(
+            "importacao_staging", columns=["linha", "item_id", "quantidade"], records=registros
+        )
+    else:
+        await db.execute(STAGING.insert(), [{"linha": l, "item_id": i, "quantidade": q} for l, i, q in registros])
+
+
+async def importar_entradas(db: AsyncSession, pedacos, usuario: str, ordem_id: str, parcial: bool) -> ResultadoImportacao:
+    """
+    Importa o CSV como uma ordem de entrada. Sem `parcial`, qualquer linha com erro cancela
+    tudo (a função devolve o relatório e não grava nada). O commit fica por conta de quem chamou.
+    """
+    resultado = ResultadoImportacao()
+    catalogo = await _catalogo(db)
+    await _criar_staging(db)
+
+    posicoes = None
+    buffer = []
+    async for numero, campos in linhas_csv(pedacos):
+        if posicoes is None:
+            cabecalho = [c.strip().casefold() for c in campos]
+            faltando = [c for c in COLUNAS_CSV if c not in cabecalho]
+            if faltando:
+                resultado.erro(numero, f"Cabeçalho sem a(s) coluna(s): {', '.join(faltando)}")
+                return resultado
+            posicoes = [cabecalho.index(c) for c in COLUNAS_CSV]
+            continue
+        if not any(c.strip() for c in campos):
+            continue    # linha em branco no fim da planilha
+
+        resultado.linhas += 1
+        if len(campos) <= max(posicoes):
+            resultado.erro(numero, "Linha com colunas faltando")
+            continue
+        tipo, tamanho, quantidade = (campos[p].strip() for p in posicoes)
+        item = catalogo.get((tipo.casefold(), tamanho.casefold()))
+        if item is None:
+            resultado.erro(numero, f"Item não cadastrado no catálogo: {tipo} {tamanho}".strip())
+            continue
+        try:
+            quantidade = int(quantidade)
+        except ValueError:
+            resultado.erro(numero, f"Quantidade inválida: {quantidade!r}")
+            continue
+        if quantidade <= 0:
+            resultado.erro(numero, "Quantidade deve ser maior que zero")
+            continue
+
+        if resultado.erros_total and not parcial:
+            continue    # não vai gravar nada: só segue validando para o relatório
+
+        item_id, tipo_catalogo, tamanho_catalogo = item
+        resultado.itens[item_id] = (tipo_catalogo, tamanho_catalogo)
+        resultado.deltas[item_id] = resultado.deltas.get(item_id, 0) + quantidade
+        buffer.append((numero, item_id, quantidade))
+        if len(buffer) >= LOTE_STAGING:
+            await _carregar(db, buffer)
+            resultado.importadas += len(buffer)
+            buffer = []
+
+    if posicoes is None:
+        resultado.erro(1, "Arquivo vazio")
+        return resultado
+    if buffer:
+        await _carregar(db, buffer)
+        resultado.importadas += len(buffer)
+    if resultado.erros_total and not parcial:
+        resultado.importadas = 0
+        return resultado
+    if not resultado.importadas:
+        return resultado
+
+    agora = get_br_time()
+    totais = (
+        select(STAGING.c.item_id, func.sum(STAGING.c.quantidade).label("quantidade"))
+        .where(true())     # SQLite: INSERT ... SELECT ... ON CONFLICT precisa de WHERE no SELECT
+        .group_by(STAGING.c.item_id)
+        .order_by(STAGING.c.item_id)   # mesma ordem de lock do /movimentar
+    )
+
+    # 1. Saldo: um upsert para todos os itens (cria a linha em roupas se ainda não houver)
+    stmt = insert_upsert(db, Roupa).from_select(["item_id", "saldo"], totais)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["item_id"],
+        set_={"saldo": func.coalesce(Roupa.saldo, 0) + stmt.excluded.saldo},
+    ).returning(Roupa.item_id, Roupa.saldo, Roupa.estoque_minimo)
+    linhas = (await db.execute(stmt)).all()
+    resultado.saldos = {row.item_id: row.saldo for row in linhas}
+
+    # 2. Histórico: uma linha por linha do CSV, na ordem do arquivo
+    await db.execute(insert(Movimentacao).from_select(
+        ["ordem_id", "usuario", "item_id", "quantidade", "acao", "data"],
+        select(
+            literal(ordem_id, String), literal(usuario, String), STAGING.c.item_id, STAGING.c.quantidade,
+            literal("entrada", String), literal(agora, DateTime(timezone=True)),
+        ).order_by(STAGING.c.linha),
+    ))
+
+    # 3. Agregado diário do dashboard (uma linha por item, não por linha do CSV)
+    await registrar_diario(db, [
+        {"data": agora, "item_id": item_id, "acao": "entrada", "quantidade": qtd}
+        for item_id, qtd in resultado.deltas.items()
+    ])
+
+    # 4. Alertas de estoque baixo dos itens recebidos
+    resultado.alertas = await reavaliar(db, {row.item_id: (row.saldo, row.estoque_minimo) for row in linhas}, ordem_id)
+
+    # Versão e aviso às telas conectadas em /saldo/stream: depois do commit (eventos.publicar_mudanca)
+    return resultado
@@ -0,0 +1,113 @@
+import asyncio
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.models.catalogo import CatalogoItem
+from backend.models.movimentacao import get_br_time
+from backend.models.movimentacao_diaria import MovimentacaoDiaria
+from backend.models.roupa import Roupa
+from backend.services.versao import versao_estoque
+
+# Previsão de consumo: matriz (item × dia) das saídas dos últimos JANELA_DIAS dias, lida do
+# agregado diário, e a demanda de todos os itens calculada de uma vez com NumPy.
+#   consumo_diario  = média exponencial (EWMA) das saídas diárias, meia-vida de MEIA_VIDA_DIAS
+#   media_movel     = média simples dos últimos MEDIA_MOVEL_DIAS dias
+#   dias_cobertura  = saldo atual / consumo_diario (None se o item não tem consumo)
+
+JANELA_DIAS = 180
+MEIA_VIDA_DIAS = 14
+MEDIA_MOVEL_DIAS = 28
+
+SELECT_ITENS = (
+    select(Roupa.item_id, Roupa.saldo, CatalogoItem.tipo, CatalogoItem.tamanho)
+    .select_from(Roupa)
+    .join(CatalogoItem, CatalogoItem.id == Roupa.item_id)
+    .where(CatalogoItem.ativo.is_(True))
+    .order_by(CatalogoItem.sort_key, CatalogoItem.id)
+)
+
+
+def consulta_saidas(hoje: date):
+    """Saídas por dia e item dentro da janela (índice (acao, dia) do agregado diário)."""
+    return select(MovimentacaoDiaria.item_id, MovimentacaoDiaria.dia, MovimentacaoDiaria.quantidade).where(
+        MovimentacaoDiaria.acao == "saida",
+        MovimentacaoDiaria.dia > hoje - timedelta(days=JANELA_DIAS),
+    )
+
+
+def pesos_ewma(dias: int, meia_vida: float) -> np.ndarray:
+    """Peso de cada dia da janela (o último é hoje), somando 1."""
+    idade = np.arange(dias - 1, -1, -1, dtype=np.float64)
+    pesos = np.power(0.5, idade / meia_vida)
+    return pesos / pesos.sum()
+
+
+def calcular(itens: list, saidas: list, hoje: date) -> list:
+    """
+    itens: [(item_id, saldo, tipo, tamanho)] na ordem de exibição
+    saidas: [(item_id, dia, quantidade)] dos últimos JANELA_DIAS dias
+    """
+    if not itens:
+        return []
+    inicio = hoje - timedelta(days=JANELA_DIAS - 1)
+    linha = {item_id: i for i, (item_id, *_) in enumerate(itens)}
+
+    # Matriz de consumo: uma linha por item, uma coluna por dia
+    consumo = np.zeros((len(itens), JANELA_DIAS), dtype=np.float64)
+    if saidas:
+        brutas = [(linha[item_id], (dia - inicio).days, qtd) for item_id, dia, qtd in saidas
+                  if item_id in linha and 0 <= (dia - inicio).days < JANELA_DIAS]
+        if brutas:
+            linhas, colunas, quantidades = (np.array(c) for c in zip(*brutas))
+            np.add.at(consumo, (linhas, colunas), quantidades)
+
+    ewma = consumo @ pesos_ewma(JANELA_DIAS, MEIA_VIDA_DIAS)
+    media_movel = consumo[:, -MEDIA_MOVEL_DIAS:].mean(axis=1)
+    saldos = np.array([max(saldo or 0, 0) for _, saldo, _, _ in itens], dtype=np.float64)
+    cobertura = np.divide(saldos, ewma, out=np.full_like(saldos, np.inf), where=ewma > 0)
+
+    # Mais urgente primeiro (menos dias de cobertura); sem consumo vai para o fim, na ordem do catálogo
+    ordem = np.argsort(cobertura, kind="stable")
+    previsao = []
+    for i in ordem.tolist():
+        item_id, saldo, tipo, tamanho = itens[i]
+        dias = float(cobertura[i])
+        finito = np.isfinite(dias)
+        previsao.append({
+            "item_id": item_id,
+            "item": f"{tipo} {tamanho or ''}".strip(),
+            "saldo": saldo or 0,
+            "consumo_diario": round(float(ewma[i]), 2),
+            "media_movel_28d": round(float(media_movel[i]), 2),
+            "dias_cobertura": round(dias, 1) if finito else None,
+            "data_ruptura": (hoje + timedelta(days=int(dias))).isoformat() if finito else None,
+        })
+    return previsao
+
+
+class CachePrevisao:
+    """Guarda a última previsão; vale enquanto a versão do estoque e o dia não mudarem."""
+
+    def __init__(self):
+        self.chave = None
+        self.valor = None
+        self._lock = asyncio.Lock()
+
+    async def obter(self, db: AsyncSession) -> list:
+        chave = (await versao_estoque.atual(db), get_br_time().date())
+        if chave == self.chave:
+            return self.valor
+        async with self._lock:   # várias telas abrindo juntas: calcula uma vez só
+            if chave != self.chave:
+                self.valor = await self._calcular(db, chave[1])
+                self.chave = chave
+        return self.valor
+
+    async def _calcular(self, db: AsyncSession, hoje: date) -> list:
+        itens = [tuple(r) for r in (await db.execute(SELECT_ITENS)).all()]
+        saidas = (await db.execute(consulta_saidas(hoje))).all()
+        return calcular(itens, saidas, hoje)
+
+
+cache_previsao = CachePrevisao()
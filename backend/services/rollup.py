@@ -0,0 +1,56 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import select, delete, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.database.dialeto import insert_upsert, dia_br
+from backend.models.movimentacao import Movimentacao
+from backend.models.movimentacao_diaria import MovimentacaoDiaria
+
+
+async def registrar_diario(db: AsyncSession, registros: list):
+    """Soma as linhas recém-gravadas no histórico na tabela diária (mesma transação do /movimentar)."""
+    totais = defaultdict(int)
+    for r in registros:
+        totais[(r["data"].date(), r["item_id"], r["acao"])] += r["quantidade"]
+    if not totais:
+        return
+
+    # Ordenado pela chave para que duas ordens concorrentes travem as linhas na mesma ordem
+    linhas = [
+        {"dia": dia, "item_id": item_id, "acao": acao, "quantidade": qtd}
+        for (dia, item_id, acao), qtd in sorted(totais.items())
+    ]
+    stmt = insert_upsert(db, MovimentacaoDiaria)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["dia", "item_id", "acao"],
+        set_={"quantidade": MovimentacaoDiaria.quantidade + stmt.excluded.quantidade},
+    )
+    await db.execute(stmt, linhas)
+
+
+async def reconstruir_diario(db: AsyncSession, desde: datetime = None) -> int:
+    """
+    Recalcula a tabela diária a partir do histórico (backfill / correção).
+    Com `desde`, só os dias a partir dali: os meses que já foram para o arquivo frio não
+    estão mais no banco e os seus totais diários precisam ser mantidos.
+    """
+    dia = dia_br(db, Movimentacao.data)
+    origem = select(
+        dia.label("dia"),
+        Movimentacao.item_id,
+        Movimentacao.acao,
+        func.sum(Movimentacao.quantidade).label("quantidade"),
+    ).where(Movimentacao.data.is_not(None)).group_by(dia, Movimentacao.item_id, Movimentacao.acao)
+
+    limpar = delete(MovimentacaoDiaria)
+    if desde is not None:
+        origem = origem.where(Movimentacao.data >= desde)
+        limpar = limpar.where(MovimentacaoDiaria.dia >= desde.date())
+
+    await db.execute(limpar)
+    await db.execute(
+        insert(MovimentacaoDiaria).from_select(["dia", "item_id", "acao", "quantidade"], origem)
+    )
+    total = await db.scalar(select(func.count()).select_from(MovimentacaoDiaria))
+    await db.commit()
+    return total
@@ -0,0 +1,54 @@
+import time
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.core.config import settings
+from backend.models.estoque_versao import EstoqueVersao
+
+
+class VersaoEstoque:
+    """
+    Cache em memória da versão do estoque.
+    Quem movimenta neste processo atualiza o valor na hora (definir); mudanças feitas por
+    outros workers aparecem quando o valor expira (ESTOQUE_VERSAO_TTL_SEGUNDOS).
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.valor = None
+        self.lido_em = 0.0
+
+    def definir(self, versao: int):
+        # Nunca volta atrás: a versão só cresce
+        if self.valor is None or versao >= self.valor:
+            self.valor = versao
+            self.lido_em = time.monotonic()
+
+    def invalidar(self):
+        self.lido_em = 0.0
+
+    async def atual(self, db: AsyncSession) -> int:
+        # Sessão da réplica de leitura: vale a versão que ela já tem, não a do primário
+        fixa = db.info.get("versao_estoque")
+        if fixa is not None:
+            return fixa
+        if self.valor is not None and time.monotonic() - self.lido_em < self.ttl:
+            return self.valor
+        versao = await db.scalar(select(EstoqueVersao.versao).where(EstoqueVersao.id == 1))
+        self.definir(versao or 0)
+        return self.valor
+
+    async def incrementar(self, db: AsyncSession) -> int:
+        """
+        Sobe a versão dentro da transação de quem chamou. Só chame definir() depois do commit.
+        O UPDATE trava a linha única até o commit: use numa transação curta, depois do commit da
+        mudança (eventos.publicar_mudanca), e não dentro da transação que trava as roupas.
+        """
+        return await db.scalar(
+            update(EstoqueVersao)
+            .where(EstoqueVersao.id == 1)
+            .values(versao=EstoqueVersao.versao + 1)
+            .returning(EstoqueVersao.versao)
+        )
+
+
+versao_estoque = VersaoEstoque(ttl=settings.ESTOQUE_VERSAO_TTL_SEGUNDOS)
@@ -0,0 +1,91 @@
+# Testes: python -m pytest backend/tests
+#
+# Por padrão rodam num SQLite temporário (tabelas criadas pelos models). Com TEST_DATABASE_URL
+# apontando para um Postgres já migrado (alembic upgrade head) rodam nele, e os testes marcados
+# com `postgres` (planos de consulta, poda de partições) deixam de ser pulados.
+# Nunca usa o DATABASE_URL do .env: os testes gravam no banco.
+import asyncio
+import os
+import tempfile
+import uuid
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="sicro-testes-")
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{_TMP}/sicro.db"
+os.environ["DATABASE_REPLICA_URL"] = ""
+os.environ.setdefault("SECRET_KEY", "testes")
+os.environ["EVENTOS_BACKEND"] = "memoria"
+os.environ["AQUECIMENTO"] = "false"
+os.environ["ADMISSAO"] = "false"
+os.environ["ARQUIVO_DIR"] = os.path.join(_TMP, "arquivo")
+
+import httpx  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+
+from backend.core.security import criar_token  # noqa: E402
+from backend.database.connection import Base, engine  # noqa: E402
+from backend.database.replica import fechar_engines  # noqa: E402
+from backend.models import (  # noqa: E402,F401
+    usuario, catalogo, roupa, movimentacao, movimentacao_diaria, estoque_versao, idempotencia, alerta, snapshot,
+)
+
+POSTGRES = engine.dialect.name == "postgresql"
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "postgres: precisa de TEST_DATABASE_URL com um Postgres migrado")
+
+
+def pytest_collection_modifyitems(config, items):
+    if POSTGRES:
+        return
+    pular = pytest.mark.skip(reason="precisa de TEST_DATABASE_URL (Postgres)")
+    for item in items:
+        if "postgres" in item.keywords:
+            item.add_marker(pular)
+
+
+async def _criar_tabelas():
+    # No Postgres as tabelas vêm das migrações (partições, índices parciais); aqui só o SQLite
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        versao = estoque_versao.EstoqueVersao
+        if await conn.scalar(select(versao.id).where(versao.id == 1)) is None:
+            await conn.execute(insert(versao).values(id=1, versao=0))
+
+
+@pytest.fixture(scope="session")
+def executar():
+    """Roda uma corrotina no loop da sessão (o pool do engine fica preso ao loop em que conectou)."""
+    loop = asyncio.new_event_loop()
+    if not POSTGRES:
+        loop.run_until_complete(_criar_tabelas())
+    yield loop.run_until_complete
+    loop.run_until_complete(fechar_engines())
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def app():
+    from backend.main import app
+    return app
+
+
+@pytest.fixture
+def cliente(app, executar):
+    cliente = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testes", timeout=60)
+    yield cliente
+    executar(cliente.aclose())
+
+
+@pytest.fixture
+def admin():
+    return {"Authorization": f"Bearer {criar_token({'sub': 'testes', 'role': 'admin'})}"}
+
+
+@pytest.fixture
+def tipo():
+    """Um tipo de roupa que ainda não existe no banco (cada teste tem o seu)."""
+    return f"Teste {uuid.uuid4().hex[:8]}"
+
@@ -0,0 +1,42 @@
+# Aquecimento da subida: uma falha passageira do banco não deixa o /pronto em 503 para sempre.
+from backend.core.config import settings
+from backend.services.aquecimento import Aquecimento
+
+
+def _aquecimento_que_falha(vezes: int) -> Aquecimento:
+    aquecimento = Aquecimento()
+    falhas = iter(range(vezes))
+
+    async def executar():
+        if next(falhas, None) is not None:
+            raise ConnectionError("banco fora do ar")
+
+    aquecimento._executar = executar
+    return aquecimento
+
+
+def test_segunda_tentativa_deixa_pronto(executar, monkeypatch):
+    monkeypatch.setattr(settings, "AQUECIMENTO", True)
+    monkeypatch.setattr(settings, "AQUECIMENTO_ESPERA_SEGUNDOS", 0)
+    aquecimento = _aquecimento_que_falha(1)
+
+    executar(aquecimento.executar())
+
+    assert aquecimento.pronto
+    assert aquecimento.resumo()["estado"] == "pronto"
+    assert aquecimento.resumo()["tentativas"] == 2
+    assert aquecimento.resumo()["erro"] is None
+
+
+def test_desiste_depois_das_tentativas_com_o_erro_no_resumo(executar, monkeypatch):
+    monkeypatch.setattr(settings, "AQUECIMENTO", True)
+    monkeypatch.setattr(settings, "AQUECIMENTO_ESPERA_SEGUNDOS", 0)
+    monkeypatch.setattr(settings, "AQUECIMENTO_TENTATIVAS", 3)
+    aquecimento = _aquecimento_que_falha(10)
+
+    executar(aquecimento.executar())
+
+    assert aquecimento.pronto
+    assert aquecimento.resumo()["estado"] == "incompleto"
+    assert aquecimento.resumo()["tentativas"] == 3
+    assert aquecimento.resumo()["erro"] == "ConnectionError: banco fora do ar"
@@ -0,0 +1,108 @@
+# Leitura do arquivo frio: colunas filtradas primeiro, lotes do export montados aos poucos.
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from backend.routes import estoque
+from backend.services.arquivo import ArquivoFrio
+from backend.services.historico import FUSO_BR, FiltrosHistorico, codificar_cursor
+
+MES = date(2020, 3, 1)
+
+
+@pytest.fixture
+def arquivo(tmp_path):
+    aleatorio = random.Random(7)
+    inicio = datetime(2020, 3, 1, tzinfo=FUSO_BR)
+    linhas = [
+        {
+            "id": i, "ordem_id": f"ORD-{i // 3}", "usuario": aleatorio.choice(["ana", "bia"]), "item_id": 1,
+            "tipo": aleatorio.choice(["Macacão", "Bota"]), "tamanho": aleatorio.choice(["M", "G", None]),
+            "quantidade": 1 + i % 5, "acao": aleatorio.choice(["entrada", "saida"]),
+            # Várias linhas no mesmo instante: o cursor desempata pelo id
+            "data": inicio + timedelta(minutes=aleatorio.randrange(31 * 24 * 60) // 7 * 7),
+        }
+        for i in range(1, 2001)
+    ]
+    arquivo = ArquivoFrio(str(tmp_path))
+    arquivo.gravar_segmento(MES, linhas)
+    return arquivo, sorted(linhas, key=lambda l: (l["data"], l["id"]))
+
+
+def _esperado(linhas, filtros: FiltrosHistorico, antes=None):
+    return [
+        l["id"] for l in linhas
+        if (filtros.data_inicio is None or l["data"] >= filtros.data_inicio)
+        and (filtros.data_fim is None or l["data"] < filtros.data_fim)
+        and (antes is None or (l["data"], l["id"]) < antes)
+        and all(getattr(filtros, c) in (None, l[c]) for c in ("usuario", "tipo", "tamanho", "acao", "ordem_id"))
+    ]
+
+
+FILTROS = [
+    FiltrosHistorico(),
+    FiltrosHistorico(usuario="ana", acao="saida"),
+    FiltrosHistorico(tipo="Bota", tamanho="G"),
+    FiltrosHistorico(ordem_id="ORD-10"),
+    FiltrosHistorico(data_inicio=datetime(2020, 3, 10, tzinfo=FUSO_BR), data_fim=datetime(2020, 3, 20, 12, tzinfo=FUSO_BR)),
+    FiltrosHistorico(usuario="ninguem"),
+]
+
+
+@pytest.mark.parametrize("filtros", FILTROS)
+def test_lotes_do_export(executar, arquivo, filtros):
+    arquivo, linhas = arquivo
+
+    async def lotes():
+        return [lote async for lote in arquivo.lotes(filtros, 100)]
+
+    recebidos = executar(lotes())
+    assert all(0 < len(lote) <= 100 for lote in recebidos)
+    assert [l.id for lote in recebidos for l in lote] == _esperado(linhas, filtros)
+
+
+@pytest.mark.parametrize("filtros", FILTROS)
+def test_paginas_do_historico(arquivo, filtros):
+    arquivo, linhas = arquivo
+    esperado = _esperado(linhas, filtros)[::-1]
+
+    recebidos, cursor = [], None
+    while True:
+        pagina = arquivo._pagina(filtros, cursor, 150)
+        recebidos += [l.id for l in pagina]
+        if len(pagina) < 150:
+            break
+        cursor = codificar_cursor(pagina[-1].data, pagina[-1].id)
+    assert recebidos == esperado
+
+
+def test_filtro_sem_resultado_nao_le_as_outras_colunas(arquivo):
+    arquivo, _ = arquivo
+    segmento = arquivo._ler(arquivo.segmentos()[0])
+    assert arquivo._pagina(FiltrosHistorico(acao="inexistente"), None, 10) == []
+    assert set(segmento._colunas) == {"data", "acao"}
+
+
+def test_pagina_do_banco_para_o_arquivo(executar, cliente, admin, tipo, tmp_path, monkeypatch):
+    # O cursor sai da última linha do banco (sem fuso no SQLite) e a página seguinte vem do arquivo
+    arquivo = ArquivoFrio(str(tmp_path))
+    arquivo.gravar_segmento(MES, [{
+        "id": 1, "ordem_id": "ORD-ARQ", "usuario": "ana", "item_id": 1, "tipo": tipo, "tamanho": "M",
+        "quantidade": 1, "acao": "entrada", "data": datetime(2020, 3, 5, tzinfo=FUSO_BR),
+    }])
+    monkeypatch.setattr(estoque, "arquivo_frio", arquivo)
+
+    corpo = {"itens": [{"tipo": tipo, "tamanho": "M", "quantidade": 1, "acao": "entrada"}]}
+    for _ in range(2):
+        assert executar(cliente.post("/api/movimentar", json=corpo, headers=admin)).status_code == 200
+
+    recebidos, params = [], {"tipo": tipo, "limite": 2}
+    while True:
+        resposta = executar(cliente.get("/api/historico", params=params, headers=admin))
+        assert resposta.status_code == 200, resposta.text
+        recebidos += [l["ordem_id"] for l in resposta.json()]
+        if "X-Proximo-Cursor" not in resposta.headers:
+            break
+        params["cursor"] = resposta.headers["X-Proximo-Cursor"]
+    assert len(recebidos) == 3 and recebidos[-1] == "ORD-ARQ"
@@ -0,0 +1,45 @@
+# Tamanho NULL e "" são o mesmo item (índice único em COALESCE(tamanho, '')).
+from sqlalchemy import func, insert, select
+
+from backend.database.connection import AsyncSessionLocal
+from backend.models.catalogo import CatalogoItem
+from backend.models.roupa import Roupa
+from backend.services.catalogo import resolver_itens
+
+
+async def _itens(tipo: str):
+    """[(tamanho, saldo)] dos itens do catálogo com este tipo."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(CatalogoItem.tamanho, Roupa.saldo)
+            .outerjoin(Roupa, Roupa.item_id == CatalogoItem.id)
+            .where(CatalogoItem.tipo == tipo)
+        )
+        return result.all()
+
+
+def test_entradas_com_tamanho_nulo_e_vazio_sao_o_mesmo_item(executar, cliente, admin, tipo):
+    for tamanho in (None, "", None):
+        corpo = {"itens": [{"tipo": tipo, "tamanho": tamanho, "quantidade": 2, "acao": "entrada"}]}
+        resposta = executar(cliente.post("/api/movimentar", json=corpo, headers=admin))
+        assert resposta.status_code == 200, resposta.text
+
+    assert executar(_itens(tipo)) == [(None, 6)]
+
+
+async def _resolver_legado(tipo: str):
+    # Item gravado com "" antes da normalização: quem pede None (ou "") acha o mesmo id
+    async with AsyncSessionLocal() as db:
+        item_id = await db.scalar(
+            insert(CatalogoItem).values(tipo=tipo, tamanho="", sort_key=0, ativo=True).returning(CatalogoItem.id)
+        )
+        ids = await resolver_itens(db, {(tipo, None), (tipo, "")}, criar={(tipo, None), (tipo, "")})
+        total = await db.scalar(select(func.count()).select_from(CatalogoItem).where(CatalogoItem.tipo == tipo))
+        await db.rollback()
+    return item_id, ids, total
+
+
+def test_resolver_acha_item_legado_com_tamanho_vazio(executar, tipo):
+    item_id, ids, total = executar(_resolver_legado(tipo))
+    assert ids == {(tipo, None): item_id, (tipo, ""): item_id}
+    assert total == 1
@@ -0,0 +1,49 @@
+# reservar(): a chave que conflitou no INSERT pode ser apagada pelo limpar_expiradas antes do SELECT.
+import uuid
+
+from sqlalchemy import delete, select
+
+from backend.database.connection import AsyncSessionLocal
+from backend.database.dialeto import insert_upsert
+from backend.models.idempotencia import ChaveIdempotencia
+from backend.models.movimentacao import get_br_time
+from backend.services import idempotencia
+
+USUARIO = "testes"
+
+
+async def _reservar_com_limpeza_no_meio(chave: str):
+    """Na primeira volta, apaga a chave logo depois do INSERT que conflitou (como faria o limpar_expiradas)."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert_upsert(db, ChaveIdempotencia).values(
+            usuario=USUARIO, chave=chave, hash_requisicao="antigo", criada_em=get_br_time(),
+        ))
+        await db.commit()
+
+    async with AsyncSessionLocal() as db:
+        executar_original = db.execute
+        apagou = False
+
+        async def executar(stmt, *args, **kwargs):
+            nonlocal apagou
+            resultado = await executar_original(stmt, *args, **kwargs)
+            if not apagou:
+                apagou = True
+                # Mesma transação: no SQLite outra conexão não escreve enquanto esta segura o arquivo
+                await executar_original(delete(ChaveIdempotencia).where(ChaveIdempotencia.chave == chave))
+            return resultado
+
+        db.execute = executar
+        anterior = await idempotencia.reservar(db, USUARIO, chave, "novo")
+        await db.commit()
+        gravado = await executar_original(
+            select(ChaveIdempotencia.hash_requisicao).where(ChaveIdempotencia.chave == chave)
+        )
+        return anterior, gravado.scalar()
+
+
+def test_reservar_trata_chave_apagada_no_meio_como_nova(executar):
+    chave = uuid.uuid4().hex
+    anterior, hash_gravado = executar(_reservar_com_limpeza_no_meio(chave))
+    assert anterior is None
+    assert hash_gravado == "novo"
@@ -0,0 +1,10 @@
+# /metrics não tem login de usuário: sem METRICAS_TOKEN só é montado no SQLite local.
+from backend.core.config import settings
+
+from backend.tests.conftest import POSTGRES
+
+
+def test_metrics_sem_token_so_no_sqlite(executar, cliente):
+    assert not settings.METRICAS_TOKEN
+    resposta = executar(cliente.get("/metrics"))
+    assert resposta.status_code == (404 if POSTGRES else 200)
@@ -0,0 +1,51 @@
+# Concorrência no /movimentar: nenhuma atualização perdida e nenhuma saída além do saldo.
+import asyncio
+
+from sqlalchemy import func, select
+
+from backend.database.connection import AsyncSessionLocal
+from backend.models.catalogo import CatalogoItem
+from backend.models.movimentacao import Movimentacao
+from backend.models.roupa import Roupa
+
+CONCORRENTES = 20
+
+
+async def _estado(tipo: str):
+    """(saldo em roupas, linhas de entrada no histórico, linhas de saída no histórico) do item."""
+    async with AsyncSessionLocal() as db:
+        item_id = await db.scalar(select(CatalogoItem.id).where(CatalogoItem.tipo == tipo))
+        saldo = await db.scalar(select(Roupa.saldo).where(Roupa.item_id == item_id))
+        linhas = dict((await db.execute(
+            select(Movimentacao.acao, func.count()).where(Movimentacao.item_id == item_id).group_by(Movimentacao.acao)
+        )).all())
+    return saldo, linhas.get("entrada", 0), linhas.get("saida", 0)
+
+
+async def _ordens(cliente, headers, tipo: str, acao: str, n: int, quantidade: int = 1):
+    corpo = {"itens": [{"tipo": tipo, "tamanho": "M", "quantidade": quantidade, "acao": acao}]}
+    return await asyncio.gather(*(cliente.post("/api/movimentar", json=corpo, headers=headers) for _ in range(n)))
+
+
+def test_entradas_concorrentes_no_mesmo_item(executar, cliente, admin, tipo):
+    respostas = executar(_ordens(cliente, admin, tipo, "entrada", CONCORRENTES, quantidade=3))
+
+    assert [r.status_code for r in respostas] == [200] * CONCORRENTES
+    saldo, entradas, saidas = executar(_estado(tipo))
+    assert saldo == 3 * CONCORRENTES
+    assert (entradas, saidas) == (CONCORRENTES, 0)
+
+
+def test_saidas_concorrentes_nao_passam_do_saldo(executar, cliente, admin, tipo):
+    inicial = CONCORRENTES // 4
+    executar(_ordens(cliente, admin, tipo, "entrada", 1, quantidade=inicial))
+
+    respostas = executar(_ordens(cliente, admin, tipo, "saida", CONCORRENTES))
+
+    assert [r.status_code for r in respostas] == [200] * CONCORRENTES
+    mensagens = [r.json()["mensagem"][0] for r in respostas]
+    assert sum(m.startswith("Saída de 1") for m in mensagens) == inicial
+    assert sum(m.startswith("Erro: saldo insuficiente") for m in mensagens) == CONCORRENTES - inicial
+    saldo, entradas, saidas = executar(_estado(tipo))
+    assert saldo == 0
+    assert (entradas, saidas) == (1, inicial)
@@ -0,0 +1,74 @@
+# Partições mensais de movimentacoes (Postgres): mês que já tem linhas na partição padrão.
+import uuid
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import insert, text
+
+from backend.database.connection import engine
+from backend.database.particoes import (
+    PADRAO, TABELA, _proximo_mes, estatisticas_particoes, garantir_particoes, nome_particao,
+)
+from backend.models.catalogo import CatalogoItem
+from backend.models.movimentacao import Movimentacao, get_br_time
+from backend.services.historico import FUSO_BR
+
+pytestmark = pytest.mark.postgres
+
+
+async def _particoes(conn) -> dict:
+    """nome da partição -> True se é a padrão."""
+    result = await conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT' "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:tabela)"
+    ), {"tabela": TABELA})
+    return dict(result.all())
+
+
+async def _mes_com_linha_na_padrao():
+    # Um mês depois da última partição: a linha cai na padrão
+    async with engine.begin() as conn:
+        ultima = max(p for p, padrao in (await _particoes(conn)).items() if not padrao)
+        mes = _proximo_mes(_proximo_mes(date(int(ultima[14:18]), int(ultima[19:21]), 1)))
+        item_id = await conn.scalar(
+            insert(CatalogoItem).values(tipo=f"Teste {uuid.uuid4().hex[:8]}", sort_key=0, ativo=True)
+            .returning(CatalogoItem.id)
+        )
+        mov_id = await conn.scalar(insert(Movimentacao).values(
+            ordem_id="ORD-teste", usuario="testes", item_id=item_id, quantidade=1, acao="entrada",
+            data=datetime(mes.year, mes.month, 10, tzinfo=FUSO_BR),
+        ).returning(Movimentacao.id))
+    return mes, mov_id, item_id
+
+
+async def _criar_e_conferir(mes: date, mov_id: int, item_id: int):
+    hoje = get_br_time().date()
+    criadas = []
+    try:
+        async with engine.begin() as conn:
+            criadas = await garantir_particoes(conn, meses_futuros=(mes.year - hoje.year) * 12 + mes.month - hoje.month)
+        async with engine.connect() as conn:
+            onde = await conn.scalar(text(
+                f"SELECT c.relname FROM {TABELA} m JOIN pg_class c ON c.oid = m.tableoid WHERE m.id = :id"
+            ), {"id": mov_id})
+            particoes = await _particoes(conn)
+        return criadas, onde, particoes
+    finally:
+        # Devolve o banco como estava
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DELETE FROM {TABELA} WHERE id = :id"), {"id": mov_id})
+            await conn.execute(text("DELETE FROM sicro.catalogo_itens WHERE id = :id"), {"id": item_id})
+            for nome in criadas:
+                await conn.execute(text(f"DROP TABLE sicro.{nome}"))
+
+
+def test_particao_com_linhas_na_padrao(executar):
+    mes, mov_id, item_id = executar(_mes_com_linha_na_padrao())
+    realocadas = estatisticas_particoes.realocadas
+    criadas, onde, particoes = executar(_criar_e_conferir(mes, mov_id, item_id))
+
+    assert nome_particao(mes) in criadas
+    assert onde == nome_particao(mes)
+    assert particoes[PADRAO.split(".")[1]] is True          # a padrão voltou como DEFAULT
+    assert estatisticas_particoes.realocadas == realocadas + 1
+    assert nome_particao(mes) not in estatisticas_particoes.bloqueadas
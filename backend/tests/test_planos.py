@@ -0,0 +1,40 @@
+# Planos das consultas quentes e poda das partições (backend/bench/planos.py), um teste por verificação.
+# Só no Postgres; os de índice/custo precisam do banco populado: python -m backend.bench gerar --linhas 1m
+import pytest
+from sqlalchemy import text
+
+from backend.bench.planos import LINHAS_SEQ_SCAN, conferir, verificacoes
+from backend.database.connection import engine
+
+pytestmark = pytest.mark.postgres
+
+VERIFICACOES = verificacoes()
+
+
+async def _analisar():
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE sicro.movimentacoes, sicro.movimentacao_diaria, sicro.roupas, sicro.catalogo_itens"))
+        await conn.commit()
+        return await conn.scalar(text(
+            "SELECT coalesce(sum(c.reltuples), 0) FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'sicro.movimentacoes'::regclass"
+        ))
+
+
+@pytest.fixture(scope="module")
+def linhas_historico(executar):
+    return executar(_analisar())
+
+
+async def _conferir(verificacao):
+    async with engine.connect() as conn:
+        return await conferir(conn, verificacao)
+
+
+@pytest.mark.parametrize("verificacao", VERIFICACOES, ids=[v.nome for v in VERIFICACOES])
+def test_plano(executar, linhas_historico, verificacao):
+    # A poda é decidida pelo intervalo das partições; índice e custo só dizem algo num banco populado
+    if verificacao.particoes is None and linhas_historico < LINHAS_SEQ_SCAN:
+        pytest.skip(f"histórico com {int(linhas_historico)} linhas (popule com python -m backend.bench gerar)")
+    resultado = executar(_conferir(verificacao))
+    assert resultado["ok"], f"{verificacao.nome}: {'; '.join(resultado['problemas'])}"
@@ -0,0 +1,47 @@
+# Ticket do /api/saldo/stream: o JWT de acesso não vai na URL e o ticket não serve para o resto da API.
+import logging
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from backend.core.log import OcultarSegredosUrl
+from backend.core.security import criar_token, verificar_token_stream
+
+
+def _request(headers: dict = None) -> Request:
+    cabecalhos = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/api/saldo/stream", "headers": cabecalhos})
+
+
+def test_ticket_abre_o_stream_e_mais_nada(executar, cliente, admin):
+    resposta = executar(cliente.post("/api/saldo/ticket", headers=admin))
+    assert resposta.status_code == 200
+    ticket = resposta.json()["ticket"]
+
+    assert verificar_token_stream(_request(), ticket=ticket)["sub"] == "testes"
+    resposta = executar(cliente.get("/api/saldo", headers={"Authorization": f"Bearer {ticket}"}))
+    assert resposta.status_code == 401
+    resposta = executar(cliente.post("/api/saldo/ticket", headers={"Authorization": f"Bearer {ticket}"}))
+    assert resposta.status_code == 401
+
+
+def test_stream_recusa_jwt_de_acesso_na_url(executar, cliente, admin):
+    token = criar_token({"sub": "testes", "role": "admin"})
+    with pytest.raises(HTTPException) as erro:
+        verificar_token_stream(_request(), ticket=token)
+    assert erro.value.status_code == 401
+    resposta = executar(cliente.get("/api/saldo/stream", params={"token": token}))
+    assert resposta.status_code == 401
+
+    # Pelo header Authorization o JWT de acesso continua valendo
+    assert verificar_token_stream(_request(admin))["sub"] == "testes"
+
+
+def test_log_de_acesso_nao_mostra_o_ticket():
+    registro = logging.LogRecord(
+        "uvicorn.access", logging.INFO, __file__, 0, '%s - "%s %s HTTP/%s" %d',
+        ("1.2.3.4:5", "GET", "/api/saldo/stream?ticket=abc.def&x=1", "1.1", 200), None,
+    )
+    OcultarSegredosUrl().filter(registro)
+    assert registro.getMessage() == '1.2.3.4:5 - "GET /api/saldo/stream?ticket=***&x=1 HTTP/1.1" 200'
@@ -0,0 +1,51 @@
+# Versão do estoque: sobe depois do commit, numa transação curta, e não trava ordens de outros itens.
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from backend.database.connection import AsyncSessionLocal
+from backend.models.estoque_versao import EstoqueVersao
+from backend.schemas.estoque import ItemMovimentacao
+from backend.services.estoque import aplicar_movimentacoes
+from backend.services.eventos import broker, publicar_mudanca
+
+
+async def _versao():
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(EstoqueVersao.versao).where(EstoqueVersao.id == 1))
+
+
+def _entrada(tipo: str):
+    return [ItemMovimentacao(tipo=tipo, tamanho="M", quantidade=1, acao="entrada")]
+
+
+def test_movimentar_sobe_a_versao_e_avisa_o_stream(executar, cliente, admin, tipo):
+    antes = executar(_versao())
+    fila = broker.assinar()
+    try:
+        corpo = {"itens": [{"tipo": tipo, "tamanho": "M", "quantidade": 1, "acao": "entrada"}]}
+        assert executar(cliente.post("/api/movimentar", json=corpo, headers=admin)).status_code == 200
+        evento = fila.get_nowait()
+    finally:
+        broker.cancelar(fila)
+    assert executar(_versao()) == antes + 1
+    assert evento["versao"] == antes + 1
+    assert [i["tipo"] for i in evento["itens"]] == [tipo]
+
+
+async def _ordem_com_outra_aberta(tipo_a: str, tipo_b: str):
+    async with AsyncSessionLocal() as aberta, AsyncSessionLocal() as db:
+        # A fica com a transação aberta (roupas de A travadas); B, de outro item, não pode esperar por ela
+        await aplicar_movimentacoes(aberta, _entrada(tipo_a), "testes", "ORD-A")
+        try:
+            resultado = await asyncio.wait_for(aplicar_movimentacoes(db, _entrada(tipo_b), "testes", "ORD-B"), 5)
+            await db.commit()
+            return await asyncio.wait_for(publicar_mudanca(db, resultado.evento), 5)
+        finally:
+            await aberta.rollback()
+
+
+@pytest.mark.postgres
+def test_ordens_de_itens_diferentes_nao_esperam_uma_pela_outra(executar, tipo):
+    assert executar(_ordem_com_outra_aberta(tipo, tipo + " B")) is not None
@@ -20,9 +20,27 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// Servidor sobrecarregado (503) ou limite de requisições (429): espera o Retry-After e tenta
+// uma vez só. Só repete o que é seguro repetir: GET ou envio com Idempotency-Key.
+const MAX_RETRY_AFTER_MS = 10000;
+
+function podeRepetir(config) {
+  if (!config || config._repetida) return false;
+  return (config.method || "get").toLowerCase() === "get" || !!config.headers?.["Idempotency-Key"];
+}
+
 api.interceptors.response.use(
   (r) => r,
   async (error) => {
+    const status = error.response?.status;
+    if ((status === 503 || status === 429) && podeRepetir(error.config)) {
+      const segundos = Number(error.response.headers["retry-after"]) || 1;
+      if (segundos * 1000 <= MAX_RETRY_AFTER_MS) {
+        error.config._repetida = true;
+        await new Promise((resolve) => setTimeout(resolve, segundos * 1000));
+        return api.request(error.config);
+      }
+    }
     if (error.response && error.response.status === 401) {
       try {
         const refreshResp = await axios.post(
@@ -198,6 +198,37 @@ export default function Planejamento() {
           </div>
         </div>
 
+        {/* Previsão de cobertura (mais urgentes primeiro) */}
+        <div className="bg-gray-900 p-6 rounded-2xl border border-gray-800 shadow-lg mb-8">
+            <h3 className="text-lg font-bold text-white mb-4">⏳ Previsão de Cobertura</h3>
+            <div className="overflow-x-auto">
+              <table className="w-full text-sm text-left text-gray-400">
+                  <thead className="text-xs uppercase bg-gray-800 text-gray-500">
+                      <tr>
+                        <th className="px-6 py-3">Item</th>
+                        <th className="px-6 py-3 text-center">Consumo/dia</th>
+                        <th className="px-6 py-3 text-center">Estoque</th>
+                        <th className="px-6 py-3 text-right">Dura até</th>
+                      </tr>
+                  </thead>
+                  <tbody>
+                      {dados?.previsao_dias.map((item) => (
+                          <tr key={item.item_id} className="hover:bg-gray-800/50 border-b border-gray-800">
+                              <td className="px-6 py-4 font-medium text-white">{item.item}</td>
+                              <td className="px-6 py-4 text-center text-yellow-500">{item.consumo_diario}</td>
+                              <td className="px-6 py-4 text-center text-blue-400">{item.saldo}</td>
+                              <td className={`px-6 py-4 text-right ${item.dias_cobertura !== null && item.dias_cobertura < 7 ? "text-red-400 font-bold" : "text-gray-300"}`}>
+                                {item.dias_cobertura === null
+                                  ? "Sem consumo"
+                                  : `${item.dias_cobertura} dias (${new Date(item.data_ruptura + "T00:00:00").toLocaleDateString("pt-BR")})`}
+                              </td>
+                          </tr>
+                      ))}
+                  </tbody>
+              </table>
+            </div>
+        </div>
+
         {/* Tabela (Essa parte vai para o PDF como texto) */}
         <div className="bg-gray-900 p-6 rounded-2xl border border-gray-800 shadow-lg">
             <h3 className="text-lg font-bold text-white mb-4">❄️ Itens com Baixa Movimentação</h3>
@@ -10,6 +10,9 @@ export default function Entrada() {
   // Ref para focar no input de quantidade após selecionar tamanho
   const qtdInputRef = useRef(null);
 
+  // Idempotency-Key do envio atual: a mesma em cliques repetidos e no reenvio após o refresh do token
+  const chaveEnvioRef = useRef(null);
+
   const tamanhosDisponiveis = ["PP", "P", "M", "G", "GG", "G3", "G4"];
   
   // Configuração visual dos tipos (Ícones e Cores)
@@ -30,6 +33,7 @@ export default function Entrada() {
     if (tipoObj?.requerTamanho && !novoItem.tamanho) return toast.error("Selecione o tamanho.");
 
     setMovimentacoes([...movimentacoes, novoItem]);
+    chaveEnvioRef.current = null; // lista mudou: é outro envio
     setNovoItem({ tipo: "", tamanho: "", quantidade: "" }); 
     // Foca de volta no início ou mantém fluxo? Aqui reseta.
   };
@@ -37,6 +41,7 @@ export default function Entrada() {
   // Remove item
   const removerItem = (index) => {
     setMovimentacoes(movimentacoes.filter((_, i) => i !== index));
+    chaveEnvioRef.current = null;
   };
 
   // Atalho de teclado (Enter para adicionar)
@@ -58,7 +63,12 @@ export default function Entrada() {
           acao: "entrada",
         })),
       };
-      await api.post("/api/movimentar", payload, { withCredentials: true });
+      if (!chaveEnvioRef.current) chaveEnvioRef.current = crypto.randomUUID();
+      await api.post("/api/movimentar", payload, {
+        withCredentials: true,
+        headers: { "Idempotency-Key": chaveEnvioRef.current },
+      });
+      chaveEnvioRef.current = null;
       toast.success("✅ Entrada registrada com sucesso!");
       setMovimentacoes([]);
     } catch (err) {
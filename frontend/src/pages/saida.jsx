@@ -9,6 +9,9 @@ export default function Saida() {
   // Ref para focar no input de quantidade automaticamente
   const qtdInputRef = useRef(null);
 
+  // Idempotency-Key do envio atual: a mesma em cliques repetidos e no reenvio após o refresh do token
+  const chaveEnvioRef = useRef(null);
+
   const tamanhosDisponiveis = ["PP", "P", "M", "G", "GG", "G3", "G4"];
   
   // Configuração visual (Mesmos ícones)
@@ -28,12 +31,14 @@ export default function Saida() {
     if (tipoObj?.requerTamanho && !novoItem.tamanho) return toast.error("Selecione o tamanho.");
 
     setMovimentacoes([...movimentacoes, novoItem]);
+    chaveEnvioRef.current = null; // lista mudou: é outro envio
     setNovoItem({ tipo: "", tamanho: "", quantidade: "" }); 
   };
 
   // Remove item
   const removerItem = (index) => {
     setMovimentacoes(movimentacoes.filter((_, i) => i !== index));
+    chaveEnvioRef.current = null;
   };
 
   // Atalho: Enter no campo de quantidade já adiciona
@@ -55,7 +60,12 @@ export default function Saida() {
           acao: "saida", // <--- Importante: Define que é saída
         })),
       };
-      await api.post("/api/movimentar", payload, { withCredentials: true });
+      if (!chaveEnvioRef.current) chaveEnvioRef.current = crypto.randomUUID();
+      await api.post("/api/movimentar", payload, {
+        withCredentials: true,
+        headers: { "Idempotency-Key": chaveEnvioRef.current },
+      });
+      chaveEnvioRef.current = null;
       toast.success("✅ Saída registrada com sucesso!");
       setMovimentacoes([]);
     } catch (err) {
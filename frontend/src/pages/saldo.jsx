@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useCallback, useEffect, useState } from "react";
 import api from "../api.js";
 import { useNavigate } from "react-router-dom";
 
@@ -12,6 +12,19 @@ function organizarPorTipo(lista) {
   return agrupado;
 }
 
+// Aplica os saldos recebidos ao vivo (SSE) no estoque já agrupado
+function aplicarSaldos(estoque, itens) {
+  const novo = { ...estoque };
+  itens.forEach(({ tipo, tamanho, saldo }) => {
+    const lista = [...(novo[tipo] || [])];
+    const i = lista.findIndex((r) => r.tamanho === tamanho);
+    if (i >= 0) lista[i] = { ...lista[i], saldo };
+    else lista.push({ tipo, tamanho, saldo });
+    novo[tipo] = lista;
+  });
+  return novo;
+}
+
 // --- ÍCONES PROFISSIONAIS (SVG) ---
 const Icons = {
   Macacao: (className) => (
@@ -61,13 +74,7 @@ export default function Saldo() {
     }
   };
 
-  useEffect(() => {
-    const token = localStorage.getItem("access_token");
-    if (!token) {
-      navigate("/login");
-      return;
-    }
-
+  const carregar = useCallback(() => {
     api.get("/api/saldo", { withCredentials: true })
       .then((res) => {
         setEstoque(organizarPorTipo(res.data));
@@ -79,6 +86,53 @@ export default function Saldo() {
       });
   }, [navigate]);
 
+  useEffect(() => {
+    const token = localStorage.getItem("access_token");
+    if (!token) {
+      navigate("/login");
+      return;
+    }
+    carregar();
+  }, [navigate, carregar]);
+
+  // Atualização ao vivo: o backend empurra cada variação de saldo logo após o /movimentar
+  useEffect(() => {
+    let fonte;
+    let religar;
+    let ativo = true;
+
+    // O JWT não vai na URL (iria para os logs de acesso): pede um ticket curto só para o stream
+    const conectar = async () => {
+      if (!localStorage.getItem("access_token")) return;
+      let ticket;
+      try {
+        ({ data: { ticket } } = await api.post("/api/saldo/ticket"));
+      } catch {
+        if (ativo) religar = setTimeout(() => { conectar(); carregar(); }, 5000);
+        return;
+      }
+      if (!ativo) return;
+      fonte = new EventSource(`${api.defaults.baseURL}/api/saldo/stream?ticket=${encodeURIComponent(ticket)}`);
+      fonte.addEventListener("saldo", (e) => {
+        const evento = JSON.parse(e.data);
+        if (evento.recarregar) carregar();
+        else setEstoque((atual) => aplicarSaldos(atual, evento.itens));
+      });
+      // Caiu (ou o token expirou): tenta de novo com um ticket novo e recarrega o que perdeu
+      fonte.onerror = () => {
+        fonte.close();
+        religar = setTimeout(() => { conectar(); carregar(); }, 5000);
+      };
+    };
+
+    conectar();
+    return () => {
+      ativo = false;
+      fonte?.close();
+      clearTimeout(religar);
+    };
+  }, [carregar]);
+
   // Status visual
   const getStatusCor = (qtd) => {
     if (qtd === 0) return "text-red-500 font-black";